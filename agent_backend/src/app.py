@@ -1,22 +1,32 @@
 import asyncio
 import logging
-import os
+from contextlib import asynccontextmanager
+from typing import Optional
 
-from auth_lib import database, oauth2
+from auth_lib import database, metrics, oauth2
 from auth_lib.schemas import note_schemas, user_schemas
 from fastapi import Depends, FastAPI, HTTPException, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
-from note_bot.agent.prompts import grammar_agent_prompt
-from note_bot.bot import Bot, client
-from sqlalchemy.orm import Session
+from note_bot.agent.tools import notes_client
+from note_bot.bot import Bot
+from note_bot.coalescing import FlushPolicy
+from note_bot.grammar import grammar_checker
+from note_bot.sessions import session_manager
 
 logger = logging.getLogger(__name__)
 
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    await notes_client.close_http_client()
+
+
 app = FastAPI(
     title="Note Bot API",
     description="Note Bot API",
     version="0.1.0",
+    lifespan=lifespan,
 )
 
 origins = ["*"]
@@ -29,33 +39,50 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+app.include_router(metrics.router)
+
 bot = Bot()
 
 
 @app.websocket("/ws/bot")
-async def websocket_chat(websocket: WebSocket, db: Session = Depends(database.get_db)):
+async def websocket_chat(websocket: WebSocket):
     request_header_dict = dict(websocket.headers)
     access_token = request_header_dict.get("authorization", "").replace("Bearer ", "")
     if access_token == "":
         await websocket.close(code=1008)
         raise HTTPException(status_code=401, detail="Missing access token")
 
-    oauth2.get_current_user(access_token, db)
+    # Sessions are closed before the connection is accepted, so an open chat
+    # holds no database connection.
+    async with database.async_sessions() as (db, replica):
+        await oauth2.async_authenticate(access_token, db, replica)
 
     await websocket.accept()
-    bot = Bot()
+    bot = Bot(FlushPolicy.from_query(websocket.query_params))
+    run: Optional[asyncio.Task] = None
     try:
         while True:
-            data = await asyncio.wait_for(websocket.receive_json(), timeout=60)
+            try:
+                data = await asyncio.wait_for(websocket.receive_json(), timeout=60)
+            except asyncio.TimeoutError:
+                if run is not None and not run.done():
+                    continue
+                raise
             messages = data.get("messages", [])
             if not messages:
                 await websocket.send_json(
                     {"type": "error", "message": "Messages cannot be empty"}
                 )
                 continue
-            await bot.run(messages, access_token, websocket)
+            # A new message supersedes the answer that is still streaming.
+            await session_manager.cancel(run)
+            run = asyncio.create_task(
+                session_manager.run(bot, messages, access_token, websocket)
+            )
     except WebSocketDisconnect:
         print("WebSocket disconnected")
+    finally:
+        await session_manager.cancel(run)
 
 
 @app.post("/bot/grammar", response_model=note_schemas.Note)
@@ -63,9 +90,5 @@ async def grammar_check(
     user_input: note_schemas.Note,
     current_user: user_schemas.UserOut = Depends(oauth2.get_current_user),
 ):
-    response = await client.responses.create(
-        model=os.getenv("MODEL_NAME", "gpt-4o-mini-2024-07-18"),
-        input=grammar_agent_prompt.format(user_input=user_input.note),
-    )
-
-    return note_schemas.Note(note=response.output_text)
+    corrected = await grammar_checker.check_note(user_input.note)
+    return note_schemas.Note(note=corrected)
@@ -3,15 +3,56 @@ from __future__ import annotations as _annotations
 import json
 import os
 from contextvars import ContextVar
-from typing import Optional
-from urllib.parse import urljoin
+from typing import Any, Optional, Tuple
 
-import requests
+import httpx
 from agents import (
     function_tool,
 )
+from auth_lib.cache import TTLCache
 
 jwt_token: ContextVar[Optional[str]] = ContextVar("jwt_token", default=None)
+tool_cache: ContextVar[Optional[ToolCache]] = ContextVar("tool_cache", default=None)
+
+NOTES_TIMEOUT = float(os.getenv("NOTES_TIMEOUT", "10"))
+NOTES_CONNECT_TIMEOUT = float(os.getenv("NOTES_CONNECT_TIMEOUT", "5"))
+NOTES_MAX_CONNECTIONS = int(os.getenv("NOTES_MAX_CONNECTIONS", "100"))
+NOTES_MAX_KEEPALIVE_CONNECTIONS = int(
+    os.getenv("NOTES_MAX_KEEPALIVE_CONNECTIONS", "20")
+)
+NOTES_KEEPALIVE_EXPIRY = float(os.getenv("NOTES_KEEPALIVE_EXPIRY", "30"))
+NOTES_TOOL_CACHE_SIZE = int(os.getenv("NOTES_TOOL_CACHE_SIZE", "128"))
+NOTES_TOOL_CACHE_TTL = float(os.getenv("NOTES_TOOL_CACHE_TTL", "60"))
+
+_http_client: Optional[httpx.AsyncClient] = None
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """
+    Return the keep-alive connection pool to the notes API shared by every tool
+    call, creating it on first use.
+    """
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        _http_client = httpx.AsyncClient(
+            base_url=os.getenv("NOTES_URL", ""),
+            headers={"Content-Type": "application/json"},
+            timeout=httpx.Timeout(NOTES_TIMEOUT, connect=NOTES_CONNECT_TIMEOUT),
+            limits=httpx.Limits(
+                max_connections=NOTES_MAX_CONNECTIONS,
+                max_keepalive_connections=NOTES_MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=NOTES_KEEPALIVE_EXPIRY,
+            ),
+        )
+    return _http_client
+
+
+async def close_http_client() -> None:
+    """Close the shared connection pool, e.g. when the app shuts down."""
+    global _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
 
 
 class JWTTokenManager:
@@ -29,107 +70,147 @@ class JWTTokenManager:
             jwt_token.reset(self.token_context)
 
 
+class ToolCache:
+    """
+    Results of read-only tool calls made during one conversation.
+
+    Entries are keyed by the caller's JWT, the tool name and its arguments, and
+    are bounded in number and age. Hits and misses are counted for the run logs.
+    """
+
+    def __init__(
+        self, maxsize: int = NOTES_TOOL_CACHE_SIZE, ttl: float = NOTES_TOOL_CACHE_TTL
+    ):
+        self._cache: TTLCache[Tuple[Optional[str], str, str], str] = TTLCache(
+            maxsize, ttl
+        )
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _key(tool: str, arguments: dict) -> Tuple[Optional[str], str, str]:
+        return jwt_token.get(), tool, json.dumps(arguments, sort_keys=True)
+
+    def get(self, tool: str, arguments: dict) -> Optional[str]:
+        result = self._cache.get(self._key(tool, arguments))
+        if result is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return result
+
+    def set(self, tool: str, arguments: dict, result: str) -> None:
+        self._cache.set(self._key(tool, arguments), result)
+
+    def invalidate(self) -> None:
+        self._cache.clear()
+
+    def stats(self) -> str:
+        return f"hits={self.hits} misses={self.misses} size={len(self._cache)}"
+
+
+class ToolCacheManager:
+    """Context manager for exposing a conversation's ToolCache to the tools."""
+
+    def __init__(self, cache: ToolCache):
+        self.cache = cache
+        self.cache_context = None
+
+    def __enter__(self):
+        self.cache_context = tool_cache.set(self.cache)
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if self.cache_context is not None:
+            tool_cache.reset(self.cache_context)
+
+
+async def _cached_request(tool: str, path: str, **params: Any) -> Optional[str]:
+    """GET ``path`` unless the conversation already has this tool call's result."""
+    cache = tool_cache.get()
+    if cache is not None:
+        cached = cache.get(tool, {"path": path, **params})
+        if cached is not None:
+            return cached
+
+    result, ok = await _request("GET", path, params=params or None)
+    if cache is not None and ok and result is not None:
+        cache.set(tool, {"path": path, **params}, result)
+    return result
+
+
+async def _request(method: str, path: str, **kwargs: Any) -> Tuple[Optional[str], bool]:
+    """
+    Call the notes API as the current user and serialize the JSON response.
+
+    Returns the serialized body, or an error description, and whether the call
+    succeeded.
+    """
+    headers = {"Authorization": f"Bearer {jwt_token.get()}"}
+    try:
+        response = await get_http_client().request(
+            method, path, headers=headers, **kwargs
+        )
+        response.raise_for_status()
+        return (json.dumps(response.json()) if response.content else None), True
+    except httpx.HTTPStatusError as http_err:
+        error = {
+            "error": f"HTTP error occurred: {http_err}",
+            "status_code": http_err.response.status_code,
+        }
+        return json.dumps(error), False
+    except (httpx.HTTPError, ValueError) as req_err:
+        # ValueError covers a body that isn't JSON.
+        return json.dumps({"error": f"Request error occurred: {req_err}"}), False
+
+
 @function_tool
-def get_note(note_id: int) -> Optional[str]:
+async def get_note(note_id: int) -> Optional[str]:
     """
     Get a note by its ID.
 
     Args:
         note_id: The ID of the note to retrieve
-        token: Authentication token
 
     Returns:
         The note information
-
-    Raises:
-        requests.HTTPError: If the request fails
     """
-    url = urljoin(os.getenv("NOTES_URL", ""), f"notes/{note_id}")
-    headers = {"Content-Type": "application/json"}
-    token = jwt_token.get()
-    headers["Authorization"] = f"Bearer {token}"
-    response = requests.get(url, headers=headers)
-    try:
-        response.raise_for_status()
-        return json.dumps(response.json()) if response.content else None
-    except requests.exceptions.HTTPError as http_err:
-        return json.dumps(
-            {
-                "error": f"HTTP error occurred: {http_err}",
-                "status_code": response.status_code,
-            }
-        )
-    except requests.exceptions.RequestException as req_err:
-        return json.dumps({"error": f"Request error occurred: {req_err}"})
+    return await _cached_request("get_note", f"notes/{note_id}")
 
 
 @function_tool
-def get_notes(limit: int = 10, page: int = 1, search: str = "") -> Optional[str]:
+async def get_notes(limit: int = 10, page: int = 1, search: str = "") -> Optional[str]:
     """
     Get a list of notes with pagination and optional search.
 
     Args:
-        token: Authentication token
         limit: Maximum number of notes to return (max 10)
         page: Page number of results
         search: Optional search query
 
     Returns:
         A response containing the notes and pagination information
-
-    Raises:
-        requests.HTTPError: If the request fails
     """
-    url = urljoin(os.getenv("NOTES_URL", ""), "notes")
-    params = {"limit": limit, "page": page, "search": search}
-    headers = {"Content-Type": "application/json"}
-    token = jwt_token.get()
-    headers["Authorization"] = f"Bearer {token}"
-    response = requests.get(url, params=params, headers=headers)
-    try:
-        response.raise_for_status()
-        return json.dumps(response.json()) if response.content else None
-    except requests.exceptions.HTTPError as http_err:
-        return json.dumps(
-            {
-                "error": f"HTTP error occurred: {http_err}",
-                "status_code": response.status_code,
-            }
-        )
-    except requests.exceptions.RequestException as req_err:
-        return json.dumps({"error": f"Request error occurred: {req_err}"})
+    return await _cached_request(
+        "get_notes", "notes", limit=limit, page=page, search=search
+    )
 
 
 @function_tool
-def create_note(title: str, note: str) -> Optional[str]:
+async def create_note(title: str, note: str) -> Optional[str]:
     """
     Create a new note.
 
     Args:
-        note: The note data to create
-        token: Authentication token
+        title: The title of the note
+        note: The note content
 
     Returns:
         The created note information
-
-    Raises:
-        requests.HTTPError: If the request fails
     """
-    url = urljoin(os.getenv("NOTES_URL", ""), "notes")
     data = {"title": title, "note": note}
-    headers = {"Content-Type": "application/json"}
-    token = jwt_token.get()
-    headers["Authorization"] = f"Bearer {token}"
-    response = requests.post(url, json=data, headers=headers)
-    try:
-        response.raise_for_status()
-        return json.dumps(response.json()) if response.content else None
-    except requests.exceptions.HTTPError as http_err:
-        return json.dumps(
-            {
-                "error": f"HTTP error occurred: {http_err}",
-                "status_code": response.status_code,
-            }
-        )
-    except requests.exceptions.RequestException as req_err:
-        return json.dumps({"error": f"Request error occurred: {req_err}"})
+    result, ok = await _request("POST", "notes", json=data)
+    cache = tool_cache.get()
+    if ok and cache is not None:
+        # Listings and searches cached so far no longer include every note.
+        cache.invalidate()
+    return result
@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import asyncio
 import logging
 import os
 from typing import List, Optional
@@ -19,7 +20,8 @@ from openai import AsyncOpenAI
 from openai.types.responses import ResponseTextDeltaEvent
 
 from .agent.agent import notes_agent
-from .agent.tools.notes_client import JWTTokenManager
+from .coalescing import DeltaCoalescer, FlushPolicy
+from .agent.tools.notes_client import JWTTokenManager, ToolCache, ToolCacheManager
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -37,6 +39,11 @@ set_tracing_disabled(disabled=True)
 
 
 class Bot:
+    def __init__(self, flush_policy: Optional[FlushPolicy] = None) -> None:
+        # One Bot serves one conversation, so tool results are reused across turns.
+        self.tool_cache = ToolCache()
+        self.flush_policy = flush_policy or FlushPolicy()
+
     async def run(
         self,
         input_messages: List[TResponseInputItem],
@@ -45,7 +52,7 @@ class Bot:
     ) -> None:
         trace_id = gen_trace_id()
         with trace("Notes trace", trace_id=trace_id):
-            with JWTTokenManager(token):
+            with JWTTokenManager(token), ToolCacheManager(self.tool_cache):
                 if websocket is not None:
                     await self._websocket_stream(input_messages, websocket)
 
@@ -54,20 +61,38 @@ class Bot:
     ) -> None:
         """Handles WebSocket streaming."""
         response = Runner.run_streamed(notes_agent, input_messages)
+        deltas = DeltaCoalescer(websocket, self.flush_policy)
         logger.info("=== Run starting ===")
-        async for event in response.stream_events():
-            await self._handle_event(event, websocket)
+        try:
+            async for event in response.stream_events():
+                await self._handle_event(event, websocket, deltas)
+            await deltas.flush()
+        finally:
+            deltas.cancel()
+            # Stops the model and tool calls when the run is cancelled while an
+            # event is being sent; openai-agents 0.0.7 has no public cancel().
+            response._cleanup_tasks()
+        task = asyncio.current_task()
+        if task is not None and task.cancelling():
+            # stream_events() swallows a cancellation that arrives while it
+            # waits for the next event.
+            logger.info("=== Run cancelled ===")
+            raise asyncio.CancelledError
+        logger.info(f"=== Run complete, tool cache {self.tool_cache.stats()} ===")
 
-    async def _handle_event(self, event, websocket: WebSocket) -> None:
+    async def _handle_event(
+        self, event, websocket: WebSocket, deltas: DeltaCoalescer
+    ) -> None:
         """Processes different event types from the agent."""
         try:
             if event.type == "raw_response_event" and isinstance(
                 event.data, ResponseTextDeltaEvent
             ):
-                await websocket.send_json(
-                    {"type": "message_response", "message": event.data.delta}
-                )
-            elif event.type == "agent_updated_stream_event":
+                await deltas.add(event.data.delta)
+                return
+            # Buffered text goes out before anything that follows it.
+            await deltas.flush()
+            if event.type == "agent_updated_stream_event":
                 logger.info(f"Agent updated: {event.new_agent.name}")
             elif event.type == "run_item_stream_event":
                 if event.item.type == "tool_call_item":
@@ -0,0 +1,108 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+from typing import List, Mapping, NamedTuple, Optional
+
+from fastapi import WebSocket
+
+logger = logging.getLogger(__name__)
+
+BOT_DELTA_WINDOW_MS = int(os.getenv("BOT_DELTA_WINDOW_MS", "30"))
+BOT_DELTA_MAX_BYTES = int(os.getenv("BOT_DELTA_MAX_BYTES", "1024"))
+
+MAX_WINDOW_MS = 1000
+MAX_BYTES = 64 * 1024
+
+
+class FlushPolicy(NamedTuple):
+    """
+    Buffered deltas are sent ``window_ms`` after the first of them arrived, or
+    as soon as they reach ``max_bytes``. A zero window sends every delta alone.
+    """
+
+    window_ms: int = BOT_DELTA_WINDOW_MS
+    max_bytes: int = BOT_DELTA_MAX_BYTES
+
+    @classmethod
+    def from_query(cls, params: Mapping[str, str]) -> "FlushPolicy":
+        """Read ``delta_window_ms`` and ``delta_max_bytes`` overrides of a connection."""
+        default = cls()
+        return cls(
+            _bounded(
+                params.get("delta_window_ms"), default.window_ms, 0, MAX_WINDOW_MS
+            ),
+            _bounded(params.get("delta_max_bytes"), default.max_bytes, 1, MAX_BYTES),
+        )
+
+
+def _bounded(value: Optional[str], default: int, low: int, high: int) -> int:
+    try:
+        return min(max(int(value), low), high) if value is not None else default
+    except ValueError:
+        return default
+
+
+class DeltaCoalescer:
+    """
+    Joins the text deltas of one answer into fewer ``message_response`` frames.
+
+    The first delta is sent straight away to keep the time to first token low;
+    later ones are buffered according to the ``FlushPolicy``. Call ``flush``
+    before sending any other frame so the text stays in order.
+    """
+
+    def __init__(self, websocket: WebSocket, policy: FlushPolicy):
+        self.websocket = websocket
+        self.policy = policy
+        self._parts: List[str] = []
+        self._size = 0
+        self._started = False
+        self._timer: Optional[asyncio.Task] = None
+        self._lock = asyncio.Lock()
+
+    async def add(self, delta: str) -> None:
+        self._parts.append(delta)
+        self._size += len(delta.encode("utf-8"))
+        if (
+            not self._started
+            or self.policy.window_ms <= 0
+            or self._size >= self.policy.max_bytes
+        ):
+            self._started = True
+            await self.flush()
+        elif self._timer is None:
+            self._timer = asyncio.create_task(self._flush_later())
+
+    async def flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        await self._send()
+
+    def cancel(self) -> None:
+        """Drop the pending timer, e.g. when the answer is cancelled."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+    async def _flush_later(self) -> None:
+        await asyncio.sleep(self.policy.window_ms / 1000)
+        # Past this point the send must not be interrupted by ``flush``.
+        self._timer = None
+        try:
+            await self._send()
+        except Exception as e:
+            logger.error(f"Error sending buffered deltas: {e}")
+
+    async def _send(self) -> None:
+        async with self._lock:
+            if not self._parts:
+                return
+            message = "".join(self._parts)
+            self._parts.clear()
+            self._size = 0
+            await self.websocket.send_json(
+                {"type": "message_response", "message": message}
+            )
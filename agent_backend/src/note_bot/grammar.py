@@ -0,0 +1,200 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import logging
+import os
+import re
+from typing import Dict, List, Tuple
+
+from auth_lib.cache import TTLCache
+from openai import AsyncOpenAI
+from prometheus_client import Counter, Gauge
+
+from .agent.prompts import grammar_agent_prompt
+from .bot import client
+
+logger = logging.getLogger(__name__)
+
+MODEL_NAME = os.getenv("MODEL_NAME", "gpt-4o-mini-2024-07-18")
+GRAMMAR_CACHE_SIZE = int(os.getenv("GRAMMAR_CACHE_SIZE", "1024"))
+GRAMMAR_CACHE_TTL = float(os.getenv("GRAMMAR_CACHE_TTL", "3600"))
+GRAMMAR_MAX_CONCURRENCY = int(os.getenv("GRAMMAR_MAX_CONCURRENCY", "8"))
+GRAMMAR_LONG_NOTE_CHARS = int(os.getenv("GRAMMAR_LONG_NOTE_CHARS", "2000"))
+
+GRAMMAR_CACHE_REQUESTS = Counter(
+    "grammar_cache_requests",
+    "Grammar checks by outcome: served from cache, joined an identical check "
+    "in flight, or sent upstream.",
+    ["result"],
+)
+GRAMMAR_CHECKS_IN_FLIGHT = Gauge(
+    "grammar_checks_in_flight", "Grammar checks currently waiting on the model."
+)
+
+
+class GrammarChecker:
+    """
+    Checks text with the model, remembering results by content hash.
+
+    Results are kept in an LRU cache with a time to live, and identical checks
+    that arrive while one is already running wait for that one instead of
+    calling the model again.
+    """
+
+    def __init__(
+        self,
+        client: AsyncOpenAI,
+        model: str,
+        cache_size: int = GRAMMAR_CACHE_SIZE,
+        ttl: float = GRAMMAR_CACHE_TTL,
+        max_concurrency: int = GRAMMAR_MAX_CONCURRENCY,
+        long_note_chars: int = GRAMMAR_LONG_NOTE_CHARS,
+    ):
+        self.client = client
+        self.model = model
+        self.long_note_chars = long_note_chars
+        self._cache: TTLCache[str, str] = TTLCache(cache_size, ttl)
+        self._in_flight: Dict[str, asyncio.Task] = {}
+        self._upstream = asyncio.Semaphore(max_concurrency)
+
+    def _key(self, text: str) -> str:
+        # The prompt and model are part of the key so changing either one
+        # doesn't serve results produced by the other.
+        digest = hashlib.sha256()
+        for part in (self.model, grammar_agent_prompt, text):
+            digest.update(part.encode("utf-8"))
+            digest.update(b"\0")
+        return digest.hexdigest()
+
+    async def check_note(self, text: str) -> str:
+        """Check a note, block by block once it exceeds ``long_note_chars``."""
+        if len(text) > self.long_note_chars:
+            return await self.check_document(text)
+        return await self.check(text)
+
+    async def check_document(self, text: str) -> str:
+        """
+        Check a markdown document block by block and put it back together.
+
+        Blocks are checked concurrently and cached on their own, so editing one
+        paragraph of a long note only sends that paragraph to the model again.
+        Fenced code and blocks without any letters are left untouched.
+        """
+        segments = split_blocks(text)
+        checked = await asyncio.gather(
+            *(self._check_block(segment) for segment, prose in segments if prose)
+        )
+        corrected = iter(checked)
+        return "".join(
+            next(corrected) if prose else segment for segment, prose in segments
+        )
+
+    async def _check_block(self, block: str) -> str:
+        # Keep the block's own line ending; the model tends to drop or add some.
+        body = block.rstrip("\r\n")
+        corrected = await self.check(body)
+        return corrected.strip("\r\n") + block[len(body) :]
+
+    async def check(self, text: str) -> str:
+        key = self._key(text)
+        cached = self._cache.get(key)
+        if cached is not None:
+            GRAMMAR_CACHE_REQUESTS.labels("hit").inc()
+            return cached
+
+        task = self._in_flight.get(key)
+        if task is not None:
+            GRAMMAR_CACHE_REQUESTS.labels("shared").inc()
+        else:
+            GRAMMAR_CACHE_REQUESTS.labels("miss").inc()
+            task = asyncio.create_task(self._call(key, text))
+            task.add_done_callback(_log_failure)
+            self._in_flight[key] = task
+        # One caller giving up must not cancel the check the others wait for.
+        return await asyncio.shield(task)
+
+    async def _call(self, key: str, text: str) -> str:
+        try:
+            async with self._upstream:
+                GRAMMAR_CHECKS_IN_FLIGHT.inc()
+                try:
+                    response = await self.client.responses.create(
+                        model=self.model,
+                        input=grammar_agent_prompt.format(user_input=text),
+                    )
+                finally:
+                    GRAMMAR_CHECKS_IN_FLIGHT.dec()
+            self._cache.set(key, response.output_text)
+            return response.output_text
+        finally:
+            del self._in_flight[key]
+
+
+_FENCE = re.compile(r"^ {0,3}(`{3,}|~{3,})")
+_LETTER = re.compile(r"[^\W\d_]")
+
+
+def split_blocks(text: str) -> List[Tuple[str, bool]]:
+    """
+    Split markdown into consecutive ``(segment, is_prose)`` pairs on blank lines.
+
+    Joining the segments gives back ``text`` exactly. Blank lines between blocks
+    and fenced code blocks, which are never split, are marked as not prose.
+    """
+    segments: List[Tuple[str, bool]] = []
+    block: List[str] = []
+    blank: List[str] = []
+    fence = None
+
+    def flush(lines: List[str], prose: bool) -> None:
+        if lines:
+            segment = "".join(lines)
+            segments.append((segment, prose and bool(_LETTER.search(segment))))
+            lines.clear()
+
+    for line in text.splitlines(keepends=True):
+        if fence is not None:
+            block.append(line)
+            if _closes(line, fence):
+                flush(block, False)
+                fence = None
+            continue
+
+        match = _FENCE.match(line)
+        if match:
+            flush(blank, False)
+            flush(block, True)
+            fence = match.group(1)
+            block.append(line)
+        elif not line.strip():
+            flush(block, True)
+            blank.append(line)
+        else:
+            flush(blank, False)
+            block.append(line)
+
+    flush(blank, False)
+    flush(block, fence is None)
+    return segments
+
+
+def _closes(line: str, fence: str) -> bool:
+    # A closing fence uses the same character, at least as many times, and
+    # nothing else on the line.
+    match = _FENCE.match(line)
+    return (
+        match is not None
+        and match.group(1)[0] == fence[0]
+        and len(match.group(1)) >= len(fence)
+        and not line.strip().strip(fence[0])
+    )
+
+
+def _log_failure(task: asyncio.Task) -> None:
+    # Retrieves the exception even when every caller has given up waiting.
+    if not task.cancelled() and task.exception() is not None:
+        logger.error(f"Grammar check failed: {task.exception()}")
+
+
+grammar_checker = GrammarChecker(client, MODEL_NAME)
@@ -0,0 +1,123 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, List, Optional
+
+from agents import TResponseInputItem
+from fastapi import WebSocket
+from prometheus_client import Counter, Gauge
+
+from .bot import Bot
+
+logger = logging.getLogger(__name__)
+
+BOT_MAX_ACTIVE_RUNS = int(os.getenv("BOT_MAX_ACTIVE_RUNS", "32"))
+BOT_MAX_QUEUED_RUNS = int(os.getenv("BOT_MAX_QUEUED_RUNS", "64"))
+BOT_QUEUE_TIMEOUT = float(os.getenv("BOT_QUEUE_TIMEOUT", "10"))
+
+BOT_SESSIONS_ACTIVE = Gauge("bot_sessions_active", "Agent runs currently streaming.")
+BOT_SESSIONS_QUEUED = Gauge(
+    "bot_sessions_queued", "Agent runs waiting for a free run slot."
+)
+BOT_SESSIONS_REJECTED = Counter(
+    "bot_sessions_rejected",
+    "Agent runs turned away because the queue was full or the wait timed out.",
+    ["reason"],
+)
+BOT_SESSIONS_CANCELLED = Counter(
+    "bot_sessions_cancelled",
+    "Agent runs cancelled by a disconnect or a newer message.",
+)
+
+
+class SessionRejected(Exception):
+    pass
+
+
+class SessionManager:
+    """
+    Bounds the agent runs of all websocket sessions in this worker.
+
+    At most ``max_active`` runs stream at once. Further runs wait in a queue of
+    at most ``max_queued`` for up to ``queue_timeout`` seconds and are rejected
+    beyond that, so a burst of conversations can't pile up unbounded model and
+    tool calls.
+    """
+
+    def __init__(self, max_active: int, max_queued: int, queue_timeout: float):
+        self.max_active = max_active
+        self.max_queued = max_queued
+        self.queue_timeout = queue_timeout
+        self._slots = asyncio.Semaphore(max_active)
+        self._queued = 0
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        if self._queued >= self.max_queued and self._slots.locked():
+            BOT_SESSIONS_REJECTED.labels("queue_full").inc()
+            raise SessionRejected("The bot is busy, please retry later")
+
+        self._queued += 1
+        BOT_SESSIONS_QUEUED.inc()
+        try:
+            await asyncio.wait_for(self._slots.acquire(), self.queue_timeout)
+        except asyncio.TimeoutError:
+            BOT_SESSIONS_REJECTED.labels("timeout").inc()
+            raise SessionRejected("The bot is busy, please retry later")
+        finally:
+            self._queued -= 1
+            BOT_SESSIONS_QUEUED.dec()
+
+        BOT_SESSIONS_ACTIVE.inc()
+        try:
+            yield
+        finally:
+            BOT_SESSIONS_ACTIVE.dec()
+            self._slots.release()
+
+    async def run(
+        self,
+        bot: Bot,
+        messages: List[TResponseInputItem],
+        token: str,
+        websocket: WebSocket,
+    ) -> None:
+        """Stream one answer to ``websocket`` once a run slot is free."""
+        try:
+            async with self.slot():
+                await bot.run(messages, token, websocket)
+        except SessionRejected as e:
+            await _send_error(websocket, str(e))
+        except Exception as e:
+            logger.exception(f"Agent run failed: {e}")
+            await _send_error(websocket, "The bot failed to answer")
+
+    async def cancel(self, run: Optional[asyncio.Task]) -> None:
+        """Cancel a run that is still queued or streaming and wait for it to stop."""
+        if run is None or run.done():
+            return
+        BOT_SESSIONS_CANCELLED.inc()
+        run.cancel()
+        try:
+            await run
+        except asyncio.CancelledError:
+            current = asyncio.current_task()
+            if current is not None and current.cancelling():
+                raise
+        except Exception as e:
+            logger.error(f"Error cancelling agent run: {e}")
+
+
+async def _send_error(websocket: WebSocket, message: str) -> None:
+    try:
+        await websocket.send_json({"type": "error", "message": message})
+    except Exception as e:
+        logger.info(f"Could not report error to a closed websocket: {e}")
+
+
+session_manager = SessionManager(
+    BOT_MAX_ACTIVE_RUNS, BOT_MAX_QUEUED_RUNS, BOT_QUEUE_TIMEOUT
+)
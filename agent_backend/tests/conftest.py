@@ -0,0 +1,64 @@
+import pytest
+from app import app
+from auth_lib import database, models
+from auth_lib.database import Base, SessionLocal, engine
+from auth_lib.oauth2 import clear_caches, create_access_token
+from fastapi.testclient import TestClient
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import NullPool
+
+# TestClient runs every websocket session on a fresh event loop, so asyncpg
+# connections can't be pooled across them.
+async_engine = create_async_engine(
+    database.ASYNC_SQLALCHEMY_DATABASE_URL, poolclass=NullPool
+)
+
+
+class FakeWebSocket:
+    """Records the frames sent to it."""
+
+    def __init__(self):
+        self.sent = []
+
+    async def send_json(self, data):
+        self.sent.append(data)
+
+
+@pytest.fixture
+def websocket():
+    return FakeWebSocket()
+
+
+@pytest.fixture()
+def session():
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    clear_caches()
+    db = SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+@pytest.fixture()
+def client(session, monkeypatch):
+    monkeypatch.setattr(
+        database,
+        "AsyncSessionLocal",
+        async_sessionmaker(autoflush=False, expire_on_commit=False, bind=async_engine),
+    )
+    yield TestClient(app)
+
+
+@pytest.fixture
+def test_user(session):
+    user = models.User(name="luis", email="luis@gmail.com", password="password123")
+    session.add(user)
+    session.commit()
+    return user
+
+
+@pytest.fixture
+def token(test_user):
+    return create_access_token({"user_id": test_user.id, "user_email": test_user.email})
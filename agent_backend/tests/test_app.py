@@ -0,0 +1,90 @@
+import asyncio
+import time
+
+import app as app_module
+import pytest
+from auth_lib import database
+from fastapi import WebSocketDisconnect
+from sqlalchemy import event
+
+
+def test_websocket_authenticates_uncached_user(client, token):
+    with client.websocket_connect(
+        "/ws/bot", headers={"Authorization": f"Bearer {token}"}
+    ) as websocket:
+        websocket.send_json({"messages": []})
+
+        assert websocket.receive_json() == {
+            "type": "error",
+            "message": "Messages cannot be empty",
+        }
+
+
+def test_websocket_holds_no_connection_once_accepted(client, token):
+    connections = {"opened": 0, "open": 0}
+
+    def checkout(*args):
+        connections["opened"] += 1
+        connections["open"] += 1
+
+    def checkin(*args):
+        connections["open"] -= 1
+
+    pool = database.AsyncSessionLocal.kw["bind"].sync_engine.pool
+    event.listen(pool, "checkout", checkout)
+    event.listen(pool, "checkin", checkin)
+    try:
+        with client.websocket_connect(
+            "/ws/bot", headers={"Authorization": f"Bearer {token}"}
+        ) as websocket:
+            websocket.send_json({"messages": []})
+            websocket.receive_json()
+
+            assert connections == {"opened": 1, "open": 0}
+            assert database.engine.pool.checkedout() == 0
+    finally:
+        event.remove(pool, "checkout", checkout)
+        event.remove(pool, "checkin", checkin)
+
+
+def test_websocket_rejects_invalid_token(client, test_user):
+    with pytest.raises(WebSocketDisconnect):
+        with client.websocket_connect(
+            "/ws/bot", headers={"Authorization": "Bearer invalid"}
+        ) as websocket:
+            websocket.receive_json()
+
+
+def test_websocket_new_message_and_disconnect_cancel_runs(client, token, monkeypatch):
+    started, cancelled = [], []
+
+    class StubBot:
+        def __init__(self, flush_policy=None):
+            pass
+
+        async def run(self, messages, token, websocket):
+            started.append(messages[0])
+            try:
+                await asyncio.Event().wait()
+            except asyncio.CancelledError:
+                cancelled.append(messages[0])
+                raise
+
+    monkeypatch.setattr(app_module, "Bot", StubBot)
+    with client.websocket_connect(
+        "/ws/bot", headers={"Authorization": f"Bearer {token}"}
+    ) as websocket:
+        websocket.send_json({"messages": ["first"]})
+        websocket.send_json({"messages": ["second"]})
+        # Answered once both messages have been handled.
+        websocket.send_json({"messages": []})
+        websocket.receive_json()
+        assert started == ["first", "second"]
+        assert cancelled == ["first"]
+
+        websocket.close()
+        # The session is torn down right after the context exits.
+        deadline = time.monotonic() + 1
+        while len(cancelled) < 2 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert cancelled == ["first", "second"]
@@ -0,0 +1,136 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from note_bot.bot import Bot
+from note_bot.coalescing import (
+    BOT_DELTA_MAX_BYTES,
+    BOT_DELTA_WINDOW_MS,
+    DeltaCoalescer,
+    FlushPolicy,
+)
+from openai.types.responses import ResponseTextDeltaEvent
+
+
+def messages(websocket):
+    return [(frame["type"], frame["message"]) for frame in websocket.sent]
+
+
+def test_first_delta_is_sent_immediately(websocket):
+    deltas = DeltaCoalescer(websocket, FlushPolicy(window_ms=1000, max_bytes=1024))
+
+    async def run():
+        await deltas.add("Hello")
+        assert messages(websocket) == [("message_response", "Hello")]
+        await deltas.add(",")
+        await deltas.add(" world")
+        assert len(websocket.sent) == 1
+        deltas.cancel()
+
+    asyncio.run(run())
+
+
+def test_flushes_when_the_window_ends(websocket):
+    deltas = DeltaCoalescer(websocket, FlushPolicy(window_ms=20, max_bytes=1024))
+
+    async def run():
+        await deltas.add("Hello")
+        await deltas.add(",")
+        await deltas.add(" world")
+        await asyncio.sleep(0.05)
+        assert messages(websocket) == [
+            ("message_response", "Hello"),
+            ("message_response", ", world"),
+        ]
+        # The next delta starts a new window.
+        await deltas.add("!")
+        assert len(websocket.sent) == 2
+        await asyncio.sleep(0.05)
+        assert messages(websocket)[-1] == ("message_response", "!")
+
+    asyncio.run(run())
+
+
+def test_flushes_at_max_bytes(websocket):
+    deltas = DeltaCoalescer(websocket, FlushPolicy(window_ms=1000, max_bytes=4))
+
+    async def run():
+        await deltas.add("a")
+        await deltas.add("bc")
+        assert len(websocket.sent) == 1
+        # Two bytes in UTF-8 bring the buffer to four.
+        await deltas.add("é")
+        assert messages(websocket) == [
+            ("message_response", "a"),
+            ("message_response", "bcé"),
+        ]
+        deltas.cancel()
+
+    asyncio.run(run())
+
+
+def test_zero_window_sends_every_delta(websocket):
+    deltas = DeltaCoalescer(websocket, FlushPolicy(window_ms=0, max_bytes=1024))
+
+    async def run():
+        for delta in ("a", "b", "c"):
+            await deltas.add(delta)
+
+    asyncio.run(run())
+
+    assert messages(websocket) == [
+        ("message_response", "a"),
+        ("message_response", "b"),
+        ("message_response", "c"),
+    ]
+
+
+def text_delta(delta):
+    return SimpleNamespace(
+        type="raw_response_event",
+        data=ResponseTextDeltaEvent.model_construct(
+            type="response.output_text.delta", delta=delta
+        ),
+    )
+
+
+def tool_output(output):
+    return SimpleNamespace(
+        type="run_item_stream_event",
+        item=SimpleNamespace(type="tool_call_output_item", output=output),
+    )
+
+
+def test_buffered_text_is_sent_before_tool_frames(websocket):
+    bot = Bot(FlushPolicy(window_ms=1000, max_bytes=1024))
+    deltas = DeltaCoalescer(websocket, bot.flush_policy)
+
+    async def run():
+        for event in (text_delta("Let me "), text_delta("look"), tool_output("[]")):
+            await bot._handle_event(event, websocket, deltas)
+
+    asyncio.run(run())
+
+    assert messages(websocket) == [
+        ("message_response", "Let me "),
+        ("message_response", "look"),
+        ("tool_call_output", "[]"),
+    ]
+
+
+@pytest.mark.parametrize(
+    "params, expected",
+    [
+        ({}, (BOT_DELTA_WINDOW_MS, BOT_DELTA_MAX_BYTES)),
+        ({"delta_window_ms": "0", "delta_max_bytes": "1"}, (0, 1)),
+        ({"delta_window_ms": "50", "delta_max_bytes": "2048"}, (50, 2048)),
+        ({"delta_window_ms": "-5", "delta_max_bytes": "0"}, (0, 1)),
+        ({"delta_window_ms": "99999", "delta_max_bytes": "999999"}, (1000, 65536)),
+        (
+            {"delta_window_ms": "soon", "delta_max_bytes": "1.5"},
+            (BOT_DELTA_WINDOW_MS, BOT_DELTA_MAX_BYTES),
+        ),
+    ],
+)
+def test_flush_policy_from_query(params, expected):
+    assert FlushPolicy.from_query(params) == expected
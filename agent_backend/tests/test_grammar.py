@@ -0,0 +1,195 @@
+import asyncio
+import json
+import time
+
+import httpx
+from note_bot.agent.prompts import grammar_agent_prompt
+from note_bot.grammar import GrammarChecker, split_blocks
+from openai import AsyncOpenAI
+from prometheus_client import REGISTRY
+
+PREFIX, _, SUFFIX = grammar_agent_prompt.partition("{user_input}")
+
+NOTE = (
+    "# Teh title\n"
+    "\n"
+    "Teh first paragraph\n"
+    "spans two lines.\n"
+    "\n\n"
+    "```python\n"
+    "teh = 1\n"
+    "\n"
+    "print(teh)\n"
+    "```\n"
+    "\n"
+    "- teh list\n"
+    "- second item\n"
+    "\n"
+    "---\n"
+    "\n"
+    "Teh last paragraph."
+)
+
+
+class FakeOpenAI:
+    """An OpenAI-compatible Responses endpoint fixing "teh" to "the"."""
+
+    def __init__(self, delay: float = 0.01):
+        self.delay = delay
+        self.inputs = []
+        self.active = 0
+        self.max_active = 0
+
+    async def __call__(self, request: httpx.Request) -> httpx.Response:
+        body = json.loads(request.content)
+        text = body["input"][len(PREFIX) : len(body["input"]) - len(SUFFIX)]
+        self.inputs.append(text)
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        await asyncio.sleep(self.delay)
+        self.active -= 1
+        corrected = text.replace("teh", "the").replace("Teh", "The")
+        return httpx.Response(
+            200,
+            json={
+                "id": "resp_1",
+                "object": "response",
+                "created_at": time.time(),
+                "model": body["model"],
+                "parallel_tool_calls": True,
+                "tool_choice": "auto",
+                "tools": [],
+                "output": [
+                    {
+                        "type": "message",
+                        "id": "msg_1",
+                        "role": "assistant",
+                        "status": "completed",
+                        # Models often wrap the answer in extra line breaks.
+                        "content": [
+                            {
+                                "type": "output_text",
+                                "text": f"\n{corrected}\n",
+                                "annotations": [],
+                            }
+                        ],
+                    }
+                ],
+            },
+        )
+
+
+def make_checker(fake: FakeOpenAI, **kwargs) -> GrammarChecker:
+    client = AsyncOpenAI(
+        base_url="http://fake-openai/v1",
+        api_key="fake",
+        max_retries=0,
+        http_client=httpx.AsyncClient(transport=httpx.MockTransport(fake)),
+    )
+    return GrammarChecker(client, "fake-model", **kwargs)
+
+
+def cache_requests(result: str) -> float:
+    return (
+        REGISTRY.get_sample_value("grammar_cache_requests_total", {"result": result})
+        or 0.0
+    )
+
+
+def test_check_cache_hit_skips_model():
+    fake = FakeOpenAI()
+    checker = make_checker(fake)
+    hits, misses = cache_requests("hit"), cache_requests("miss")
+
+    async def run():
+        return [await checker.check("teh note") for _ in range(3)]
+
+    assert asyncio.run(run()) == ["\nthe note\n"] * 3
+    assert fake.inputs == ["teh note"]
+    assert cache_requests("miss") - misses == 1
+    assert cache_requests("hit") - hits == 2
+
+
+def test_concurrent_identical_checks_share_one_call():
+    fake = FakeOpenAI()
+    checker = make_checker(fake)
+    shared, misses = cache_requests("shared"), cache_requests("miss")
+
+    async def run():
+        return await asyncio.gather(*(checker.check("teh note") for _ in range(5)))
+
+    assert asyncio.run(run()) == ["\nthe note\n"] * 5
+    assert fake.inputs == ["teh note"]
+    assert cache_requests("miss") - misses == 1
+    assert cache_requests("shared") - shared == 4
+
+
+def test_cancelled_caller_does_not_cancel_shared_check():
+    fake = FakeOpenAI(delay=0.05)
+    checker = make_checker(fake)
+
+    async def run():
+        first = asyncio.create_task(checker.check("teh note"))
+        second = asyncio.create_task(checker.check("teh note"))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        corrected = await second
+        # The result was cached although the caller that started it left.
+        return first.cancelled(), corrected, await checker.check("teh note")
+
+    cancelled, corrected, cached = asyncio.run(run())
+
+    assert cancelled
+    assert corrected == cached == "\nthe note\n"
+    assert fake.inputs == ["teh note"]
+
+
+def test_split_blocks():
+    segments = split_blocks(NOTE)
+
+    assert "".join(segment for segment, _ in segments) == NOTE
+    assert [segment for segment, prose in segments if prose] == [
+        "# Teh title\n",
+        "Teh first paragraph\nspans two lines.\n",
+        "- teh list\n- second item\n",
+        "Teh last paragraph.",
+    ]
+    assert ("```python\nteh = 1\n\nprint(teh)\n```\n", False) in segments
+
+
+def test_check_document_checks_blocks_concurrently():
+    fake = FakeOpenAI()
+    checker = make_checker(fake, max_concurrency=2)
+
+    corrected = asyncio.run(checker.check_document(NOTE))
+
+    assert corrected == NOTE.replace("Teh", "The").replace("- teh", "- the")
+    assert "teh = 1\n\nprint(teh)" in corrected
+    assert len(fake.inputs) == 4
+    assert fake.max_active == 2
+
+
+def test_check_document_only_resends_changed_blocks():
+    fake = FakeOpenAI()
+    checker = make_checker(fake)
+
+    async def run():
+        await checker.check_document(NOTE)
+        edited = NOTE.replace("spans two lines.", "spans teh two lines.")
+        return await checker.check_document(edited)
+
+    corrected = asyncio.run(run())
+
+    assert "The first paragraph\nspans the two lines.\n" in corrected
+    assert fake.inputs[4:] == ["Teh first paragraph\nspans teh two lines."]
+
+
+def test_check_note_chunks_long_notes_only():
+    fake = FakeOpenAI()
+    checker = make_checker(fake, long_note_chars=len(NOTE) - 1)
+
+    asyncio.run(checker.check_note(NOTE[:50]))
+    assert fake.inputs == [NOTE[:50]]
+
+    asyncio.run(checker.check_note(NOTE))
+    assert len(fake.inputs) == 5
@@ -0,0 +1,238 @@
+import asyncio
+import json
+
+import httpx
+import pytest
+from agents import RunContextWrapper
+from auth_lib.cache import TTLCache
+from note_bot.agent.tools import notes_client
+from note_bot.agent.tools.notes_client import (
+    JWTTokenManager,
+    ToolCache,
+    ToolCacheManager,
+    create_note,
+    get_note,
+    get_notes,
+)
+
+
+class NotesAPI:
+    """Answers notes API calls, recording them and who made them."""
+
+    def __init__(self):
+        self.requests = []
+        self.status_code = 200
+
+    def __call__(self, request: httpx.Request) -> httpx.Response:
+        self.requests.append(
+            (
+                request.method,
+                request.url.path,
+                request.headers["Authorization"],
+            )
+        )
+        if self.status_code != 200:
+            return httpx.Response(self.status_code, json={"detail": "error"})
+        if request.method == "POST":
+            return httpx.Response(201, json={"id": 1, **json.loads(request.content)})
+        return httpx.Response(200, json={"path": request.url.path})
+
+
+@pytest.fixture
+def notes_api(monkeypatch):
+    api = NotesAPI()
+    monkeypatch.setattr(
+        notes_client,
+        "_http_client",
+        httpx.AsyncClient(base_url="http://notes/", transport=httpx.MockTransport(api)),
+    )
+    return api
+
+
+def invoke(tool, **arguments):
+    return tool.on_invoke_tool(RunContextWrapper(None), json.dumps(arguments))
+
+
+def run_tools(cache, token, *calls):
+    async def run():
+        with JWTTokenManager(token), ToolCacheManager(cache):
+            return [await invoke(tool, **arguments) for tool, arguments in calls]
+
+    return asyncio.run(run())
+
+
+def test_http_client_is_shared_until_closed():
+    async def run():
+        client = notes_client.get_http_client()
+        assert notes_client.get_http_client() is client
+        await notes_client.close_http_client()
+        assert client.is_closed
+        reopened = notes_client.get_http_client()
+        assert reopened is not client
+        await notes_client.close_http_client()
+
+    asyncio.run(run())
+
+
+def test_http_client_uses_configured_timeouts(monkeypatch):
+    monkeypatch.setenv("NOTES_URL", "http://notes/")
+    monkeypatch.setattr(notes_client, "NOTES_TIMEOUT", 7.0)
+
+    async def run():
+        client = notes_client.get_http_client()
+        try:
+            assert client.base_url == "http://notes/"
+            assert client.timeout.read == 7.0
+            assert client.timeout.connect == notes_client.NOTES_CONNECT_TIMEOUT
+        finally:
+            await notes_client.close_http_client()
+
+    asyncio.run(run())
+
+
+def test_requests_carry_the_current_token(notes_api):
+    run_tools(None, "first", (get_note, {"note_id": 1}))
+    run_tools(None, "second", (create_note, {"title": "title", "note": "note"}))
+
+    assert notes_api.requests == [
+        ("GET", "/notes/1", "Bearer first"),
+        ("POST", "/notes", "Bearer second"),
+    ]
+
+
+def test_request_errors_are_returned(monkeypatch):
+    def refuse(request):
+        raise httpx.ConnectError("Connection refused", request=request)
+
+    monkeypatch.setattr(
+        notes_client,
+        "_http_client",
+        httpx.AsyncClient(
+            base_url="http://notes/", transport=httpx.MockTransport(refuse)
+        ),
+    )
+
+    result = run_tools(None, "token", (get_note, {"note_id": 1}))[0]
+
+    assert "Connection refused" in json.loads(result)["error"]
+
+
+def test_non_json_responses_are_returned_as_errors(monkeypatch):
+    cache = ToolCache()
+    monkeypatch.setattr(
+        notes_client,
+        "_http_client",
+        httpx.AsyncClient(
+            base_url="http://notes/",
+            transport=httpx.MockTransport(
+                lambda request: httpx.Response(200, text="<html>Bad gateway</html>")
+            ),
+        ),
+    )
+
+    result = run_tools(cache, "token", (get_note, {"note_id": 1}))[0]
+
+    assert "error" in json.loads(result)
+    assert cache.stats() == "hits=0 misses=1 size=0"
+
+
+def test_repeated_reads_are_cached(notes_api):
+    cache = ToolCache()
+
+    results = run_tools(
+        cache,
+        "token",
+        (get_note, {"note_id": 1}),
+        (get_note, {"note_id": 1}),
+        (get_notes, {"limit": 10, "page": 1, "search": ""}),
+        (get_notes, {"limit": 10, "page": 2, "search": ""}),
+    )
+
+    assert results[0] == results[1]
+    assert [path for _, path, _ in notes_api.requests] == [
+        "/notes/1",
+        "/notes",
+        "/notes",
+    ]
+    assert (cache.hits, cache.misses) == (1, 3)
+
+
+def test_cache_is_scoped_by_token(notes_api):
+    cache = ToolCache()
+
+    run_tools(cache, "first", (get_note, {"note_id": 1}))
+    run_tools(cache, "second", (get_note, {"note_id": 1}))
+    run_tools(cache, "first", (get_note, {"note_id": 1}))
+
+    assert [auth for _, _, auth in notes_api.requests] == [
+        "Bearer first",
+        "Bearer second",
+    ]
+
+
+def test_cache_entries_expire_and_are_bounded(notes_api):
+    now = [0.0]
+    cache = ToolCache()
+    cache._cache = TTLCache(maxsize=2, ttl=60, clock=lambda: now[0])
+
+    run_tools(
+        cache,
+        "token",
+        (get_note, {"note_id": 1}),
+        (get_note, {"note_id": 2}),
+        # Evicts note 1, the least recently used.
+        (get_note, {"note_id": 3}),
+        (get_note, {"note_id": 1}),
+    )
+    now[0] += 60
+    run_tools(cache, "token", (get_note, {"note_id": 3}))
+
+    assert [path for _, path, _ in notes_api.requests] == [
+        "/notes/1",
+        "/notes/2",
+        "/notes/3",
+        "/notes/1",
+        "/notes/3",
+    ]
+
+
+def test_create_note_invalidates_cache(notes_api):
+    cache = ToolCache()
+
+    run_tools(
+        cache,
+        "token",
+        (get_notes, {"limit": 10, "page": 1, "search": ""}),
+        (create_note, {"title": "title", "note": "note"}),
+        (get_notes, {"limit": 10, "page": 1, "search": ""}),
+    )
+
+    assert [method for method, _, _ in notes_api.requests] == ["GET", "POST", "GET"]
+
+
+def test_failed_calls_are_not_cached(notes_api):
+    cache = ToolCache()
+    notes_api.status_code = 404
+
+    results = run_tools(cache, "token", (get_note, {"note_id": 1}))
+    assert json.loads(results[0])["status_code"] == 404
+
+    notes_api.status_code = 200
+    results = run_tools(
+        cache, "token", (get_note, {"note_id": 1}), (get_note, {"note_id": 1})
+    )
+
+    assert json.loads(results[0]) == {"path": "/notes/1"}
+    assert len(notes_api.requests) == 2
+
+
+def test_failed_create_keeps_cache(notes_api):
+    cache = ToolCache()
+
+    run_tools(cache, "token", (get_note, {"note_id": 1}))
+    notes_api.status_code = 500
+    run_tools(cache, "token", (create_note, {"title": "title", "note": "note"}))
+    notes_api.status_code = 200
+    run_tools(cache, "token", (get_note, {"note_id": 1}))
+
+    assert [method for method, _, _ in notes_api.requests] == ["GET", "POST"]
@@ -0,0 +1,213 @@
+import asyncio
+import json
+
+import httpx
+import pytest
+from agents import set_default_openai_client
+from note_bot import bot as bot_module
+from note_bot.bot import Bot
+from note_bot.coalescing import FlushPolicy
+from note_bot.sessions import SessionManager
+from openai import AsyncOpenAI
+from prometheus_client import REGISTRY
+
+
+class StubBot:
+    """Answers once ``release`` is set, recording how its runs ended."""
+
+    def __init__(self):
+        self.release = asyncio.Event()
+        self.started = 0
+        self.finished = 0
+        self.cancelled = 0
+
+    async def run(self, messages, token, websocket):
+        self.started += 1
+        try:
+            await self.release.wait()
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        self.finished += 1
+        await websocket.send_json({"type": "final_output", "message": None})
+
+
+def sample(name: str, labels=None) -> float:
+    return REGISTRY.get_sample_value(name, labels or {}) or 0.0
+
+
+def errors(websocket):
+    return [frame["message"] for frame in websocket.sent if frame["type"] == "error"]
+
+
+def test_rejects_runs_past_the_queue(websocket):
+    manager = SessionManager(max_active=1, max_queued=1, queue_timeout=5)
+    stub = StubBot()
+    rejected = sample("bot_sessions_rejected_total", {"reason": "queue_full"})
+
+    async def run():
+        active = asyncio.create_task(manager.run(stub, [], "token", websocket))
+        queued = asyncio.create_task(manager.run(stub, [], "token", websocket))
+        await asyncio.sleep(0.01)
+        await manager.run(stub, [], "token", websocket)
+        assert sample("bot_sessions_active") == 1
+        assert sample("bot_sessions_queued") == 1
+        stub.release.set()
+        await asyncio.gather(active, queued)
+
+    asyncio.run(run())
+
+    assert errors(websocket) == ["The bot is busy, please retry later"]
+    assert stub.finished == 2
+    assert sample("bot_sessions_rejected_total", {"reason": "queue_full"}) == (
+        rejected + 1
+    )
+    assert sample("bot_sessions_active") == 0
+    assert sample("bot_sessions_queued") == 0
+
+
+def test_rejects_runs_waiting_too_long(websocket):
+    manager = SessionManager(max_active=1, max_queued=5, queue_timeout=0.01)
+    stub = StubBot()
+    rejected = sample("bot_sessions_rejected_total", {"reason": "timeout"})
+
+    async def run():
+        active = asyncio.create_task(manager.run(stub, [], "token", websocket))
+        await asyncio.sleep(0)
+        await manager.run(stub, [], "token", websocket)
+        stub.release.set()
+        await active
+
+    asyncio.run(run())
+
+    assert errors(websocket) == ["The bot is busy, please retry later"]
+    assert stub.started == 1
+    assert sample("bot_sessions_rejected_total", {"reason": "timeout"}) == (
+        rejected + 1
+    )
+    assert sample("bot_sessions_queued") == 0
+
+
+def test_cancel_stops_active_and_queued_runs(websocket):
+    manager = SessionManager(max_active=1, max_queued=1, queue_timeout=5)
+    stub = StubBot()
+    cancelled = sample("bot_sessions_cancelled_total")
+
+    async def run():
+        active = asyncio.create_task(manager.run(stub, [], "token", websocket))
+        queued = asyncio.create_task(manager.run(stub, [], "token", websocket))
+        await asyncio.sleep(0.01)
+        await manager.cancel(queued)
+        await manager.cancel(active)
+        await manager.cancel(active)
+        return active, queued
+
+    active, queued = asyncio.run(run())
+
+    assert active.cancelled() and queued.cancelled()
+    assert stub.started == stub.cancelled == 1
+    assert websocket.sent == []
+    assert sample("bot_sessions_cancelled_total") == cancelled + 2
+    assert sample("bot_sessions_active") == 0
+    assert sample("bot_sessions_queued") == 0
+
+
+def test_failed_run_is_reported(websocket):
+    manager = SessionManager(max_active=1, max_queued=1, queue_timeout=5)
+
+    class FailingBot:
+        async def run(self, messages, token, websocket):
+            raise RuntimeError("boom")
+
+    asyncio.run(manager.run(FailingBot(), [], "token", websocket))
+
+    assert errors(websocket) == ["The bot failed to answer"]
+    assert sample("bot_sessions_active") == 0
+
+
+class EndlessCompletion:
+    """A chat completions endpoint streaming one word every 10ms until closed."""
+
+    def __init__(self):
+        self.closed = asyncio.Event()
+
+    async def __call__(self, request: httpx.Request) -> httpx.Response:
+        return httpx.Response(
+            200,
+            headers={"content-type": "text/event-stream"},
+            content=self._events(),
+        )
+
+    async def _events(self):
+        try:
+            while True:
+                chunk = {
+                    "id": "chatcmpl-1",
+                    "object": "chat.completion.chunk",
+                    "created": 0,
+                    "model": "fake-model",
+                    "choices": [
+                        {
+                            "index": 0,
+                            "delta": {"role": "assistant", "content": "word "},
+                            "finish_reason": None,
+                        }
+                    ],
+                }
+                yield f"data: {json.dumps(chunk)}\n\n".encode()
+                await asyncio.sleep(0.01)
+        finally:
+            self.closed.set()
+
+
+@pytest.fixture
+def endless_completion():
+    fake = EndlessCompletion()
+    set_default_openai_client(
+        AsyncOpenAI(
+            base_url="http://fake-openai/v1",
+            api_key="fake",
+            max_retries=0,
+            http_client=httpx.AsyncClient(transport=httpx.MockTransport(fake)),
+        ),
+        use_for_tracing=False,
+    )
+    yield fake
+    set_default_openai_client(bot_module.client, use_for_tracing=False)
+
+
+class StalledWebSocket:
+    """A websocket whose client stops reading after the first frame."""
+
+    def __init__(self):
+        self.sent = []
+
+    async def send_json(self, data):
+        self.sent.append(data)
+        if len(self.sent) > 1:
+            await asyncio.Event().wait()
+
+
+def test_cancelled_bot_run_stops_the_model_call(endless_completion):
+    # Cancelling while a frame is being sent leaves stream_events() suspended,
+    # so Bot stops the model call through the private
+    # RunResultStreaming._cleanup_tasks() of openai-agents; this fails once
+    # that no longer works.
+    websocket = StalledWebSocket()
+
+    async def run():
+        # Without a window every delta is sent by the run itself.
+        bot = Bot(FlushPolicy(window_ms=0))
+        task = asyncio.create_task(
+            bot.run([{"role": "user", "content": "hi"}], "token", websocket)
+        )
+        while len(websocket.sent) < 2:
+            await asyncio.sleep(0.01)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        await asyncio.wait_for(endless_completion.closed.wait(), 1)
+
+    asyncio.run(run())
+
+    assert websocket.sent[0] == {"type": "message_response", "message": "word "}
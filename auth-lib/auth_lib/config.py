@@ -1,3 +1,5 @@
+from typing import Dict, List, Optional
+
 from pydantic_settings import BaseSettings
 from dotenv import load_dotenv
 
@@ -13,9 +15,43 @@ class Settings(BaseSettings):
     secret_key: str
     algorithm: str
     access_token_expire_minutes: int
+    database_pool_size: int = 5
+    database_max_overflow: int = 10
+    database_pool_timeout: float = 30
+    database_pool_recycle: int = 1800
+    database_pool_pre_ping: bool = True
+    database_replica_urls: List[str] = []
+    database_replica_sticky_seconds: float = 5
+    database_replica_sticky_url: Optional[str] = None
+    auth_token_cache_size: int = 10000
+    auth_user_cache_size: int = 10000
+    auth_user_cache_ttl_seconds: float = 60
+    bcrypt_rounds: int = 12
+    password_hash_workers: Optional[int] = None
+    password_hash_max_pending: int = 64
+    notes_batch_max_items: int = 10000
+    notes_batch_chunk_size: int = 1000
+    notes_batch_max_bytes: int = 64 * 1024 * 1024
+    max_note_bytes: int = 16 * 1024 * 1024
+    max_request_bytes: int = 32 * 1024 * 1024
+    upload_chunk_bytes: int = 64 * 1024
+    export_batch_size: int = 500
+    note_revision_snapshot_interval: int = 20
+    note_patch_max_edits: int = 1000
+    rate_limit_enabled: bool = True
+    rate_limit_default: str = "30/second"
+    rate_limits: Dict[str, str] = {
+        "login": "20/minute",
+        "register_user": "10/minute",
+        "create_notes_batch": "30/minute",
+        "upload_markdown_file": "60/minute",
+    }
+    rate_limit_backend_url: Optional[str] = None
+    trusted_proxies: List[str] = []
+    max_concurrent_requests: int = 256
 
     class ConfigDict:
         env_file = ".env"
 
 
-settings = Settings()
\ No newline at end of file
+settings = Settings()
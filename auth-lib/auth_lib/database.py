@@ -1,8 +1,15 @@
-from typing import Generator
+import itertools
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncGenerator, AsyncIterator, Dict, Generator, Optional, Tuple
 
 from auth_lib.config import settings
-from sqlalchemy import create_engine
+from auth_lib.metrics import POOL_CHECKOUT_TIMEOUTS, POOL_CHECKOUT_WAIT, pool_collector
+from auth_lib.writes import RecentWrites, recent_writes
+from sqlalchemy import create_engine, exc, make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import Session, declarative_base, sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
 
 SQLALCHEMY_DATABASE_URL = "postgresql://%s:%s@%s:%s/%s" % (
     settings.database_username,
@@ -12,10 +19,110 @@ SQLALCHEMY_DATABASE_URL = "postgresql://%s:%s@%s:%s/%s" % (
     settings.database_name,
 )
 
+ASYNC_SQLALCHEMY_DATABASE_URL = SQLALCHEMY_DATABASE_URL.replace(
+    "postgresql://", "postgresql+asyncpg://", 1
+)
+
+
+class _InstrumentedPoolMixin:
+    """Records how long checkouts wait for a connection and how often they time out."""
+
+    def connect(self):
+        pool = self.logging_name or "default"
+        started = time.perf_counter()
+        try:
+            return super().connect()
+        except exc.TimeoutError:
+            POOL_CHECKOUT_TIMEOUTS.labels(pool).inc()
+            raise
+        finally:
+            POOL_CHECKOUT_WAIT.labels(pool).observe(time.perf_counter() - started)
+
+
+class InstrumentedQueuePool(_InstrumentedPoolMixin, QueuePool):
+    pass
 
-engine = create_engine(SQLALCHEMY_DATABASE_URL)
 
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+class InstrumentedAsyncQueuePool(_InstrumentedPoolMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+def _pool_options(name: str) -> Dict[str, Any]:
+    return {
+        "pool_size": settings.database_pool_size,
+        "max_overflow": settings.database_max_overflow,
+        "pool_timeout": settings.database_pool_timeout,
+        "pool_recycle": settings.database_pool_recycle,
+        "pool_pre_ping": settings.database_pool_pre_ping,
+        "pool_logging_name": name,
+    }
+
+
+engine = create_engine(
+    SQLALCHEMY_DATABASE_URL, poolclass=InstrumentedQueuePool, **_pool_options("sync")
+)
+
+SessionLocal = sessionmaker(
+    autocommit=False, autoflush=False, expire_on_commit=False, bind=engine
+)
+
+async_engine = create_async_engine(
+    ASYNC_SQLALCHEMY_DATABASE_URL,
+    poolclass=InstrumentedAsyncQueuePool,
+    **_pool_options("async"),
+)
+
+AsyncSessionLocal = async_sessionmaker(
+    autoflush=False, expire_on_commit=False, bind=async_engine
+)
+
+pool_collector.register("sync", engine)
+pool_collector.register("async", async_engine.sync_engine)
+
+# Read replicas, each with its own pools; sessions are handed out round robin.
+replica_engines = []
+async_replica_engines = []
+for index, url in enumerate(settings.database_replica_urls):
+    replica_engines.append(
+        create_engine(
+            url,
+            poolclass=InstrumentedQueuePool,
+            **_pool_options(f"sync-replica-{index}"),
+        )
+    )
+    async_replica_engines.append(
+        create_async_engine(
+            make_url(url).set(drivername="postgresql+asyncpg"),
+            poolclass=InstrumentedAsyncQueuePool,
+            **_pool_options(f"async-replica-{index}"),
+        )
+    )
+    pool_collector.register(f"sync-replica-{index}", replica_engines[-1])
+    pool_collector.register(
+        f"async-replica-{index}", async_replica_engines[-1].sync_engine
+    )
+
+_replica_sessions = itertools.cycle(
+    [
+        sessionmaker(
+            autocommit=False, autoflush=False, expire_on_commit=False, bind=replica
+        )
+        for replica in replica_engines
+    ]
+)
+_async_replica_sessions = itertools.cycle(
+    [
+        async_sessionmaker(autoflush=False, expire_on_commit=False, bind=replica)
+        for replica in async_replica_engines
+    ]
+)
+
+# Users who wrote within the sticky window; replicas may not have replayed
+# their writes yet, so their reads stay on the primary. Shared through Redis
+# when DATABASE_REPLICA_STICKY_URL is set, which takes more than one worker.
+recent_writers: RecentWrites = recent_writes(
+    settings.database_replica_sticky_url, settings.database_replica_sticky_seconds
+)
 
 Base = declarative_base()
 
@@ -25,4 +132,83 @@ def get_db() -> Generator[Session, None, None]:
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+
+async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+def get_replica_db() -> Generator[Optional[Session], None, None]:
+    """A session on the next read replica, or None when none are configured."""
+    if not replica_engines:
+        yield None
+        return
+    db = next(_replica_sessions)()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+async def get_async_replica_db() -> AsyncGenerator[Optional[AsyncSession], None]:
+    """Async variant of ``get_replica_db``."""
+    if not async_replica_engines:
+        yield None
+        return
+    async with next(_async_replica_sessions)() as db:
+        yield db
+
+
+@asynccontextmanager
+async def async_sessions() -> AsyncIterator[
+    Tuple[AsyncSession, Optional[AsyncSession]]
+]:
+    """
+    A session on the primary and one on the next replica, or None, for code
+    outside of FastAPI's dependency injection. Both are closed on exit.
+    """
+    async with AsyncSessionLocal() as db:
+        if not async_replica_engines:
+            yield db, None
+            return
+        async with next(_async_replica_sessions)() as replica:
+            yield db, replica
+
+
+def record_write(user_id: int) -> None:
+    """Keep ``user_id``'s reads on the primary until replicas have caught up."""
+    recent_writers.record(user_id)
+
+
+async def async_record_write(user_id: int) -> None:
+    """Async variant of ``record_write``."""
+    await recent_writers.arecord(user_id)
+
+
+def read_session(
+    primary: Session, replica: Optional[Session], user_id: Optional[int] = None
+) -> Session:
+    """
+    The session to read a user's data with: the replica, unless none is
+    configured or the user wrote recently enough that it may lag behind.
+    """
+    if replica is None or (
+        user_id is not None and recent_writers.wrote_recently(user_id)
+    ):
+        return primary
+    return replica
+
+
+async def async_read_session(
+    primary: AsyncSession,
+    replica: Optional[AsyncSession],
+    user_id: Optional[int] = None,
+) -> AsyncSession:
+    """Async variant of ``read_session``."""
+    if replica is None or (
+        user_id is not None and await recent_writers.awrote_recently(user_id)
+    ):
+        return primary
+    return replica
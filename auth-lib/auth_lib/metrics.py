@@ -0,0 +1,191 @@
+import time
+from contextvars import ContextVar
+from typing import Dict, Optional
+
+from fastapi import APIRouter, Response
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    Counter,
+    Histogram,
+    generate_latest,
+)
+from prometheus_client.core import GaugeMetricFamily
+from sqlalchemy import Engine, event
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+POOL_CHECKOUT_WAIT = Histogram(
+    "db_pool_checkout_wait_seconds",
+    "Time spent waiting for a connection from the pool.",
+    ["pool"],
+    buckets=(
+        0.0005,
+        0.001,
+        0.005,
+        0.01,
+        0.025,
+        0.05,
+        0.1,
+        0.25,
+        0.5,
+        1,
+        2.5,
+        5,
+        10,
+        30,
+    ),
+)
+
+POOL_CHECKOUT_TIMEOUTS = Counter(
+    "db_pool_checkout_timeouts",
+    "Connection checkouts that gave up after the pool timeout.",
+    ["pool"],
+)
+
+AUTH_CACHE_REQUESTS = Counter(
+    "auth_cache_requests",
+    "Authentication cache lookups by cache and result.",
+    ["cache", "result"],
+)
+
+
+HTTP_REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds",
+    "Time spent handling a request, until its response is fully sent.",
+    ["method", "route"],
+)
+
+HTTP_REQUESTS = Counter(
+    "http_requests",
+    "Handled requests by route and response status code.",
+    ["method", "route", "status"],
+)
+
+HTTP_REQUEST_DB_STATEMENTS = Histogram(
+    "http_request_db_statements",
+    "SQL statements executed while handling a request.",
+    ["method", "route"],
+    buckets=(0, 1, 2, 3, 5, 10, 20, 50, 100, 250),
+)
+
+HTTP_REQUEST_DB_SECONDS = Histogram(
+    "http_request_db_seconds",
+    "Time spent executing SQL statements while handling a request.",
+    ["method", "route"],
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+
+
+class _RequestDBStats:
+    __slots__ = ("statements", "seconds")
+
+    def __init__(self) -> None:
+        self.statements = 0
+        self.seconds = 0.0
+
+
+_request_db_stats: ContextVar[Optional[_RequestDBStats]] = ContextVar(
+    "request_db_stats", default=None
+)
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _request_db_stats.get() is not None:
+        conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _request_db_stats.get()
+    started = conn.info.get("query_start_time")
+    if stats is None or not started:
+        return
+    stats.statements += 1
+    stats.seconds += time.perf_counter() - started.pop()
+
+
+class MetricsMiddleware:
+    """
+    Records latency, status codes and SQL statement count and time of every
+    HTTP request, labelled by the route template (e.g. ``/notes/{id}``).
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+        stats = _RequestDBStats()
+        token = _request_db_stats.set(stats)
+        started = time.perf_counter()
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            _request_db_stats.reset(token)
+            route = getattr(scope.get("route"), "path", "unmatched")
+            method = scope["method"]
+            HTTP_REQUEST_DURATION.labels(method, route).observe(elapsed)
+            HTTP_REQUESTS.labels(method, route, str(status_code)).inc()
+            HTTP_REQUEST_DB_STATEMENTS.labels(method, route).observe(stats.statements)
+            HTTP_REQUEST_DB_SECONDS.labels(method, route).observe(stats.seconds)
+
+
+class PoolCollector:
+    """Reports the in-use, idle and overflow connections of registered engines at scrape time."""
+
+    def __init__(self) -> None:
+        self._engines: Dict[str, Engine] = {}
+
+    def register(self, name: str, engine: Engine) -> None:
+        self._engines[name] = engine
+
+    def collect(self):
+        in_use = GaugeMetricFamily(
+            "db_pool_connections_in_use",
+            "Connections currently checked out of the pool.",
+            labels=["pool"],
+        )
+        idle = GaugeMetricFamily(
+            "db_pool_connections_idle",
+            "Connections sitting idle in the pool.",
+            labels=["pool"],
+        )
+        overflow = GaugeMetricFamily(
+            "db_pool_connections_overflow",
+            "Connections opened beyond pool_size.",
+            labels=["pool"],
+        )
+        for name, engine in self._engines.items():
+            pool = engine.pool
+            if not hasattr(pool, "checkedout"):
+                continue
+            in_use.add_metric([name], pool.checkedout())
+            idle.add_metric([name], pool.checkedin())
+            overflow.add_metric([name], max(pool.overflow(), 0))
+        yield in_use
+        yield idle
+        yield overflow
+
+
+pool_collector = PoolCollector()
+REGISTRY.register(pool_collector)
+
+router = APIRouter(tags=["Metrics"])
+
+
+@router.get("/metrics", include_in_schema=False)
+def metrics() -> Response:
+    return Response(generate_latest(REGISTRY), media_type=CONTENT_TYPE_LATEST)
@@ -1,9 +1,23 @@
 from datetime import datetime
+from typing import Any, List, Optional
 
 from auth_lib.database import Base
-from sqlalchemy import ForeignKey, Integer, String, func
+from sqlalchemy import Computed, ForeignKey, Index, Integer, String, Text, func, text
+from sqlalchemy.dialects.postgresql import JSONB, TSVECTOR
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
+NOTE_SEARCH_CONFIG = "english"
+
+# Only the head of large documents is indexed, keeping the tsvector well below
+# Postgres' 1 MB limit.
+NOTE_SEARCH_MAX_CHARS = 262144
+
+NOTE_SEARCH_VECTOR = (
+    f"setweight(to_tsvector('{NOTE_SEARCH_CONFIG}', coalesce(title, '')), 'A') || "
+    f"setweight(to_tsvector('{NOTE_SEARCH_CONFIG}', "
+    f"left(coalesce(note, ''), {NOTE_SEARCH_MAX_CHARS})), 'B')"
+)
+
 
 class User(Base):
     __tablename__ = "users"
@@ -21,12 +35,60 @@ class Note(Base):
     __tablename__ = "notes"
     id: Mapped[int] = mapped_column(primary_key=True)
     title: Mapped[str] = mapped_column(String(50))
-    note: Mapped[str] = mapped_column(String(255))
+    note: Mapped[str] = mapped_column(Text)
     created_at: Mapped[datetime] = mapped_column(server_default=func.now())
     owner_id: Mapped[int] = mapped_column(
         Integer, ForeignKey("users.id", ondelete="CASCADE")
     )
     owner: Mapped["User"] = relationship()
+    # Incremented by every change of the note, see the update statements.
+    version: Mapped[int] = mapped_column(server_default=text("1"))
+    search_vector: Mapped[Optional[str]] = mapped_column(
+        TSVECTOR, Computed(NOTE_SEARCH_VECTOR, persisted=True), deferred=True
+    )
+    # HTML rendering of ``note``, stored after every write together with the
+    # hash of the content it was rendered from and the renderer that produced it.
+    html: Mapped[Optional[str]] = mapped_column(Text, deferred=True)
+    html_hash: Mapped[Optional[str]] = mapped_column(String(64), deferred=True)
+    html_renderer: Mapped[Optional[str]] = mapped_column(String(32), deferred=True)
+
+    __table_args__ = (
+        Index("ix_notes_search_vector", "search_vector", postgresql_using="gin"),
+        Index(
+            "ix_notes_owner_id_created_at_id",
+            "owner_id",
+            text("created_at DESC"),
+            text("id DESC"),
+        ),
+    )
+
+    def __repr__(self) -> str:
+        return f"Note(id={self.id!r}, title={self.title!r}, note={self.note!r})"
+
+
+class NoteRevision(Base):
+    """
+    A past version of a note, recorded when the next version replaced it.
+
+    Most revisions only store ``delta``, the edits turning the next version's
+    content back into this one; every few versions ``snapshot`` holds the full
+    content instead, so rebuilding one takes a bounded number of edits.
+    """
+
+    __tablename__ = "note_revisions"
+    id: Mapped[int] = mapped_column(primary_key=True)
+    note_id: Mapped[int] = mapped_column(
+        Integer, ForeignKey("notes.id", ondelete="CASCADE")
+    )
+    version: Mapped[int]
+    title: Mapped[str] = mapped_column(String(50))
+    snapshot: Mapped[Optional[str]] = mapped_column(Text)
+    delta: Mapped[Optional[List[Any]]] = mapped_column(JSONB(none_as_null=True))
+    replaced_at: Mapped[datetime] = mapped_column(server_default=func.now())
+
+    __table_args__ = (
+        Index("ix_note_revisions_note_id_version", "note_id", "version", unique=True),
+    )
 
     def __repr__(self) -> str:
-        return f"Note(id={self.id!r}, title={self.title!r}, note={self.note!r})"
\ No newline at end of file
+        return f"NoteRevision(note_id={self.note_id!r}, version={self.version!r})"
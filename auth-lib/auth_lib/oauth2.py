@@ -1,14 +1,20 @@
 import datetime
-from typing import Any, Dict
+import hashlib
+import time
+from typing import Any, Dict, Optional
 
 import jwt
 import auth_lib.models as models
 import auth_lib.database as database
+from auth_lib.cache import TTLCache
 from auth_lib.config import settings
+from auth_lib.metrics import AUTH_CACHE_REQUESTS
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jwt.exceptions import InvalidTokenError
 from auth_lib.schemas import token_schemas, user_schemas
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="login")
@@ -17,6 +23,16 @@ SECRET_KEY = settings.secret_key
 ALGORITHM = settings.algorithm
 ACCESS_TOKEN_EXPIRE_MINUTES = settings.access_token_expire_minutes
 
+# Decoded claims keyed by token hash, each entry living until the token's exp.
+token_cache: TTLCache[str, token_schemas.TokenData] = TTLCache(
+    maxsize=settings.auth_token_cache_size, ttl=ACCESS_TOKEN_EXPIRE_MINUTES * 60
+)
+
+# Authenticated users keyed by id, so a valid token costs no database lookup.
+user_cache: TTLCache[int, user_schemas.UserOut] = TTLCache(
+    maxsize=settings.auth_user_cache_size, ttl=settings.auth_user_cache_ttl_seconds
+)
+
 
 def create_access_token(data: Dict[str, Any]) -> str:
     to_encode = data.copy()
@@ -34,8 +50,18 @@ def create_access_token(data: Dict[str, Any]) -> str:
 def verify_access_token(
     token: str, credentials_exception: HTTPException
 ) -> token_schemas.TokenData:
+    token_key = hashlib.sha256(token.encode()).hexdigest()
+    token_data = token_cache.get(token_key)
+    if token_data is not None:
+        AUTH_CACHE_REQUESTS.labels("token", "hit").inc()
+        return token_data
+
+    AUTH_CACHE_REQUESTS.labels("token", "miss").inc()
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        # Tokens are cached until they expire, so one without "exp" is rejected.
+        payload = jwt.decode(
+            token, SECRET_KEY, algorithms=[ALGORITHM], options={"require": ["exp"]}
+        )
         id: int = int(payload.get("user_id"))
         email: str = str(payload.get("user_email"))
         if id is None or email is None:
@@ -44,20 +70,107 @@ def verify_access_token(
     except InvalidTokenError:
         raise credentials_exception
 
+    token_cache.set(token_key, token_data, ttl=payload["exp"] - time.time())
     return token_data
 
 
-def get_current_user(
-    token: str = Depends(oauth2_scheme), db: Session = Depends(database.get_db)
-) -> user_schemas.UserOut:
-    credentials_exception = HTTPException(
+def _credentials_exception() -> HTTPException:
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
 
-    token_schema = verify_access_token(token, credentials_exception)
 
-    user = db.query(models.User).filter(models.User.email == token_schema.email).first()
+def _cached_user(token_data: token_schemas.TokenData) -> Optional[user_schemas.UserOut]:
+    user = user_cache.get(token_data.id)
+    if user is not None and user.email == token_data.email:
+        AUTH_CACHE_REQUESTS.labels("user", "hit").inc()
+        return user
+
+    AUTH_CACHE_REQUESTS.labels("user", "miss").inc()
+    return None
+
+
+def _cache_user(user: Optional[models.User]) -> user_schemas.UserOut:
+    if user is None:
+        raise _credentials_exception()
+
+    user_out = user_schemas.UserOut.model_validate(user)
+    user_cache.set(user_out.id, user_out)
+    return user_out
 
-    return user
\ No newline at end of file
+
+def invalidate_user(user_id: int) -> None:
+    """Drop a user from the authentication cache after it changed."""
+    user_cache.pop(user_id)
+
+
+def clear_caches() -> None:
+    token_cache.clear()
+    user_cache.clear()
+
+
+@event.listens_for(models.User, "after_update")
+@event.listens_for(models.User, "after_delete")
+def _invalidate_changed_user(mapper, connection, target: models.User) -> None:
+    invalidate_user(target.id)
+
+
+def authenticate(
+    token: str, db: Session, replica: Optional[Session] = None
+) -> user_schemas.UserOut:
+    """
+    The user a token belongs to, looked up on ``replica`` when given. For
+    callers outside of FastAPI's dependency injection.
+    """
+    token_schema = verify_access_token(token, _credentials_exception())
+
+    user = _cached_user(token_schema)
+    if user is not None:
+        return user
+
+    stmt = select(models.User).where(models.User.email == token_schema.email)
+    session = database.read_session(db, replica, token_schema.id)
+    user = session.scalar(stmt)
+    if user is None and session is not db:
+        # The replica may not have replayed the registration yet.
+        user = db.scalar(stmt)
+
+    return _cache_user(user)
+
+
+def get_current_user(
+    token: str = Depends(oauth2_scheme),
+    db: Session = Depends(database.get_db),
+    replica: Optional[Session] = Depends(database.get_replica_db),
+) -> user_schemas.UserOut:
+    return authenticate(token, db, replica)
+
+
+async def async_authenticate(
+    token: str, db: AsyncSession, replica: Optional[AsyncSession] = None
+) -> user_schemas.UserOut:
+    """Async variant of ``authenticate``."""
+    token_schema = verify_access_token(token, _credentials_exception())
+
+    user = _cached_user(token_schema)
+    if user is not None:
+        return user
+
+    stmt = select(models.User).where(models.User.email == token_schema.email)
+    session = await database.async_read_session(db, replica, token_schema.id)
+    user = await session.scalar(stmt)
+    if user is None and session is not db:
+        # The replica may not have replayed the registration yet.
+        user = await db.scalar(stmt)
+
+    return _cache_user(user)
+
+
+async def get_async_current_user(
+    token: str = Depends(oauth2_scheme),
+    db: AsyncSession = Depends(database.get_async_db),
+    replica: Optional[AsyncSession] = Depends(database.get_async_replica_db),
+) -> user_schemas.UserOut:
+    return await async_authenticate(token, db, replica)
@@ -1,7 +1,23 @@
 from datetime import datetime
+from enum import Enum
 from typing import List, Optional
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field, model_validator
+
+
+class SearchMode(str, Enum):
+    title = "title"
+    fulltext = "fulltext"
+
+
+class NoteFields(str, Enum):
+    full = "full"
+    summary = "summary"
+
+
+class ExportFormat(str, Enum):
+    ndjson = "ndjson"
+    zip = "zip"
 
 
 class Note(BaseModel):
@@ -19,6 +35,7 @@ class NoteOut(BaseModel):
     note: str
     created_at: datetime
     owner_id: int
+    version: int
 
     class Config:
         from_attributes = True
@@ -27,5 +44,82 @@ class NoteOut(BaseModel):
 class NoteResponse(BaseModel):
     data: List[NoteOut]
     limit: int
+    page: Optional[int] = None
+    total: Optional[int] = None
+    next_cursor: Optional[str] = None
+
+
+class NoteSummary(BaseModel):
+    id: int
+    title: str
+    created_at: datetime
+    owner_id: int
+    version: int
+    preview: Optional[str] = None
+
+
+class NoteSummaryResponse(BaseModel):
+    data: List[NoteSummary]
+    limit: int
+    page: Optional[int] = None
+    total: Optional[int] = None
+    next_cursor: Optional[str] = None
+
+
+class TextEdit(BaseModel):
+    offset: int = Field(ge=0)
+    delete: int = Field(0, ge=0)
+    insert: str = ""
+
+
+class NotePatch(BaseModel):
+    """
+    Changes to a note made at ``base_version``: either ``edits``, applied one
+    after the other, or a unified ``diff`` of the note.
+    """
+
+    base_version: int
+    edits: Optional[List[TextEdit]] = None
+    diff: Optional[str] = None
+
+    @model_validator(mode="after")
+    def check_one_change(self) -> "NotePatch":
+        if (self.edits is None) == (self.diff is None):
+            raise ValueError("Provide either edits or diff")
+        return self
+
+
+class NoteRevisionSummary(BaseModel):
+    version: int
+    title: str
+    replaced_at: datetime
+    snapshot: bool
+
+
+class NoteRevisionResponse(BaseModel):
+    data: List[NoteRevisionSummary]
+    limit: int
     page: int
     total: int
+
+
+class NoteRevisionOut(BaseModel):
+    note_id: int
+    version: int
+    title: str
+    note: str
+
+
+class NoteBatchItem(BaseModel):
+    index: int
+    title: Optional[str] = None
+    id: Optional[int] = None
+    error: Optional[str] = None
+
+
+class NoteBatchResponse(BaseModel):
+    results: List[NoteBatchItem]
+    created: int
+    failed: int
+    elapsed_seconds: float
+    rows_per_second: float
@@ -0,0 +1,90 @@
+import time
+from typing import Callable, Optional, Protocol
+
+from auth_lib.cache import TTLCache
+
+
+class RecentWrites(Protocol):
+    """
+    The users who wrote within the last ``ttl`` seconds, whose reads stay on the
+    primary until the replicas have replayed their writes.
+    """
+
+    def record(self, user_id: int) -> None: ...
+
+    def wrote_recently(self, user_id: int) -> bool: ...
+
+    async def arecord(self, user_id: int) -> None: ...
+
+    async def awrote_recently(self, user_id: int) -> bool: ...
+
+
+class MemoryRecentWrites:
+    """
+    Recent writers kept in this process. Only correct with a single worker: a
+    write through one worker isn't seen by the others.
+    """
+
+    def __init__(
+        self,
+        ttl: float,
+        maxsize: int = 100_000,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self._writers: TTLCache[int, bool] = TTLCache(maxsize, ttl, clock=clock)
+
+    def record(self, user_id: int) -> None:
+        self._writers.set(user_id, True)
+
+    def wrote_recently(self, user_id: int) -> bool:
+        return self._writers.get(user_id, False)
+
+    async def arecord(self, user_id: int) -> None:
+        self.record(user_id)
+
+    async def awrote_recently(self, user_id: int) -> bool:
+        return self.wrote_recently(user_id)
+
+    def clear(self) -> None:
+        self._writers.clear()
+
+
+class RedisRecentWrites:
+    """
+    Recent writers shared by every worker and instance through Redis, as keys
+    expiring after ``ttl``. Sync and async code each get their own client.
+    """
+
+    def __init__(self, client, async_client, ttl: float, prefix: str = "wrote:"):
+        self.ttl_ms = max(int(ttl * 1000), 1)
+        self.prefix = prefix
+        self._client = client
+        self._async_client = async_client
+
+    @classmethod
+    def from_url(cls, url: str, ttl: float) -> "RedisRecentWrites":
+        """Requires the ``redis`` package."""
+        try:
+            from redis import Redis
+            from redis.asyncio import Redis as AsyncRedis
+        except ImportError as e:
+            raise RuntimeError(
+                "The redis package is required for DATABASE_REPLICA_STICKY_URL"
+            ) from e
+        return cls(Redis.from_url(url), AsyncRedis.from_url(url), ttl)
+
+    def record(self, user_id: int) -> None:
+        self._client.set(f"{self.prefix}{user_id}", 1, px=self.ttl_ms)
+
+    def wrote_recently(self, user_id: int) -> bool:
+        return bool(self._client.exists(f"{self.prefix}{user_id}"))
+
+    async def arecord(self, user_id: int) -> None:
+        await self._async_client.set(f"{self.prefix}{user_id}", 1, px=self.ttl_ms)
+
+    async def awrote_recently(self, user_id: int) -> bool:
+        return bool(await self._async_client.exists(f"{self.prefix}{user_id}"))
+
+
+def recent_writes(url: Optional[str], ttl: float) -> RecentWrites:
+    return RedisRecentWrites.from_url(url, ttl) if url else MemoryRecentWrites(ttl)
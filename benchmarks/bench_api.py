@@ -0,0 +1,350 @@
+"""Load-test the notes API endpoints and write the latency distribution as JSON.
+
+Seeds ``--users`` throwaway users with ``--notes`` markdown notes each in the
+configured database, then drives every scenario with ``--concurrency``
+concurrent clients for ``--requests`` requests and reports throughput and
+p50/p95/p99 latency. The seeded users and their notes are removed afterwards.
+
+Requests go to the app in-process through httpx's ASGI transport, or to a
+running server with ``--base-url`` (which must use the same database).
+
+    python benchmarks/bench_api.py --users 20 --notes 500 --concurrency 32 \\
+        --requests 2000 --output bench-api.json
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import random
+import statistics
+import string
+import subprocess
+import sys
+import time
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, List
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "notes_backend" / "src"))
+
+import httpx  # noqa: E402
+from auth_lib import models, oauth2  # noqa: E402
+from auth_lib.database import SessionLocal  # noqa: E402
+from sqlalchemy import delete, insert, select, text  # noqa: E402
+from utils import utils  # noqa: E402
+
+PASSWORD = "bench-password"
+
+_vocabulary_rng = random.Random(7)
+WORDS = [
+    "".join(
+        _vocabulary_rng.choices(string.ascii_lowercase, k=_vocabulary_rng.randint(3, 9))
+    )
+    for _ in range(2000)
+]
+
+
+def _sentence(rng: random.Random, words: int) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(words)).capitalize() + "."
+
+
+def _markdown(rng: random.Random, size: int) -> str:
+    """A markdown document of roughly ``size`` bytes mixing the usual blocks."""
+    blocks: List[str] = []
+    length = 0
+    while length < size:
+        kind = rng.random()
+        if kind < 0.15:
+            block = "## " + _sentence(rng, rng.randint(2, 6))
+        elif kind < 0.3:
+            block = "\n".join(
+                f"- {_sentence(rng, rng.randint(3, 10))}"
+                for _ in range(rng.randint(2, 6))
+            )
+        elif kind < 0.4:
+            block = (
+                "```python\n"
+                + "\n".join(
+                    f"{rng.choice(WORDS)} = {rng.randint(0, 999)}"
+                    for _ in range(rng.randint(2, 8))
+                )
+                + "\n```"
+            )
+        else:
+            block = " ".join(
+                _sentence(rng, rng.randint(6, 18)) for _ in range(rng.randint(2, 6))
+            )
+            if rng.random() < 0.3:
+                block += f" See [{rng.choice(WORDS)}](https://example.com)."
+        blocks.append(block)
+        length += len(block) + 2
+    return "\n\n".join(blocks)
+
+
+def _note_size(rng: random.Random, median: int) -> int:
+    # Note sizes are long-tailed: mostly short notes, a few long documents.
+    return int(min(max(rng.lognormvariate(0, 1) * median, 100), median * 32))
+
+
+def seed(users: int, notes: int, median_bytes: int, prefix: str) -> List[dict]:
+    rng = random.Random(42)
+    password = utils.hash(PASSWORD)
+    session = SessionLocal()
+    try:
+        rows = [
+            {
+                "name": f"bench {i}",
+                "email": f"{prefix}-{i}@example.com",
+                "password": password,
+            }
+            for i in range(users)
+        ]
+        seeded = session.execute(
+            insert(models.User).returning(models.User.id, models.User.email), rows
+        ).all()
+        for user in seeded:
+            session.execute(
+                insert(models.Note),
+                [
+                    {
+                        "title": _sentence(rng, 4)[:50],
+                        "note": _markdown(rng, _note_size(rng, median_bytes)),
+                        "owner_id": user.id,
+                    }
+                    for _ in range(notes)
+                ],
+            )
+        session.commit()
+        session.execute(text("ANALYZE notes"))
+        session.commit()
+
+        accounts = []
+        for user in seeded:
+            note_ids = session.scalars(
+                select(models.Note.id).where(models.Note.owner_id == user.id)
+            ).all()
+            token = oauth2.create_access_token(
+                data={"user_id": user.id, "user_email": user.email}
+            )
+            accounts.append(
+                {
+                    "email": user.email,
+                    "headers": {"Authorization": f"Bearer {token}"},
+                    "note_ids": list(note_ids),
+                }
+            )
+        return accounts
+    finally:
+        session.close()
+
+
+def cleanup(prefix: str) -> None:
+    session = SessionLocal()
+    try:
+        session.execute(
+            delete(models.User).where(models.User.email.like(f"{prefix}-%"))
+        )
+        session.commit()
+    finally:
+        session.close()
+
+
+Scenario = Callable[[httpx.AsyncClient, random.Random], Awaitable[httpx.Response]]
+
+
+def scenarios(accounts: List[dict]) -> Dict[str, Scenario]:
+    def account(rng):
+        return rng.choice(accounts)
+
+    async def list_notes(client, rng):
+        user = account(rng)
+        params = {"limit": 10, "page": rng.randint(1, 5)}
+        return await client.get("/notes", params=params, headers=user["headers"])
+
+    async def search_title(client, rng):
+        user = account(rng)
+        params = {"limit": 10, "search": rng.choice(WORDS)[:4]}
+        return await client.get("/notes", params=params, headers=user["headers"])
+
+    async def search_fulltext(client, rng):
+        user = account(rng)
+        params = {"limit": 10, "search": rng.choice(WORDS), "search_mode": "fulltext"}
+        return await client.get("/notes", params=params, headers=user["headers"])
+
+    async def get_note(client, rng):
+        user = account(rng)
+        note_id = rng.choice(user["note_ids"])
+        return await client.get(f"/notes/{note_id}", headers=user["headers"])
+
+    async def get_markdown_note(client, rng):
+        user = account(rng)
+        note_id = rng.choice(user["note_ids"])
+        return await client.get(f"/notes/markdown/{note_id}", headers=user["headers"])
+
+    async def create_note(client, rng):
+        user = account(rng)
+        body = {"title": _sentence(rng, 4)[:50], "note": _markdown(rng, 2048)}
+        return await client.post("/notes", json=body, headers=user["headers"])
+
+    async def login(client, rng):
+        user = account(rng)
+        data = {"username": user["email"], "password": PASSWORD}
+        return await client.post("/login", data=data)
+
+    return {
+        "list": list_notes,
+        "search": search_title,
+        "search_fulltext": search_fulltext,
+        "get": get_note,
+        "markdown": get_markdown_note,
+        "create": create_note,
+        "login": login,
+    }
+
+
+def _percentile(ordered: List[float], percent: float) -> float:
+    rank = max(int(round(percent / 100 * len(ordered))) - 1, 0)
+    return ordered[min(rank, len(ordered) - 1)]
+
+
+async def run_scenario(
+    client: httpx.AsyncClient, scenario: Scenario, requests: int, concurrency: int
+) -> dict:
+    latencies: List[float] = []
+    status_codes: Dict[str, int] = {}
+    errors = 0
+    remaining = requests
+
+    async def worker(seed: int) -> None:
+        nonlocal remaining, errors
+        rng = random.Random(seed)
+        while remaining > 0:
+            remaining -= 1
+            started = time.perf_counter()
+            try:
+                response = await scenario(client, rng)
+                code = str(response.status_code)
+                if response.status_code >= 400:
+                    errors += 1
+            except httpx.HTTPError as exc:
+                code = type(exc).__name__
+                errors += 1
+            latencies.append((time.perf_counter() - started) * 1000)
+            status_codes[code] = status_codes.get(code, 0) + 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(i) for i in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "status_codes": status_codes,
+        "seconds": elapsed,
+        "throughput_rps": len(latencies) / elapsed,
+        "latency_ms": {
+            "mean": statistics.fmean(latencies),
+            "p50": _percentile(latencies, 50),
+            "p95": _percentile(latencies, 95),
+            "p99": _percentile(latencies, 99),
+            "max": latencies[-1],
+        },
+    }
+
+
+def _git_revision() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=10)
+    parser.add_argument("--notes", type=int, default=200, help="notes per user")
+    parser.add_argument("--note-bytes", type=int, default=2048, help="median size")
+    parser.add_argument("--requests", type=int, default=1000, help="per scenario")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--scenarios", nargs="+", default=None)
+    parser.add_argument("--base-url", default=None)
+    parser.add_argument("--output", type=Path, default=None)
+    args = parser.parse_args()
+    # The app and httpx log every request at INFO level.
+    logging.disable(logging.INFO)
+
+    prefix = f"bench-{uuid.uuid4().hex[:8]}"
+    started = time.perf_counter()
+    accounts = seed(args.users, args.notes, args.note_bytes, prefix)
+    print(
+        f"seeded {args.users} users x {args.notes} notes "
+        f"in {time.perf_counter() - started:.1f}s",
+        file=sys.stderr,
+    )
+
+    if args.base_url:
+        transport = None
+        base_url = args.base_url
+    else:
+        from app import app
+
+        transport = httpx.ASGITransport(app=app)
+        base_url = "http://bench"
+
+    available = scenarios(accounts)
+    selected = args.scenarios or list(available)
+    results = {}
+    limits = httpx.Limits(max_connections=args.concurrency)
+    try:
+        async with httpx.AsyncClient(
+            base_url=base_url, transport=transport, limits=limits, timeout=60
+        ) as client:
+            for name in selected:
+                stats = await run_scenario(
+                    client, available[name], args.requests, args.concurrency
+                )
+                results[name] = stats
+                latency = stats["latency_ms"]
+                print(
+                    f"{name:>15}: {stats['throughput_rps']:8.1f} req/s  "
+                    f"p50 {latency['p50']:7.2f} ms  p95 {latency['p95']:7.2f} ms  "
+                    f"p99 {latency['p99']:7.2f} ms  errors {stats['errors']}",
+                    file=sys.stderr,
+                )
+    finally:
+        cleanup(prefix)
+        if transport is not None:
+            from utils.hashing import password_hasher
+
+            password_hasher.shutdown()
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "revision": _git_revision(),
+            "target": args.base_url or "in-process",
+            "users": args.users,
+            "notes_per_user": args.notes,
+            "note_bytes_median": args.note_bytes,
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+        },
+        "scenarios": results,
+    }
+    output = json.dumps(report, indent=2)
+    if args.output:
+        args.output.write_text(output + "\n")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,94 @@
+"""Compare whole-note and block-by-block grammar checks of a long note.
+
+Starts ``fake_openai.py`` on a local port (or uses ``--base-url``) and checks a
+markdown note of about ``--note-bytes`` as one request, block by block with an
+empty cache, again after editing one paragraph, and once more unchanged.
+Reports the latency and the number of characters sent to the model for each.
+
+    python benchmarks/bench_grammar.py --note-bytes 20000 --latency-ms 200 --ms-per-char 0.5
+"""
+
+import argparse
+import asyncio
+import logging
+import random
+import socket
+import sys
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "agent_backend" / "src"))
+
+import httpx  # noqa: E402
+import uvicorn  # noqa: E402
+from bench_api import _markdown  # noqa: E402
+from fake_openai import create_app  # noqa: E402
+from note_bot.grammar import GrammarChecker  # noqa: E402
+from openai import AsyncOpenAI  # noqa: E402
+
+
+def start_fake_server(latency_ms: float, ms_per_char: float) -> str:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    server = uvicorn.Server(
+        uvicorn.Config(
+            create_app(latency_ms, ms_per_char),
+            host="127.0.0.1",
+            port=port,
+            log_level="warning",
+        )
+    )
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.01)
+    return f"http://127.0.0.1:{port}"
+
+
+def edit_one_paragraph(note: str, rng: random.Random) -> str:
+    blocks = note.split("\n\n")
+    prose = [i for i, block in enumerate(blocks) if not block.startswith("```")]
+    i = rng.choice(prose)
+    blocks[i] = blocks[i] + " Teh end."
+    return "\n\n".join(blocks)
+
+
+async def measure(name, check, note, stats_client) -> None:
+    await stats_client.delete("/stats")
+    started = time.perf_counter()
+    await check(note)
+    elapsed = time.perf_counter() - started
+    stats = (await stats_client.get("/stats")).json()
+    print(
+        f"{name:>18}: {elapsed * 1000:8.0f} ms  {stats['requests']:4d} requests  "
+        f"{stats['chars']:8d} chars sent"
+    )
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--note-bytes", type=int, default=20000)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--latency-ms", type=float, default=200)
+    parser.add_argument("--ms-per-char", type=float, default=0.5)
+    parser.add_argument("--base-url", help="a running fake_openai.py server")
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+
+    base_url = args.base_url or start_fake_server(args.latency_ms, args.ms_per_char)
+    client = AsyncOpenAI(base_url=f"{base_url}/v1", api_key="fake")
+    checker = GrammarChecker(client, "fake-model", max_concurrency=args.concurrency)
+
+    rng = random.Random(42)
+    note = _markdown(rng, args.note_bytes)
+    async with httpx.AsyncClient(base_url=base_url) as stats_client:
+        await measure("whole note", checker.check, note, stats_client)
+        await measure("blocks, cold", checker.check_document, note, stats_client)
+        edited = edit_one_paragraph(note, rng)
+        await measure("blocks, one edit", checker.check_document, edited, stats_client)
+        await measure("blocks, unchanged", checker.check_document, edited, stats_client)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
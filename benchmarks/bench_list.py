@@ -0,0 +1,118 @@
+"""Compare the full and ``fields=summary`` modes of GET /notes.
+
+Seeds one throwaway user with ``--notes`` notes of ``--note-bytes`` each, then
+requests pages of 10 notes from the in-process app in both modes and reports the
+API process CPU time per row (Postgres excluded) and the payload size. The user
+and its notes are removed afterwards.
+
+    python benchmarks/bench_list.py --notes 1000 --note-bytes 8192 --iterations 200
+"""
+
+import argparse
+import asyncio
+import logging
+import statistics
+import sys
+import time
+import uuid
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "notes_backend" / "src"))
+
+import httpx  # noqa: E402
+from auth_lib import models, oauth2  # noqa: E402
+from auth_lib.database import SessionLocal  # noqa: E402
+from sqlalchemy import delete, insert  # noqa: E402
+
+PAGE_SIZE = 10
+
+MODES = {
+    "full": {},
+    "summary": {"fields": "summary"},
+    "summary+preview": {"fields": "summary", "preview": 200},
+}
+
+
+def seed(notes: int, note_bytes: int) -> models.User:
+    session = SessionLocal()
+    try:
+        user = models.User(
+            name="bench",
+            email=f"bench-{uuid.uuid4().hex[:12]}@example.com",
+            password="x",
+        )
+        session.add(user)
+        session.commit()
+        body = ("lorem ipsum dolor sit amet " * (note_bytes // 27 + 1))[:note_bytes]
+        session.execute(
+            insert(models.Note),
+            [
+                {"title": f"note {i}", "note": body, "owner_id": user.id}
+                for i in range(notes)
+            ],
+        )
+        session.commit()
+        return user
+    finally:
+        session.close()
+
+
+def cleanup(user: models.User) -> None:
+    session = SessionLocal()
+    try:
+        session.execute(delete(models.User).where(models.User.id == user.id))
+        session.commit()
+    finally:
+        session.close()
+
+
+async def measure(client, headers, params, pages, iterations) -> dict:
+    cpu = []
+    sizes = []
+    for i in range(iterations):
+        page_params = {**params, "limit": PAGE_SIZE, "page": i % pages + 1}
+        started = time.process_time()
+        response = await client.get("/notes", params=page_params, headers=headers)
+        cpu.append((time.process_time() - started) * 1_000_000 / PAGE_SIZE)
+        sizes.append(len(response.content))
+        response.raise_for_status()
+    return {
+        "cpu_us_per_row": statistics.median(cpu),
+        "bytes_per_page": statistics.median(sizes),
+    }
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--notes", type=int, default=1000)
+    parser.add_argument("--note-bytes", type=int, default=8192)
+    parser.add_argument("--iterations", type=int, default=200)
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+
+    from app import app
+
+    user = seed(args.notes, args.note_bytes)
+    token = oauth2.create_access_token(
+        data={"user_id": user.id, "user_email": user.email}
+    )
+    headers = {"Authorization": f"Bearer {token}"}
+    pages = max(args.notes // PAGE_SIZE, 1)
+    try:
+        async with httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=app), base_url="http://bench"
+        ) as client:
+            for name, params in MODES.items():
+                # Warm up caches and connections before measuring.
+                await measure(client, headers, params, pages, 10)
+                stats = await measure(client, headers, params, pages, args.iterations)
+                print(
+                    f"{name:>16}: {stats['cpu_us_per_row']:8.1f} us CPU/row  "
+                    f"{stats['bytes_per_page'] / 1024:8.1f} KB/page"
+                )
+    finally:
+        cleanup(user)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
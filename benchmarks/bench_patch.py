@@ -0,0 +1,161 @@
+"""Compare saving small edits of a large note with PUT and with PATCH.
+
+Seeds one throwaway user with a markdown note of ``--note-bytes`` and saves
+``--saves`` small edits of it through the in-process app, once re-uploading the
+whole note with PUT /notes/{id} and once sending only the edit with
+PATCH /notes/{id}. Reports the request size, the latency and the WAL written by
+Postgres per save. The user and its note are removed afterwards.
+
+    python benchmarks/bench_patch.py --note-bytes 1000000 --saves 100
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import random
+import statistics
+import sys
+import time
+import uuid
+from pathlib import Path
+from typing import Tuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "notes_backend" / "src"))
+
+import httpx  # noqa: E402
+from auth_lib import models, oauth2  # noqa: E402
+from auth_lib.config import settings  # noqa: E402
+from auth_lib.database import SessionLocal  # noqa: E402
+from bench_api import WORDS, _markdown  # noqa: E402
+from sqlalchemy import delete, func, select  # noqa: E402
+
+
+def seed(content: str) -> Tuple[models.User, int]:
+    session = SessionLocal()
+    try:
+        user = models.User(
+            name="bench",
+            email=f"bench-{uuid.uuid4().hex[:12]}@example.com",
+            password="x",
+        )
+        session.add(user)
+        session.flush()
+        note = models.Note(title="patch", note=content, owner_id=user.id)
+        session.add(note)
+        session.commit()
+        return user, note.id
+    finally:
+        session.close()
+
+
+def cleanup(user: models.User) -> None:
+    session = SessionLocal()
+    try:
+        session.execute(delete(models.User).where(models.User.id == user.id))
+        session.commit()
+    finally:
+        session.close()
+
+
+def wal_position() -> str:
+    session = SessionLocal()
+    try:
+        return session.scalar(select(func.pg_current_wal_insert_lsn()))
+    finally:
+        session.close()
+
+
+def wal_bytes(start: str) -> int:
+    session = SessionLocal()
+    try:
+        return int(
+            session.scalar(
+                select(func.pg_wal_lsn_diff(func.pg_current_wal_insert_lsn(), start))
+            )
+        )
+    finally:
+        session.close()
+
+
+def random_edit(length: int, rng: random.Random) -> Tuple[int, int, str]:
+    offset = rng.randint(0, length - 20)
+    return offset, rng.randint(0, 20), " ".join(rng.sample(WORDS, 3))
+
+
+async def measure(client, headers, note_id, note, saves, use_patch, rng) -> dict:
+    sizes, latencies, wal = [], [], []
+    version = (await client.get(f"/notes/{note_id}", headers=headers)).json()["version"]
+    for _ in range(saves):
+        offset, deleted, inserted = random_edit(len(note), rng)
+        note = note[:offset] + inserted + note[offset + deleted :]
+        if use_patch:
+            method = "PATCH"
+            body = {
+                "base_version": version,
+                "edits": [{"offset": offset, "delete": deleted, "insert": inserted}],
+            }
+        else:
+            method = "PUT"
+            body = {"title": "patch", "note": note}
+        content = json.dumps(body).encode()
+
+        start = wal_position()
+        started = time.perf_counter()
+        response = await client.request(
+            method,
+            f"/notes/{note_id}",
+            content=content,
+            headers={**headers, "Content-Type": "application/json"},
+        )
+        latencies.append((time.perf_counter() - started) * 1000)
+        response.raise_for_status()
+        wal.append(wal_bytes(start))
+        sizes.append(len(content))
+        version = response.json()["version"]
+    return {
+        "note": note,
+        "request_bytes": statistics.median(sizes),
+        "latency_ms": statistics.median(latencies),
+        "wal_bytes": statistics.median(wal),
+    }
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--note-bytes", type=int, default=1_000_000)
+    parser.add_argument("--saves", type=int, default=100)
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+    # Saves come faster than the per-user limit allows; read when app loads.
+    settings.rate_limit_enabled = False
+
+    from app import app
+
+    rng = random.Random(42)
+    note = _markdown(rng, args.note_bytes)
+    user, note_id = seed(note)
+    token = oauth2.create_access_token(
+        data={"user_id": user.id, "user_email": user.email}
+    )
+    headers = {"Authorization": f"Bearer {token}"}
+    try:
+        async with httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=app), base_url="http://bench"
+        ) as client:
+            for name, use_patch in (("PUT", False), ("PATCH", True)):
+                stats = await measure(
+                    client, headers, note_id, note, args.saves, use_patch, rng
+                )
+                note = stats["note"]
+                print(
+                    f"{name:>6}: {stats['request_bytes'] / 1024:10.1f} KB/request  "
+                    f"{stats['latency_ms']:8.2f} ms p50  "
+                    f"{stats['wal_bytes'] / 1024:10.1f} KB WAL/save"
+                )
+    finally:
+        cleanup(user)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
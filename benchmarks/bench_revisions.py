@@ -0,0 +1,169 @@
+"""Measure the storage per edit and the rebuild latency of note revisions.
+
+Seeds one throwaway user with a markdown note of ``--note-bytes``, saves it
+``--edits`` times through PUT /notes/{id} on the in-process app, each time
+rewriting one sentence, and reports the stored bytes per revision against a
+full copy of the note. Then fetches ``--reads`` random versions through
+GET /notes/{id}/revisions/{version} and reports their latency. The user and its
+note are removed afterwards.
+
+    python benchmarks/bench_revisions.py --note-bytes 100000 --edits 200 --reads 200
+"""
+
+import argparse
+import asyncio
+import logging
+import random
+import statistics
+import sys
+import time
+import uuid
+from pathlib import Path
+from typing import Tuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "notes_backend" / "src"))
+
+import httpx  # noqa: E402
+from auth_lib import models, oauth2  # noqa: E402
+from auth_lib.config import settings  # noqa: E402
+from auth_lib.database import SessionLocal  # noqa: E402
+from bench_api import WORDS, _markdown  # noqa: E402
+from sqlalchemy import delete, func, select  # noqa: E402
+
+
+def seed(content: str) -> Tuple[models.User, int]:
+    session = SessionLocal()
+    try:
+        user = models.User(
+            name="bench",
+            email=f"bench-{uuid.uuid4().hex[:12]}@example.com",
+            password="x",
+        )
+        session.add(user)
+        session.flush()
+        note = models.Note(title="revisions", note=content, owner_id=user.id)
+        session.add(note)
+        session.commit()
+        return user, note.id
+    finally:
+        session.close()
+
+
+def cleanup(user: models.User) -> None:
+    session = SessionLocal()
+    try:
+        session.execute(delete(models.User).where(models.User.id == user.id))
+        session.commit()
+    finally:
+        session.close()
+
+
+def storage(note_id: int) -> dict:
+    session = SessionLocal()
+    try:
+        revision = models.NoteRevision
+        revisions, snapshots, revision_bytes = session.execute(
+            select(
+                func.count(),
+                func.count(revision.snapshot),
+                func.sum(
+                    func.coalesce(func.pg_column_size(revision.snapshot), 0)
+                    + func.coalesce(func.pg_column_size(revision.delta), 0)
+                ),
+            ).where(revision.note_id == note_id)
+        ).one()
+        note_bytes = session.scalar(
+            select(func.pg_column_size(models.Note.note)).where(
+                models.Note.id == note_id
+            )
+        )
+        return {
+            "revisions": revisions,
+            "snapshots": snapshots,
+            "bytes_per_revision": (revision_bytes or 0) / max(revisions, 1),
+            "full_copy_bytes": note_bytes,
+        }
+    finally:
+        session.close()
+
+
+def edit(note: str, rng: random.Random) -> str:
+    sentence = " ".join(rng.choice(WORDS) for _ in range(rng.randint(4, 12)))
+    position = rng.randint(0, len(note))
+    end = note.find(".", position)
+    end = len(note) if end == -1 else end
+    return note[:position] + sentence + note[end:]
+
+
+def percentile(values, fraction) -> float:
+    return sorted(values)[min(int(len(values) * fraction), len(values) - 1)]
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--note-bytes", type=int, default=100_000)
+    parser.add_argument("--edits", type=int, default=200)
+    parser.add_argument("--reads", type=int, default=200)
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+    # Saves come faster than the per-user limit allows; read when app loads.
+    settings.rate_limit_enabled = False
+
+    from app import app
+
+    rng = random.Random(42)
+    note = _markdown(rng, args.note_bytes)
+    user, note_id = seed(note)
+    token = oauth2.create_access_token(
+        data={"user_id": user.id, "user_email": user.email}
+    )
+    headers = {"Authorization": f"Bearer {token}"}
+    try:
+        async with httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=app), base_url="http://bench"
+        ) as client:
+            writes = []
+            for _ in range(args.edits):
+                note = edit(note, rng)
+                started = time.perf_counter()
+                response = await client.put(
+                    f"/notes/{note_id}",
+                    json={"title": "revisions", "note": note},
+                    headers=headers,
+                )
+                writes.append((time.perf_counter() - started) * 1000)
+                response.raise_for_status()
+
+            reads = []
+            for _ in range(args.reads):
+                version = rng.randint(1, args.edits)
+                started = time.perf_counter()
+                response = await client.get(
+                    f"/notes/{note_id}/revisions/{version}", headers=headers
+                )
+                reads.append((time.perf_counter() - started) * 1000)
+                response.raise_for_status()
+
+        stats = storage(note_id)
+        print(
+            f"snapshot interval {settings.note_revision_snapshot_interval}: "
+            f"{stats['revisions']} revisions, {stats['snapshots']} snapshots"
+        )
+        print(
+            f"storage: {stats['bytes_per_revision']:10.0f} B/revision  "
+            f"(full copy {stats['full_copy_bytes']} B)"
+        )
+        print(
+            f"save:    {statistics.median(writes):10.2f} ms p50  "
+            f"{percentile(writes, 0.95):8.2f} ms p95"
+        )
+        print(
+            f"rebuild: {statistics.median(reads):10.2f} ms p50  "
+            f"{percentile(reads, 0.95):8.2f} ms p95"
+        )
+    finally:
+        cleanup(user)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
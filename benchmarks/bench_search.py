@@ -0,0 +1,110 @@
+"""Compare the ``title`` (LIKE) and ``fulltext`` (tsvector) search paths of GET /notes.
+
+Seeds one throwaway user with ``--notes`` notes in the configured database, runs
+``NoteRepository.get_notes`` for every term in both search modes and prints the
+latency distribution of each. The user and its notes are removed afterwards.
+
+    python benchmarks/bench_search.py --notes 100000 --iterations 50
+"""
+
+import argparse
+import random
+import statistics
+import string
+import sys
+import time
+import uuid
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "notes_backend" / "src"))
+
+from auth_lib import models  # noqa: E402
+from auth_lib.database import SessionLocal  # noqa: E402
+from auth_lib.schemas import note_schemas, user_schemas  # noqa: E402
+from repositories.note import NoteRepository  # noqa: E402
+from sqlalchemy import insert, text  # noqa: E402
+
+_vocabulary_rng = random.Random(7)
+WORDS = [
+    "".join(
+        _vocabulary_rng.choices(string.ascii_lowercase, k=_vocabulary_rng.randint(4, 9))
+    )
+    for _ in range(2000)
+]
+
+TERMS = WORDS[:5]
+
+
+def _sentence(rng: random.Random, words: int) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(words))
+
+
+def seed(session, notes: int, batch_size: int = 5000) -> models.User:
+    rng = random.Random(42)
+    user = models.User(
+        name="bench", email=f"bench-{uuid.uuid4().hex[:12]}@example.com", password="x"
+    )
+    session.add(user)
+    session.commit()
+
+    for start in range(0, notes, batch_size):
+        rows = [
+            {
+                "title": _sentence(rng, 4)[:50],
+                "note": _sentence(rng, 30)[:255],
+                "owner_id": user.id,
+            }
+            for _ in range(min(batch_size, notes - start))
+        ]
+        session.execute(insert(models.Note), rows)
+        session.commit()
+
+    session.execute(text("ANALYZE notes"))
+    session.commit()
+    return user
+
+
+def measure(repo, user, mode, iterations):
+    timings = []
+    for _ in range(iterations):
+        for term in TERMS:
+            started = time.perf_counter()
+            repo.get_notes(user, 10, 1, term, mode)
+            timings.append((time.perf_counter() - started) * 1000)
+            repo.session.rollback()
+    timings.sort()
+    return {
+        "p50_ms": statistics.median(timings),
+        "p95_ms": timings[int(len(timings) * 0.95) - 1],
+        "max_ms": timings[-1],
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--notes", type=int, default=100_000)
+    parser.add_argument("--iterations", type=int, default=20)
+    args = parser.parse_args()
+
+    session = SessionLocal()
+    started = time.perf_counter()
+    user = seed(session, args.notes)
+    print(f"seeded {args.notes} notes in {time.perf_counter() - started:.1f}s")
+
+    try:
+        repo = NoteRepository(session)
+        owner = user_schemas.UserOut.model_validate(user)
+        for mode in note_schemas.SearchMode:
+            stats = measure(repo, owner, mode, args.iterations)
+            print(
+                f"{mode.value:>8}: p50 {stats['p50_ms']:.2f} ms  "
+                f"p95 {stats['p95_ms']:.2f} ms  max {stats['max_ms']:.2f} ms"
+            )
+    finally:
+        session.delete(session.merge(user))
+        session.commit()
+        session.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""Measure memory and time spent reading markdown uploads of increasing size.
+
+Compares the old ``await file.read()`` + ``decode`` path with the chunked,
+incrementally decoded reader used by ``POST /notes/markdown``. Peak memory is
+the Python allocation peak reported by tracemalloc while reading one upload.
+Uploads above ``--limit-mb`` show that the streaming reader gives up at the
+limit while the old path still buffers the whole file.
+
+    python benchmarks/bench_upload.py --sizes-mb 1 8 32 64 --limit-mb 16
+"""
+
+import argparse
+import asyncio
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "notes_backend" / "src"))
+
+from fastapi import UploadFile  # noqa: E402
+from utils import streaming  # noqa: E402
+
+PARAGRAPH = (
+    "Some *markdown* paragraph with a [link](https://example.com) — ünïcödé.\n\n"
+)
+
+
+def make_upload(size: int) -> UploadFile:
+    # Mirrors starlette, which spools multipart files to disk past 1 MB.
+    spool = tempfile.SpooledTemporaryFile(max_size=1024 * 1024)
+    payload = (PARAGRAPH * (size // len(PARAGRAPH.encode()) + 1)).encode()[:size]
+    # Keep the cut on a character boundary so both readers accept it.
+    spool.write(payload.decode("utf-8", errors="ignore").encode())
+    spool.seek(0)
+    return UploadFile(file=spool, filename="bench.md")
+
+
+async def read_whole(file: UploadFile) -> str:
+    content = await file.read()
+    return content.decode("utf-8")
+
+
+async def read_streaming(file: UploadFile, max_bytes: int, chunk_size: int) -> str:
+    try:
+        return await streaming.read_upload_text(file, max_bytes, chunk_size)
+    except streaming.NoteTooLarge:
+        return ""
+
+
+async def measure(reader, size: int) -> dict:
+    file = make_upload(size)
+    tracemalloc.start()
+    started = time.perf_counter()
+    text = await reader(file)
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    await file.close()
+    return {"seconds": elapsed, "peak_mb": peak / 1024 / 1024, "rejected": not text}
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes-mb", type=float, nargs="+", default=[1, 8, 32, 64])
+    parser.add_argument("--limit-mb", type=float, default=16)
+    parser.add_argument("--chunk-kb", type=int, default=64)
+    args = parser.parse_args()
+
+    max_bytes = int(args.limit_mb * 1024 * 1024)
+    chunk_size = args.chunk_kb * 1024
+    readers = {
+        "read+decode": read_whole,
+        "streaming": lambda file: read_streaming(file, max_bytes, chunk_size),
+    }
+    for size_mb in args.sizes_mb:
+        size = int(size_mb * 1024 * 1024)
+        for name, reader in readers.items():
+            stats = await measure(reader, size)
+            print(
+                f"{size_mb:>6.1f} MB {name:>12}: peak {stats['peak_mb']:7.1f} MB  "
+                f"({stats['peak_mb'] / size_mb:.2f}x)  {stats['seconds'] * 1000:7.1f} ms"
+                + ("  rejected at limit" if stats["rejected"] else "")
+            )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
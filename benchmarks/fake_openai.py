@@ -0,0 +1,102 @@
+"""A local stand-in for the OpenAI Responses API, for benchmarking the bot.
+
+``POST /v1/responses`` answers grammar prompts with the user's text, fixing
+"teh" to "the", after ``--latency-ms`` plus ``--ms-per-char`` for every
+character of the answer, which roughly models generation time. The number of
+requests and characters received is reported by ``GET /stats``.
+
+    python benchmarks/fake_openai.py --port 8900 --latency-ms 200 --ms-per-char 0.5
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+import uuid
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "agent_backend" / "src"))
+
+from note_bot.agent.prompts import grammar_agent_prompt  # noqa: E402
+from starlette.applications import Starlette  # noqa: E402
+from starlette.requests import Request  # noqa: E402
+from starlette.responses import JSONResponse  # noqa: E402
+from starlette.routing import Route  # noqa: E402
+
+PROMPT_PREFIX, _, PROMPT_SUFFIX = grammar_agent_prompt.partition("{user_input}")
+
+
+def user_text(prompt: str) -> str:
+    if prompt.startswith(PROMPT_PREFIX) and prompt.endswith(PROMPT_SUFFIX):
+        return prompt[len(PROMPT_PREFIX) : len(prompt) - len(PROMPT_SUFFIX)]
+    return prompt
+
+
+def response_body(model: str, text: str) -> dict:
+    return {
+        "id": f"resp_{uuid.uuid4().hex}",
+        "object": "response",
+        "created_at": time.time(),
+        "model": model,
+        "status": "completed",
+        "parallel_tool_calls": True,
+        "tool_choice": "auto",
+        "tools": [],
+        "output": [
+            {
+                "type": "message",
+                "id": f"msg_{uuid.uuid4().hex}",
+                "role": "assistant",
+                "status": "completed",
+                "content": [{"type": "output_text", "text": text, "annotations": []}],
+            }
+        ],
+    }
+
+
+def create_app(latency_ms: float = 0, ms_per_char: float = 0) -> Starlette:
+    stats = {"requests": 0, "chars": 0}
+
+    async def responses(request: Request) -> JSONResponse:
+        body = await request.json()
+        text = user_text(body["input"]).replace("teh", "the")
+        stats["requests"] += 1
+        stats["chars"] += len(text)
+        await asyncio.sleep((latency_ms + ms_per_char * len(text)) / 1000)
+        return JSONResponse(response_body(body["model"], text))
+
+    async def get_stats(request: Request) -> JSONResponse:
+        return JSONResponse(stats)
+
+    async def reset_stats(request: Request) -> JSONResponse:
+        stats.update(requests=0, chars=0)
+        return JSONResponse(stats)
+
+    return Starlette(
+        routes=[
+            Route("/v1/responses", responses, methods=["POST"]),
+            Route("/stats", get_stats),
+            Route("/stats", reset_stats, methods=["DELETE"]),
+        ]
+    )
+
+
+def main() -> None:
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--latency-ms", type=float, default=200)
+    parser.add_argument("--ms-per-char", type=float, default=0.5)
+    args = parser.parse_args()
+    uvicorn.run(
+        create_app(args.latency_ms, args.ms_per_char),
+        host=args.host,
+        port=args.port,
+        log_level="warning",
+    )
+
+
+if __name__ == "__main__":
+    main()
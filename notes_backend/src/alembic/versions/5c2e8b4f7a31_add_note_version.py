@@ -0,0 +1,31 @@
+"""add note version
+
+Revision ID: 5c2e8b4f7a31
+Revises: d3a7f1c5e820
+Create Date: 2026-10-18 15:22:10.408316
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "5c2e8b4f7a31"
+down_revision: Union[str, None] = "d3a7f1c5e820"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        "notes",
+        sa.Column("version", sa.Integer(), server_default=sa.text("1"), nullable=False),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column("notes", "version")
@@ -0,0 +1,33 @@
+"""add notes owner created_at index
+
+Revision ID: 8a4d2c6e1b90
+Revises: 3f1b9a7c2d4e
+Create Date: 2026-10-18 10:03:17.208114
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "8a4d2c6e1b90"
+down_revision: Union[str, None] = "3f1b9a7c2d4e"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(
+        "ix_notes_owner_id_created_at_id",
+        "notes",
+        ["owner_id", sa.text("created_at DESC"), sa.text("id DESC")],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_notes_owner_id_created_at_id", table_name="notes")
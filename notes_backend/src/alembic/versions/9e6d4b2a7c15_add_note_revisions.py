@@ -0,0 +1,52 @@
+"""add note revisions
+
+Revision ID: 9e6d4b2a7c15
+Revises: 5c2e8b4f7a31
+Create Date: 2026-10-18 17:41:52.736104
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = "9e6d4b2a7c15"
+down_revision: Union[str, None] = "5c2e8b4f7a31"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "note_revisions",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("note_id", sa.Integer(), nullable=False),
+        sa.Column("version", sa.Integer(), nullable=False),
+        sa.Column("title", sa.String(length=50), nullable=False),
+        sa.Column("snapshot", sa.Text(), nullable=True),
+        sa.Column("delta", postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+        sa.Column(
+            "replaced_at",
+            sa.DateTime(),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.ForeignKeyConstraint(["note_id"], ["notes.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(
+        "ix_note_revisions_note_id_version",
+        "note_revisions",
+        ["note_id", "version"],
+        unique=True,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_note_revisions_note_id_version", table_name="note_revisions")
+    op.drop_table("note_revisions")
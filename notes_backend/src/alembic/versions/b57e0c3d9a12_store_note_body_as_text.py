@@ -0,0 +1,76 @@
+"""store note body as text
+
+Revision ID: b57e0c3d9a12
+Revises: 8a4d2c6e1b90
+Create Date: 2026-10-18 11:41:05.877315
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = "b57e0c3d9a12"
+down_revision: Union[str, None] = "8a4d2c6e1b90"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _add_search_vector(note_expression: str) -> None:
+    # Generated columns can't be altered in place, so the search vector is
+    # rebuilt around the note column change.
+    op.add_column(
+        "notes",
+        sa.Column(
+            "search_vector",
+            postgresql.TSVECTOR(),
+            sa.Computed(
+                "setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+                f"setweight(to_tsvector('english', {note_expression}), 'B')",
+                persisted=True,
+            ),
+            nullable=True,
+        ),
+    )
+    op.create_index(
+        "ix_notes_search_vector",
+        "notes",
+        ["search_vector"],
+        unique=False,
+        postgresql_using="gin",
+    )
+
+
+def _drop_search_vector() -> None:
+    op.drop_index("ix_notes_search_vector", table_name="notes", postgresql_using="gin")
+    op.drop_column("notes", "search_vector")
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    _drop_search_vector()
+    op.alter_column(
+        "notes",
+        "note",
+        existing_type=sa.String(length=255),
+        type_=sa.Text(),
+        existing_nullable=False,
+    )
+    _add_search_vector("left(coalesce(note, ''), 262144)")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    _drop_search_vector()
+    op.alter_column(
+        "notes",
+        "note",
+        existing_type=sa.Text(),
+        type_=sa.String(length=255),
+        existing_nullable=False,
+        postgresql_using="left(note, 255)",
+    )
+    _add_search_vector("coalesce(note, '')")
@@ -0,0 +1,34 @@
+"""add note rendered html
+
+Revision ID: d3a7f1c5e820
+Revises: b57e0c3d9a12
+Create Date: 2026-10-18 14:03:27.190482
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "d3a7f1c5e820"
+down_revision: Union[str, None] = "b57e0c3d9a12"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column("notes", sa.Column("html", sa.Text(), nullable=True))
+    op.add_column("notes", sa.Column("html_hash", sa.String(length=64), nullable=True))
+    op.add_column(
+        "notes", sa.Column("html_renderer", sa.String(length=32), nullable=True)
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column("notes", "html_renderer")
+    op.drop_column("notes", "html_hash")
+    op.drop_column("notes", "html")
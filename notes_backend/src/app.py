@@ -1,15 +1,38 @@
+from contextlib import asynccontextmanager
+
+from auth_lib import metrics
+from auth_lib.config import settings
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from routes import auth, note, user
+from utils.hashing import password_hasher
+from utils.ratelimit import ConcurrencyLimitMiddleware
+from utils.streaming import BodySizeLimitMiddleware
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    password_hasher.shutdown()
+
 
 app = FastAPI(
     title="Markdown Note Taking API",
     description="Markdown Note Taking API",
     version="0.1.0",
+    lifespan=lifespan,
 )
 
 origins = ["*"]
 
+app.add_middleware(
+    BodySizeLimitMiddleware,
+    max_bytes=settings.max_request_bytes,
+    limits={"/notes/batch": settings.notes_batch_max_bytes},
+)
+app.add_middleware(
+    ConcurrencyLimitMiddleware, max_concurrent=settings.max_concurrent_requests
+)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=origins,
@@ -17,7 +40,9 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(metrics.MetricsMiddleware)
 
 app.include_router(user.router)
 app.include_router(note.router)
 app.include_router(auth.router)
+app.include_router(metrics.router)
@@ -0,0 +1,64 @@
+"""Render and store the HTML of notes that don't have it from the current renderer.
+
+Run from this directory against the configured database after deploying a new
+renderer version, or once after the rendered HTML columns were added:
+
+    python backfill_html.py --batch-size 500
+"""
+
+import argparse
+import logging
+import time
+
+from auth_lib.database import SessionLocal
+from repositories.note import NoteRepository
+from utils import rendering
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def backfill(repo: NoteRepository, batch_size: int) -> int:
+    rendered = 0
+    after_id = 0
+    while True:
+        notes = repo.get_notes_to_render(
+            rendering.RENDERER_VERSION, after_id, batch_size
+        )
+        if not notes:
+            return rendered
+        repo.store_html(
+            [
+                {
+                    "note_id": note.id,
+                    "rendered_html": rendering.render(note.note),
+                    "content_hash": rendering.content_hash(note.note),
+                    "renderer": rendering.RENDERER_VERSION,
+                }
+                for note in notes
+            ]
+        )
+        rendered += len(notes)
+        after_id = notes[-1].id
+        logger.info(f"Rendered {rendered} notes, up to id {after_id}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--batch-size", type=int, default=500)
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    session = SessionLocal()
+    try:
+        rendered = backfill(NoteRepository(session), args.batch_size)
+    finally:
+        session.close()
+    logger.info(
+        f"Backfilled {rendered} notes with {rendering.RENDERER_VERSION} "
+        f"in {time.perf_counter() - started:.1f}s"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,15 +1,69 @@
-from auth_lib.database import get_db
+from typing import Annotated, Optional
+
+from auth_lib.database import (
+    async_read_session,
+    async_record_write,
+    get_async_db,
+    get_async_replica_db,
+    get_db,
+    get_replica_db,
+    read_session,
+)
 from fastapi import Depends
 from sqlalchemy import orm
+from sqlalchemy.ext.asyncio import AsyncSession
 
 
 class BaseRepository:
     """Base repository class providing common database session management functionality."""
 
-    def __init__(self, session: orm.Session = Depends(get_db)):
+    def __init__(
+        self,
+        session: orm.Session = Depends(get_db),
+        replica: Annotated[Optional[orm.Session], Depends(get_replica_db)] = None,
+    ):
         self.__session = session
+        self.__replica = replica
 
     @property
     def session(self) -> orm.Session:
         """Provides access to the database session."""
         return self.__session
+
+    def reader(self, user_id: Optional[int] = None) -> orm.Session:
+        """
+        The session to read a user's data with: a replica, unless none is
+        configured or the user wrote recently enough that it may lag behind.
+        """
+        return read_session(self.__session, self.__replica, user_id)
+
+
+class AsyncBaseRepository:
+    """Async variant of ``BaseRepository`` backed by an ``AsyncSession``."""
+
+    def __init__(
+        self,
+        session: AsyncSession = Depends(get_async_db),
+        replica: Annotated[
+            Optional[AsyncSession], Depends(get_async_replica_db)
+        ] = None,
+    ):
+        self.__session = session
+        self.__replica = replica
+
+    @property
+    def session(self) -> AsyncSession:
+        """Provides access to the async database session."""
+        return self.__session
+
+    async def reader(self, user_id: Optional[int] = None) -> AsyncSession:
+        """The async session to read a user's data with; see ``BaseRepository``."""
+        return await async_read_session(self.__session, self.__replica, user_id)
+
+    async def wrote(self, user_id: int) -> None:
+        """
+        Record a committed write, keeping the user's reads on the primary. Only
+        needed when reads go to a replica.
+        """
+        if self.__replica is not None:
+            await async_record_write(user_id)
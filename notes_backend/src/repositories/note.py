@@ -1,17 +1,509 @@
-from typing import List, Optional, Tuple
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
 
 from auth_lib import models
 from auth_lib.schemas import note_schemas, user_schemas
+from sqlalchemy import (
+    CTE,
+    Insert,
+    Integer,
+    Row,
+    Select,
+    Text,
+    Update,
+    bindparam,
+    case,
+    delete,
+    func,
+    insert,
+    literal,
+    select,
+    true,
+    tuple_,
+    update,
+)
+from sqlalchemy.dialects.postgresql import ARRAY, aggregate_order_by
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.orm import aliased
+from utils import edits, streaming
+from utils.pagination import Cursor
 
-from .base import BaseRepository
+from .base import AsyncBaseRepository, BaseRepository
+
+
+def _select_notes(
+    user_id: int,
+    search: Optional[str],
+    search_mode: note_schemas.SearchMode,
+    after: Optional[Cursor],
+    columns: Tuple[Any, ...] = (models.Note,),
+) -> Tuple[Select, List[Any]]:
+    """
+    Build the filtered notes query and its ordering for ``get_notes``.
+
+    Raises ValueError for a full-text search after a cursor, since ranked
+    results can't be paged by ``(created_at, id)``.
+    """
+    stmt = select(*columns).where(models.Note.owner_id == user_id)
+    order_by = [models.Note.created_at.desc(), models.Note.id.desc()]
+
+    if search and search_mode == note_schemas.SearchMode.fulltext:
+        if after is not None:
+            raise ValueError("Full-text searches can't be paged with a cursor")
+        ts_query = func.websearch_to_tsquery(models.NOTE_SEARCH_CONFIG, search)
+        stmt = stmt.where(models.Note.search_vector.bool_op("@@")(ts_query))
+        order_by.insert(0, func.ts_rank_cd(models.Note.search_vector, ts_query).desc())
+    elif search:
+        stmt = stmt.where(models.Note.title.contains(search))
+
+    if after is not None:
+        stmt = stmt.where(
+            tuple_(models.Note.created_at, models.Note.id) < tuple_(*after)
+        )
+
+    return stmt, order_by
+
+
+def _summary_columns(preview: int) -> Tuple[Any, ...]:
+    columns = (
+        models.Note.id,
+        models.Note.title,
+        models.Note.created_at,
+        models.Note.owner_id,
+        models.Note.version,
+    )
+    if preview:
+        columns += (func.left(models.Note.note, preview).label("preview"),)
+    return columns
+
+
+def _count(stmt: Select) -> Select:
+    return select(func.count()).select_from(stmt.subquery())
+
+
+def _offset(limit: int, page: int) -> int:
+    return (page - 1) * limit if page > 1 else 0
+
+
+def _insert_note(note: note_schemas.NoteCreate, user_id: int):
+    return (
+        insert(models.Note)
+        .values(**note.model_dump(), owner_id=user_id)
+        .returning(models.Note)
+    )
+
+
+def _owned(stmt: Select, note_id: int, user_id: int) -> Select:
+    """Restrict ``stmt`` to one note and add an ownership flag to it."""
+    return (
+        stmt.add_columns((models.Note.owner_id == user_id).label("is_owner"))
+        .where(models.Note.id == note_id)
+        .execution_options(populate_existing=True)
+    )
+
+
+def _join_owned(target: Any, cte: CTE) -> Select:
+    return (
+        select(target)
+        .select_from(models.Note)
+        .outerjoin(cte, cte.c.id == models.Note.id)
+    )
+
+
+def _update_note(note_id: int, values: note_schemas.NoteCreate, user_id: int) -> Select:
+    updated = (
+        update(models.Note)
+        .where(models.Note.id == note_id, models.Note.owner_id == user_id)
+        .values(
+            **values.model_dump(),
+            version=models.Note.version + 1,
+            html=None,
+            html_hash=None,
+            html_renderer=None,
+        )
+        .returning(models.Note)
+        .cte("updated")
+    )
+    return _owned(_join_owned(aliased(models.Note, updated), updated), note_id, user_id)
+
+
+def _lock_note(note_id: int, user_id: int) -> Select:
+    """The current title, content and version of a note, locked until commit."""
+    return _owned(
+        select(models.Note.title, models.Note.note, models.Note.version),
+        note_id,
+        user_id,
+    ).with_for_update()
+
+
+def _is_snapshot(
+    version: int, delta: List[edits.Edit], length: int, snapshot_interval: int
+) -> bool:
+    """
+    Whether the revision of ``version`` stores the full content rather than
+    ``delta``: every ``snapshot_interval`` versions and whenever the edits would
+    take more room than the content.
+    """
+    return version % snapshot_interval == 0 or edits.size(delta) >= length
+
+
+def _revision(
+    note_id: int, current: Row, content: str, snapshot_interval: int
+) -> Dict[str, Any]:
+    """
+    The revision recording ``current`` as ``content`` replaces it, holding the
+    edits turning ``content`` back into ``current`` or a snapshot.
+    """
+    delta = edits.diff(content, current.note)
+    snapshot = _is_snapshot(
+        current.version, delta, len(current.note), snapshot_interval
+    )
+    return {
+        "note_id": note_id,
+        "version": current.version,
+        "title": current.title,
+        "snapshot": current.note if snapshot else None,
+        "delta": None if snapshot else delta,
+    }
+
+
+def _lock_note_length(note_id: int, user_id: int) -> Select:
+    """
+    Like ``_lock_note``, but reads the length of the content in characters and
+    in bytes instead of it.
+    """
+    return _owned(
+        select(
+            models.Note.title,
+            models.Note.version,
+            func.length(models.Note.note).label("length"),
+            func.octet_length(models.Note.note).label("size"),
+        ),
+        note_id,
+        user_id,
+    ).with_for_update()
+
+
+def _select_line_starts(note_id: int, lines: List[int]) -> Select:
+    """
+    The offset at which each of the 1-based ``lines`` of a note starts, NULL
+    for lines past the last one.
+    """
+    split = (
+        select(
+            func.string_to_array(models.Note.note, "\n", type_=ARRAY(Text)).label(
+                "lines"
+            )
+        )
+        .where(models.Note.id == note_id)
+        .subquery()
+    )
+    wanted = (
+        func.unnest(bindparam("lines", lines, type_=ARRAY(Integer)))
+        .table_valued("line", with_ordinality="ordinality")
+        .render_derived()
+    )
+    start = case(
+        (wanted.c.line == 1, 0),
+        (
+            func.cardinality(split.c.lines) >= wanted.c.line,
+            func.length(
+                func.array_to_string(split.c.lines[1 : wanted.c.line - 1], "\n")
+            )
+            + 1,
+        ),
+    )
+    return (
+        select(start)
+        .select_from(split)
+        .join(wanted, true())
+        .order_by(wanted.c.ordinality)
+    )
+
+
+def _select_ranges(note_id: int, replacements: List[edits.Edit]) -> Select:
+    """The text of a note each of ``replacements`` removes."""
+    ranges = (
+        func.unnest(
+            bindparam(
+                "starts", [start for start, _, _ in replacements], ARRAY(Integer)
+            ),
+            bindparam(
+                "lengths", [count for _, count, _ in replacements], ARRAY(Integer)
+            ),
+        )
+        .table_valued("start", "length", with_ordinality="ordinality")
+        .render_derived()
+    )
+    return (
+        select(func.substr(models.Note.note, ranges.c.start + 1, ranges.c.length))
+        .select_from(models.Note)
+        .join(ranges, true())
+        .where(models.Note.id == note_id)
+        .order_by(ranges.c.ordinality)
+    )
+
+
+def _snapshot_revision(note_id: int) -> Insert:
+    """Record the current content of a note as a snapshot, without reading it."""
+    return insert(models.NoteRevision).from_select(
+        ["note_id", "version", "title", "snapshot"],
+        select(
+            models.Note.id, models.Note.version, models.Note.title, models.Note.note
+        ).where(models.Note.id == note_id),
+    )
+
+
+def _patch_note(note_id: int, replacements: List[edits.Edit], length: int) -> Update:
+    """
+    Apply ``replacements`` to a note in the database.
+
+    The new content is assembled from the kept ranges of the old one and the
+    inserted text, passed as arrays, so the statement stays the same size
+    however many replacements there are.
+    """
+    starts: List[Optional[int]] = []
+    lengths: List[Optional[int]] = []
+    texts: List[Optional[str]] = []
+    position = 0
+    for start, count, text in replacements + [(length, 0, "")]:
+        if start > position:
+            starts.append(position)
+            lengths.append(start - position)
+            texts.append(None)
+        if text:
+            starts.append(None)
+            lengths.append(None)
+            texts.append(text)
+        position = start + count
+
+    pieces = (
+        func.unnest(
+            bindparam("starts", starts, ARRAY(Integer)),
+            bindparam("lengths", lengths, ARRAY(Integer)),
+            bindparam("texts", texts, ARRAY(Text)),
+        )
+        .table_valued("start", "length", "text", with_ordinality="ordinality")
+        .render_derived()
+    )
+    piece = func.coalesce(
+        func.substr(models.Note.note, pieces.c.start + 1, pieces.c.length),
+        pieces.c.text,
+    )
+    content = (
+        select(
+            func.coalesce(
+                func.string_agg(
+                    piece, aggregate_order_by(literal(""), pieces.c.ordinality)
+                ),
+                "",
+            )
+        )
+        .select_from(pieces)
+        .scalar_subquery()
+    )
+    return (
+        update(models.Note)
+        .where(models.Note.id == note_id)
+        .values(
+            note=content,
+            version=models.Note.version + 1,
+            html=None,
+            html_hash=None,
+            html_renderer=None,
+        )
+        .returning(*_summary_columns(0))
+    )
+
+
+def _select_revisions(note_id: int) -> Select:
+    revision = models.NoteRevision
+    return select(
+        revision.version,
+        revision.title,
+        revision.replaced_at,
+        revision.snapshot.is_not(None).label("snapshot"),
+    ).where(revision.note_id == note_id)
+
+
+def _select_revision_chain(note_id: int, version: int, current_version: int) -> Select:
+    """
+    The revisions needed to rebuild ``version``, newest first: from it up to the
+    first snapshot after it or, if there is none, up to the current version.
+    """
+    revision = models.NoteRevision
+    first_snapshot = (
+        select(func.min(revision.version))
+        .where(
+            revision.note_id == note_id,
+            revision.version >= version,
+            revision.snapshot.is_not(None),
+        )
+        .scalar_subquery()
+    )
+    return (
+        select(revision.version, revision.title, revision.snapshot, revision.delta)
+        .where(
+            revision.note_id == note_id,
+            revision.version >= version,
+            revision.version <= func.coalesce(first_snapshot, current_version),
+        )
+        .order_by(revision.version.desc())
+    )
+
+
+def _delete_note(note_id: int, user_id: int) -> Select:
+    deleted = (
+        delete(models.Note)
+        .where(models.Note.id == note_id, models.Note.owner_id == user_id)
+        .returning(models.Note.id)
+        .cte("deleted")
+    )
+    return _owned(_join_owned(deleted.c.id, deleted), note_id, user_id)
+
+
+def _select_note_html(note_id: int, user_id: int) -> Select:
+    return _owned(
+        select(
+            models.Note.note,
+            models.Note.html,
+            models.Note.html_renderer,
+            models.Note.version,
+        ),
+        note_id,
+        user_id,
+    )
+
+
+def _store_html() -> Update:
+    """
+    Store rendered HTML, executed with ``note_id``, ``rendered_html``,
+    ``content_hash`` and ``renderer`` parameters.
+
+    The row is only touched while its content still hashes to ``html_hash``, so
+    a rendering that finishes after a newer edit is discarded.
+    """
+    table = models.Note.__table__
+    stored_hash = func.encode(func.sha256(func.convert_to(table.c.note, "UTF8")), "hex")
+    return (
+        update(table)
+        .where(
+            table.c.id == bindparam("note_id"),
+            stored_hash == bindparam("content_hash"),
+        )
+        .values(
+            html=bindparam("rendered_html"),
+            html_hash=bindparam("content_hash"),
+            html_renderer=bindparam("renderer"),
+        )
+    )
+
+
+def _owned_result(row: Optional[Row]) -> Any:
+    """
+    None when the note doesn't exist, False when it belongs to another user and
+    otherwise the first selected column.
+    """
+    if row is None:
+        return None
+    if not row.is_owner:
+        return False
+    return row[0]
 
 
 class NoteRepository(BaseRepository):
+    """
+    Synchronous note queries for scripts running outside of the app, like the
+    HTML backfill and the search benchmark. The API uses ``AsyncNoteRepository``.
+    """
+
+    def get_notes(
+        self,
+        user: user_schemas.UserOut,
+        limit: int,
+        page: int,
+        search: Optional[str] = "",
+        search_mode: note_schemas.SearchMode = note_schemas.SearchMode.title,
+        after: Optional[Cursor] = None,
+    ) -> Tuple[List[models.Note], Optional[int]]:
+        """
+        Retrieve a paginated list of notes for a given user and the number of totals of notes.
+
+        When ``after`` is given the page is read with keyset pagination instead:
+        notes strictly older than the ``(created_at, id)`` cursor are returned
+        newest first, ``page`` is ignored and no total is counted, so every page
+        costs the same index range scan. Ranked full-text searches can't be
+        paged this way and raise ValueError.
+
+        Args:
+            user (user_schemas.UserOut): The user whose notes are being retrieved.
+            limit (int): Number of notes per page.
+            page (int): The page number.
+            search (Optional[str], default=""): A search term to filter notes.
+            search_mode (note_schemas.SearchMode, default=title): ``title`` matches
+                the term as a substring of the title, ``fulltext`` queries the
+                indexed search vector over title and body and orders by rank.
+            after (Optional[Cursor], default=None): The ``(created_at, id)`` of the
+                last note of the previous page.
+
+        Returns:
+            List[models.Note]: A list of notes matching the criteria.
+        """
+        session = self.reader(user.id)
+        stmt, order_by = _select_notes(user.id, search, search_mode, after)
+
+        if after is not None:
+            notes = session.scalars(stmt.order_by(*order_by).limit(limit)).all()
+            return list(notes), None
+
+        total = session.scalar(_count(stmt))
+        notes = session.scalars(
+            stmt.order_by(*order_by).limit(limit).offset(_offset(limit, page))
+        ).all()
+
+        return list(notes), total
+
+    def get_notes_to_render(
+        self, renderer: str, after_id: int, limit: int
+    ) -> List[Row]:
+        """
+        Retrieve the ``id`` and ``note`` of notes without HTML from ``renderer``.
+
+        Args:
+            renderer (str): The current renderer version.
+            after_id (int): Only notes with a greater id are returned.
+            limit (int): Maximum number of notes to return.
+
+        Returns:
+            List[Row]: The notes to render, ordered by id.
+        """
+        stmt = (
+            select(models.Note.id, models.Note.note)
+            .where(
+                models.Note.id > after_id,
+                models.Note.html_renderer.is_distinct_from(renderer),
+            )
+            .order_by(models.Note.id)
+            .limit(limit)
+        )
+        return list(self.session.execute(stmt).all())
+
+    def store_html(self, rendered: List[Dict[str, Any]]) -> None:
+        """
+        Store rendered HTML for many notes, see ``_store_html`` for the parameters.
+
+        Args:
+            rendered (List[Dict[str, Any]]): One parameter set per note.
+        """
+        self.session.execute(_store_html(), rendered)
+        self.session.commit()
+
+
+class AsyncNoteRepository(AsyncBaseRepository):
     """
     Repository class for handling database operations related to Notes.
     """
 
-    def get_note(
+    async def get_note(
         self, note_id: int, user: user_schemas.UserOut
     ) -> Optional[models.Note]:
         """
@@ -22,17 +514,20 @@ class NoteRepository(BaseRepository):
             user (user_schemas.UserOut): The user requesting the note.
 
         Returns:
-            models.Note: The requested note.
+            models.Note: The requested note, None when it doesn't exist and
+            False when it belongs to another user.
         """
-        return self._get_user_note(note_id, user.id)
+        return await self._get_user_note(note_id, user.id)
 
-    def get_notes(
+    async def get_notes(
         self,
         user: user_schemas.UserOut,
         limit: int,
         page: int,
         search: Optional[str] = "",
-    ) -> Tuple[List[models.Note], int]:
+        search_mode: note_schemas.SearchMode = note_schemas.SearchMode.title,
+        after: Optional[Cursor] = None,
+    ) -> Tuple[List[models.Note], Optional[int]]:
         """
         Retrieve a paginated list of notes for a given user and the number of totals of notes.
 
@@ -40,27 +535,159 @@ class NoteRepository(BaseRepository):
             user (user_schemas.UserOut): The user whose notes are being retrieved.
             limit (int): Number of notes per page.
             page (int): The page number.
-            search (Optional[str], default=""): A search term to filter notes by title.
+            search (Optional[str], default=""): A search term to filter notes.
+            search_mode (note_schemas.SearchMode, default=title): See
+                ``NoteRepository.get_notes``.
+            after (Optional[Cursor], default=None): The ``(created_at, id)`` of the
+                last note of the previous page, see ``NoteRepository.get_notes``.
 
         Returns:
-            List[models.Note]: A list of notes matching the criteria.
+            List[models.Note]: A list of notes matching the criteria, and their
+            total unless ``after`` is given.
         """
-        query = self.session.query(models.Note).filter(models.Note.owner_id == user.id)
+        session = await self.reader(user.id)
+        stmt, order_by = _select_notes(user.id, search, search_mode, after)
 
-        if search:
-            query = query.filter(models.Note.title.contains(search))
+        if after is not None:
+            notes = await session.scalars(stmt.order_by(*order_by).limit(limit))
+            return list(notes.all()), None
 
-        total = query.count()
-        notes = (
-            query.order_by(models.Note.created_at.desc())
-            .limit(limit)
-            .offset((page - 1) * limit if page > 1 else 0)
-            .all()
+        total = await session.scalar(_count(stmt))
+        notes = await session.scalars(
+            stmt.order_by(*order_by).limit(limit).offset(_offset(limit, page))
         )
 
-        return notes, total
+        return list(notes.all()), total
 
-    def create_note(
+    async def get_note_summaries(
+        self,
+        user: user_schemas.UserOut,
+        limit: int,
+        page: int,
+        search: Optional[str] = "",
+        search_mode: note_schemas.SearchMode = note_schemas.SearchMode.title,
+        after: Optional[Cursor] = None,
+        preview: int = 0,
+    ) -> Tuple[List[Row], Optional[int]]:
+        """
+        Like ``get_notes``, but only reads the list columns as plain rows plus,
+        when ``preview`` is set, that many leading characters of the body.
+
+        Args:
+            preview (int, default=0): Number of leading characters of the body to
+                read as ``preview``, none when 0.
+
+        Returns:
+            List[Row]: The list columns of the notes matching the criteria, and
+            their total unless ``after`` is given.
+        """
+        session = await self.reader(user.id)
+        stmt, order_by = _select_notes(
+            user.id, search, search_mode, after, _summary_columns(preview)
+        )
+
+        if after is not None:
+            rows = await session.execute(stmt.order_by(*order_by).limit(limit))
+            return list(rows.all()), None
+
+        total = await session.scalar(_count(stmt))
+        rows = await session.execute(
+            stmt.order_by(*order_by).limit(limit).offset(_offset(limit, page))
+        )
+
+        return list(rows.all()), total
+
+    async def stream_notes(
+        self, user: user_schemas.UserOut, batch_size: int
+    ) -> AsyncIterator[Row]:
+        """
+        Yield every note of a user, newest first, through a server-side cursor.
+
+        Rows are fetched ``batch_size`` at a time as plain column tuples, so
+        memory stays flat regardless of how many notes the user has.
+
+        A streaming response is consumed after the request's dependencies have
+        been torn down, so this reopens the (closed) session and closes it again
+        once the stream is exhausted or abandoned.
+
+        Args:
+            user (user_schemas.UserOut): The user whose notes are exported.
+            batch_size (int): Number of rows fetched per round trip.
+
+        Returns:
+            AsyncIterator[Row]: The ``id``, ``title``, ``note``, ``created_at``,
+            ``owner_id`` and ``version`` of each note.
+        """
+        stmt = (
+            select(
+                models.Note.id,
+                models.Note.title,
+                models.Note.note,
+                models.Note.created_at,
+                models.Note.owner_id,
+                models.Note.version,
+            )
+            .where(models.Note.owner_id == user.id)
+            .order_by(models.Note.created_at.desc(), models.Note.id.desc())
+            .execution_options(yield_per=batch_size)
+        )
+        session = await self.reader(user.id)
+        try:
+            result = await session.stream(stmt)
+            async for row in result:
+                yield row
+        finally:
+            await session.close()
+
+    async def get_note_html(
+        self, note_id: int, user: user_schemas.UserOut
+    ) -> Optional[Row | bool]:
+        """
+        Retrieve the ``note``, ``html``, ``html_renderer`` and ``version`` of a
+        user's note, read from the primary.
+
+        Args:
+            note_id (int): The ID of the note to retrieve.
+            user (user_schemas.UserOut): The user requesting the note.
+
+        Returns:
+            Row: The columns of the note, None when it doesn't exist and False
+            when it belongs to another user.
+        """
+        result = await self.session.execute(_select_note_html(note_id, user.id))
+        row = result.one_or_none()
+        if row is None or not row.is_owner:
+            return _owned_result(row)
+        return row
+
+    async def store_html(
+        self, note_id: int, html: str, content_hash: str, renderer: str
+    ) -> None:
+        """
+        Store the rendered HTML of a note unless it has changed since.
+
+        This runs as a background task once the request's dependencies have been
+        torn down, so like ``stream_notes`` it closes the session when done.
+
+        Args:
+            note_id (int): The ID of the rendered note.
+            html (str): The rendered HTML.
+            content_hash (str): The hash of the content that was rendered.
+            renderer (str): The renderer version.
+        """
+        params = {
+            "note_id": note_id,
+            "rendered_html": html,
+            "content_hash": content_hash,
+            "renderer": renderer,
+        }
+        try:
+            await self.session.execute(_store_html(), params)
+            await self.session.commit()
+        finally:
+            await self.session.close()
+
+    async def create_note(
         self, note: note_schemas.NoteCreate, user: user_schemas.UserOut
     ) -> models.Note:
         """
@@ -73,68 +700,300 @@ class NoteRepository(BaseRepository):
         Returns:
             models.Note: The newly created note.
         """
-        new_note = models.Note(**note.model_dump(), owner_id=user.id)
-        self.session.add(new_note)
-        self.session.commit()
-        self.session.refresh(new_note)
+        result = await self.session.scalars(_insert_note(note, user.id))
+        new_note = result.one()
+        await self.session.commit()
+        await self.wrote(user.id)
         return new_note
 
-    def update_note(
+    async def create_notes(
+        self,
+        notes: List[note_schemas.NoteCreate],
+        user: user_schemas.UserOut,
+        chunk_size: int,
+    ) -> List[Optional[int]]:
+        """
+        Insert many notes with one multi-row ``INSERT ... RETURNING`` per chunk.
+
+        Every chunk runs in its own savepoint, so a chunk the database rejects
+        doesn't discard the others.
+
+        Args:
+            notes (List[note_schemas.NoteCreate]): The notes to create.
+            user (user_schemas.UserOut): The user creating the notes.
+            chunk_size (int): Number of notes inserted per statement.
+
+        Returns:
+            List[Optional[int]]: The new ids in input order, with None for the
+            notes of rejected chunks.
+        """
+        stmt = insert(models.Note).returning(
+            models.Note.id, sort_by_parameter_order=True
+        )
+        ids: List[Optional[int]] = []
+        for start in range(0, len(notes), chunk_size):
+            chunk = notes[start : start + chunk_size]
+            rows = [{**note.model_dump(), "owner_id": user.id} for note in chunk]
+            try:
+                async with self.session.begin_nested():
+                    result = await self.session.scalars(stmt, rows)
+                    chunk_ids = result.all()
+            except DBAPIError:
+                chunk_ids = [None] * len(chunk)
+            ids.extend(chunk_ids)
+
+        await self.session.commit()
+        await self.wrote(user.id)
+        return ids
+
+    async def update_note(
         self,
         note_id: int,
         updated_note_info: note_schemas.NoteCreate,
         user: user_schemas.UserOut,
+        snapshot_interval: int,
     ) -> Optional[models.Note | bool]:
         """
         Update an existing note if the user owns it.
 
+        The note is locked while the replaced version is recorded as a revision,
+        see ``_revision``, so concurrent updates can't interleave their history.
+        The ``UPDATE ... RETURNING`` runs in a CTE next to the ownership lookup,
+        so a single statement both applies the change and tells a missing note
+        apart from one owned by somebody else.
+
         Args:
             note_id (int): The ID of the note to update.
             updated_note_info (note_schemas.NoteCreate): The updated note data.
             user (user_schemas.UserOut): The user making the update request.
+            snapshot_interval (int): Store the full content of every this many
+                versions.
 
         Returns:
-            models.Note: The updated note.
+            models.Note: The updated note, None when it doesn't exist and False
+            when it belongs to another user.
         """
-        note = self._get_user_note(note_id, user.id)
-        if note is None or note is False:
-            return note
+        result = await self.session.execute(_lock_note(note_id, user.id))
+        current = result.one_or_none()
+        if current is None or not current.is_owner:
+            await self.session.rollback()
+            return _owned_result(current)
 
-        self.session.query(models.Note).filter_by(id=note_id, owner_id=user.id).update(
-            updated_note_info.model_dump(), synchronize_session=False
+        result = await self.session.execute(
+            _update_note(note_id, updated_note_info, user.id)
         )
-        self.session.commit()
-        self.session.refresh(note)
+        note = _owned_result(result.one_or_none())
+        await self.session.execute(
+            insert(models.NoteRevision).values(
+                _revision(note_id, current, note.note, snapshot_interval)
+            )
+        )
+        await self.session.commit()
+        await self.wrote(user.id)
+        return note
+
+    async def patch_note(
+        self,
+        note_id: int,
+        patch: note_schemas.NotePatch,
+        user: user_schemas.UserOut,
+        snapshot_interval: int,
+        max_bytes: int,
+    ) -> Optional[Row | bool]:
+        """
+        Apply text edits or a unified diff to a user's note in the database.
+
+        Only the ranges the patch removes are read, to record the revision, and
+        the new content is assembled by Postgres, so the content of the note
+        never travels to the app.
+
+        Args:
+            note_id (int): The ID of the note to patch.
+            patch (note_schemas.NotePatch): The changes and the version they
+                were made at.
+            user (user_schemas.UserOut): The user making the patch request.
+            snapshot_interval (int): Store the full content of every this many
+                versions.
+            max_bytes (int): The largest the patched note may be, in bytes.
+
+        Returns:
+            Row: The list columns of the patched note, None when it doesn't
+            exist and False when it belongs to another user.
+
+        Raises:
+            edits.EditConflict: The note is no longer at ``patch.base_version``
+                or the diff doesn't match its content.
+            streaming.NoteTooLarge: The patched note would take more than
+                ``max_bytes``.
+            ValueError: An edit is out of range.
+        """
+        result = await self.session.execute(_lock_note_length(note_id, user.id))
+        current = result.one_or_none()
+        if current is None or not current.is_owner:
+            await self.session.rollback()
+            return _owned_result(current)
+
+        try:
+            if current.version != patch.base_version:
+                raise edits.EditConflict(
+                    f"The note is at version {current.version}, "
+                    f"not {patch.base_version}"
+                )
+            if patch.diff is not None:
+                hunks = edits.parse_unified_diff(patch.diff)
+                result = await self.session.execute(
+                    _select_line_starts(note_id, [hunk.line for hunk in hunks])
+                )
+                replacements = edits.hunk_replacements(
+                    hunks, result.scalars().all(), current.length
+                )
+            else:
+                replacements = edits.compose(
+                    [(edit.offset, edit.delete, edit.insert) for edit in patch.edits],
+                    current.length,
+                )
+
+            result = await self.session.execute(_select_ranges(note_id, replacements))
+            removed = list(result.scalars().all())
+            if patch.diff is not None and removed != [hunk.old for hunk in hunks]:
+                raise edits.EditConflict("The diff doesn't apply to the current note")
+            replacements, removed = edits.trim(replacements, removed)
+            size = current.size + sum(
+                len(text.encode("utf-8")) - len(old.encode("utf-8"))
+                for (_, _, text), old in zip(replacements, removed)
+            )
+            if size > max_bytes:
+                raise streaming.NoteTooLarge(f"Notes are limited to {max_bytes} bytes")
+
+            # Undoing the replacements in order restores the previous version.
+            delta = [
+                (start, len(text), old)
+                for (start, _, text), old in zip(replacements, removed)
+            ]
+            if _is_snapshot(current.version, delta, current.length, snapshot_interval):
+                await self.session.execute(_snapshot_revision(note_id))
+            else:
+                await self.session.execute(
+                    insert(models.NoteRevision).values(
+                        note_id=note_id,
+                        version=current.version,
+                        title=current.title,
+                        delta=delta,
+                    )
+                )
+            result = await self.session.execute(
+                _patch_note(note_id, replacements, current.length)
+            )
+            note = result.one()
+        except Exception:
+            await self.session.rollback()
+            raise
+
+        await self.session.commit()
+        await self.wrote(user.id)
         return note
 
-    def delete_note(self, note_id: int, user: user_schemas.UserOut) -> Optional[bool]:
+    async def get_revisions(
+        self, note_id: int, user: user_schemas.UserOut, limit: int, page: int
+    ) -> Optional[Tuple[List[Row], int] | bool]:
+        """
+        Retrieve a page of the revisions of a user's note, newest first.
+
+        Args:
+            note_id (int): The ID of the note.
+            user (user_schemas.UserOut): The user requesting the revisions.
+            limit (int): Number of revisions per page.
+            page (int): The page number.
+
+        Returns:
+            Tuple[List[Row], int]: The revisions and their total, None when the
+            note doesn't exist and False when it belongs to another user.
+        """
+        session = await self.reader(user.id)
+        result = await session.execute(_owned(select(models.Note.id), note_id, user.id))
+        owned = _owned_result(result.one_or_none())
+        if owned is None or owned is False:
+            return owned
+
+        stmt = _select_revisions(note_id)
+        total = await session.scalar(_count(stmt))
+        rows = await session.execute(
+            stmt.order_by(models.NoteRevision.version.desc())
+            .limit(limit)
+            .offset(_offset(limit, page))
+        )
+        return list(rows.all()), total
+
+    async def get_revision_chain(
+        self, note_id: int, version: int, user: user_schemas.UserOut
+    ) -> Optional[Tuple[Row, List[Row]] | bool]:
+        """
+        Retrieve what rebuilding ``version`` of a user's note takes.
+
+        Args:
+            note_id (int): The ID of the note.
+            version (int): The version to rebuild.
+            user (user_schemas.UserOut): The user requesting the revision.
+
+        Returns:
+            Tuple[Row, List[Row]]: The note's current ``title``, ``note`` and
+            ``version``, and the revisions from ``version`` up to the nearest
+            snapshot, newest first. None when the note doesn't exist and False
+            when it belongs to another user.
+        """
+        session = await self.reader(user.id)
+        result = await session.execute(
+            _owned(
+                select(models.Note.title, models.Note.note, models.Note.version),
+                note_id,
+                user.id,
+            )
+        )
+        current = result.one_or_none()
+        if current is None or not current.is_owner:
+            return _owned_result(current)
+        if version >= current.version:
+            return current, []
+
+        result = await session.execute(
+            _select_revision_chain(note_id, version, current.version)
+        )
+        return current, list(result.all())
+
+    async def delete_note(
+        self, note_id: int, user: user_schemas.UserOut
+    ) -> Optional[bool]:
         """
         Delete an existing note if the user owns it.
 
+        Like ``update_note`` this is a single ``DELETE ... RETURNING`` statement
+        combined with the ownership lookup.
+
         Args:
             note_id (int): The ID of the note to delete.
             user (user_schemas.UserOut): The user making the deletion request.
 
         Returns:
-            bool: True if deletion was successful, False otherwise.
+            bool: True if the note was deleted, None when it doesn't exist and
+            False when it belongs to another user.
         """
-        note = self._get_user_note(note_id, user.id)
-        if note is None or note is False:
-            return note
+        result = await self.session.execute(_delete_note(note_id, user.id))
+        deleted_id = _owned_result(result.one_or_none())
+        if deleted_id is None or deleted_id is False:
+            await self.session.rollback()
+            return deleted_id
 
-        self.session.delete(note)
-        self.session.commit()
+        await self.session.commit()
+        await self.wrote(user.id)
         return True
 
-    def _get_user_note(
+    async def _get_user_note(
         self, note_id: int, user_id: int
     ) -> Optional[models.Note | bool]:
-        note = self.session.query(models.Note).filter_by(id=note_id).one_or_none()
-        if note is not None and note.owner_id != user_id:
-            return False
-
-        return (
-            self.session.query(models.Note)
-            .filter_by(id=note_id, owner_id=user_id)
-            .one_or_none()
-        )
+        stmt = _owned(select(models.Note), note_id, user_id)
+        session = await self.reader(user_id)
+        row = (await session.execute(stmt)).one_or_none()
+        if row is None and session is not self.session:
+            # The replica may not have replayed the note's creation yet.
+            row = (await self.session.execute(stmt)).one_or_none()
+        return _owned_result(row)
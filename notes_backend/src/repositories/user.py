@@ -2,32 +2,37 @@ from typing import Optional
 
 from auth_lib import models
 from auth_lib.schemas import user_schemas
-from repositories.base import BaseRepository
-from utils import utils
+from repositories.base import AsyncBaseRepository
+from sqlalchemy import select
+from utils.hashing import password_hasher
 
 
-class UserRepository(BaseRepository):
+class AsyncUserRepository(AsyncBaseRepository):
     """
     Repository class for handling database operations related to User.
     """
 
-    def get_user(self, email: str) -> Optional[models.User]:
+    async def get_user(self, email: str) -> Optional[models.User]:
         """
         Retrieve a user from the database by email.
 
+        Reads from a replica when one is configured, falling back to the
+        primary when the user isn't there yet.
+
         Args:
             email (str): The email of the user to retrieve.
 
         Returns:
             models.User: The user object if found.
         """
-        return (
-            self.session.query(models.User)
-            .filter(models.User.email == email)
-            .one_or_none()
-        )
-
-    def create_user(
+        stmt = select(models.User).where(models.User.email == email)
+        session = await self.reader()
+        user = await session.scalar(stmt)
+        if user is None and session is not self.session:
+            user = await self.session.scalar(stmt)
+        return user
+
+    async def create_user(
         self, new_user_info: user_schemas.UserCreate
     ) -> Optional[models.User]:
         """
@@ -37,23 +42,19 @@ class UserRepository(BaseRepository):
             new_user_info (user_schemas.UserCreate): The user information provided during registration.
 
         Returns:
-            models.User: The newly created user.
+            models.User: The newly created user, None when the email is taken.
         """
-        existing_user = (
-            self.session.query(models.User)
-            .filter(models.User.email == new_user_info.email)
-            .one_or_none()
-        )
+        existing_user = await self.get_user(new_user_info.email)
 
         if existing_user:
             return None
 
-        hashed_password = utils.hash(new_user_info.password)
+        hashed_password = await password_hasher.hash(new_user_info.password)
         new_user_info.password = hashed_password
 
         new_user = models.User(**new_user_info.model_dump())
         self.session.add(new_user)
-        self.session.commit()
-        self.session.refresh(new_user)
+        await self.session.commit()
+        await self.wrote(new_user.id)
 
         return new_user
@@ -2,21 +2,23 @@ from auth_lib import database, models, oauth2
 from auth_lib.schemas import token_schemas
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security.oauth2 import OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
-from utils import utils
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from utils import ratelimit
+from utils.hashing import password_hasher
 
-router = APIRouter(tags=["Authentication"])
+router = APIRouter(
+    tags=["Authentication"], dependencies=[Depends(ratelimit.limit_by_ip)]
+)
 
 
 @router.post("/login", response_model=token_schemas.Token)
-def login(
+async def login(
     user_credentials: OAuth2PasswordRequestForm = Depends(),
-    db: Session = Depends(database.get_db),
+    db: AsyncSession = Depends(database.get_async_db),
 ):
-    user = (
-        db.query(models.User)
-        .filter(models.User.email == user_credentials.username)
-        .first()
+    user = await db.scalar(
+        select(models.User).where(models.User.email == user_credentials.username)
     )
 
     if not user:
@@ -24,7 +26,7 @@ def login(
             status_code=status.HTTP_403_FORBIDDEN, detail="Invalid Credentials"
         )
 
-    if not utils.verify(user_credentials.password, user.password):
+    if not await password_hasher.verify(user_credentials.password, user.password):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN, detail="Invalid Credentials"
         )
@@ -1,52 +1,86 @@
-from typing import Optional
+from typing import Optional, Union
 
 from auth_lib import oauth2
 from auth_lib.schemas import note_schemas, user_schemas
+from auth_lib.config import settings
 from fastapi import (
     APIRouter,
     Depends,
     File,
     HTTPException,
     Query,
+    Request,
     Response,
     UploadFile,
     status,
 )
-from fastapi.responses import HTMLResponse
+from fastapi.responses import HTMLResponse, ORJSONResponse, StreamingResponse
 from services.note import NoteService
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import UploadFile as FormFile
+from utils import batch, caching, edits, pagination, ratelimit, rendering, streaming
+
+router = APIRouter(
+    prefix="/notes",
+    tags=["Notes"],
+    dependencies=[Depends(ratelimit.limit_by_user)],
+)
+
+
+EXPORT_MEDIA_TYPES = {
+    note_schemas.ExportFormat.ndjson: "application/x-ndjson",
+    note_schemas.ExportFormat.zip: "application/zip",
+}
 
-router = APIRouter(prefix="/notes", tags=["Notes"])
+
+@router.get("/export", response_class=StreamingResponse)
+async def export_notes(
+    format: note_schemas.ExportFormat = note_schemas.ExportFormat.ndjson,
+    service: NoteService = Depends(),
+    current_user: user_schemas.UserOut = Depends(oauth2.get_async_current_user),
+):
+    return StreamingResponse(
+        service.export_notes(current_user, format),
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="notes.{format.value}"'},
+    )
 
 
 @router.get("/{id}", response_model=note_schemas.NoteOut)
-def get_note(
+async def get_note(
     id: int,
+    request: Request,
+    response: Response,
     service: NoteService = Depends(),
-    current_user: user_schemas.UserOut = Depends(oauth2.get_current_user),
+    current_user: user_schemas.UserOut = Depends(oauth2.get_async_current_user),
 ):
-    note = service.get_note(id, current_user)
-    if note is None:
+    note = await service.get_note(id, current_user)
+    if not note:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Note with id: {id} was not found",
         )
-    return note
+    tag = caching.etag("note", note.id, note.version)
+    return caching.conditional(request, response, tag) or note
 
 
 @router.get("/markdown/{id}", response_class=HTMLResponse)
-def get_markdown_note(
+async def get_markdown_note(
     id: int,
+    request: Request,
     service: NoteService = Depends(),
-    current_user: user_schemas.UserOut = Depends(oauth2.get_current_user),
+    current_user: user_schemas.UserOut = Depends(oauth2.get_async_current_user),
 ):
     try:
-        note = service.get_markdown_note(id, current_user)
+        note = await service.get_markdown_note(id, current_user)
         if note is None:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail=f"Note with id: {id} was not found",
             )
-        return note
+        response = HTMLResponse(note.html)
+        tag = caching.etag("html", id, note.version, rendering.RENDERER_VERSION)
+        return caching.conditional(request, response, tag) or response
     except HTTPException as e:
         raise e
     except Exception:
@@ -56,60 +90,176 @@ def get_markdown_note(
         )
 
 
-@router.get("", response_model=note_schemas.NoteResponse)
-def get_notes(
-    current_user: user_schemas.UserOut = Depends(oauth2.get_current_user),
+@router.get(
+    "",
+    response_model=Union[note_schemas.NoteResponse, note_schemas.NoteSummaryResponse],
+)
+async def get_notes(
+    request: Request,
+    response: Response,
+    current_user: user_schemas.UserOut = Depends(oauth2.get_async_current_user),
     limit: int = Query(10, le=10),
     page: int = Query(1, ge=1),
     search: Optional[str] = "",
+    search_mode: note_schemas.SearchMode = note_schemas.SearchMode.title,
+    cursor: Optional[str] = None,
+    fields: note_schemas.NoteFields = note_schemas.NoteFields.full,
+    preview: int = Query(0, ge=0, le=1000),
     service: NoteService = Depends(),
 ):
-    return service.get_notes(current_user, limit, page, search)
+    """
+    List the user's notes. ``fields=summary`` leaves out the note bodies,
+    optionally keeping the first ``preview`` characters of each.
+    """
+    after = None
+    if cursor:
+        try:
+            after = pagination.decode_cursor(cursor)
+        except ValueError:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor"
+            )
+        if search and search_mode == note_schemas.SearchMode.fulltext:
+            # Ranked results have no (created_at, id) order to continue from.
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="A cursor can't be used with a full-text search, use page",
+            )
+
+    if fields == note_schemas.NoteFields.summary:
+        summaries = await service.get_note_summaries(
+            current_user, limit, page, search, search_mode, after, preview
+        )
+        tag = caching.etag(
+            "summaries",
+            preview,
+            summaries["limit"],
+            summaries["page"],
+            summaries["total"],
+            summaries["next_cursor"],
+            *((note["id"], note["version"]) for note in summaries["data"]),
+        )
+        # Rows are serialized as they are, skipping response model validation.
+        response = ORJSONResponse(summaries)
+        return caching.conditional(request, response, tag) or response
+
+    notes = await service.get_notes(
+        current_user, limit, page, search, search_mode, after
+    )
+    tag = caching.etag(
+        "notes",
+        notes.limit,
+        notes.page,
+        notes.total,
+        notes.next_cursor,
+        *((note.id, note.version) for note in notes.data),
+    )
+    return caching.conditional(request, response, tag) or notes
 
 
 @router.post(
     "", status_code=status.HTTP_201_CREATED, response_model=note_schemas.NoteOut
 )
-def create_note(
+async def create_note(
     note: note_schemas.NoteCreate,
     service: NoteService = Depends(),
-    current_user: user_schemas.UserOut = Depends(oauth2.get_current_user),
+    current_user: user_schemas.UserOut = Depends(oauth2.get_async_current_user),
 ):
-    return service.create_note(user=current_user, note=note)
+    _check_note_size(note)
+    return await service.create_note(user=current_user, note=note)
 
 
 @router.post("/markdown")
 async def upload_markdown_file(
     file: UploadFile = File(...),
     service: NoteService = Depends(),
-    current_user: user_schemas.UserOut = Depends(oauth2.get_current_user),
+    current_user: user_schemas.UserOut = Depends(oauth2.get_async_current_user),
 ):
+    """
+    Create a note from an uploaded ``.md`` file.
+
+    ``BodySizeLimitMiddleware`` caps the whole request at ``max_request_bytes``
+    while it is received, before the multipart body is spooled; the file is
+    then read back ``upload_chunk_bytes`` at a time and rejected with a 413 as
+    soon as it exceeds ``max_note_bytes``.
+    """
     if file.filename is not None and not file.filename.endswith(".md"):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Only markdown files are allowed. Please upload a valid .md file.",
         )
     try:
-        file_content = await file.read()
-        markdown_text = file_content.decode("utf-8")
+        markdown_text = await streaming.read_upload_text(
+            file, settings.max_note_bytes, settings.upload_chunk_bytes
+        )
+    except streaming.NoteTooLarge as e:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=str(e)
+        )
     except Exception:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST, detail="Empty or corrupt file."
         )
 
     mark_down_note = note_schemas.NoteCreate(title=file.filename, note=markdown_text)
-    new_note = service.create_note(user=current_user, note=mark_down_note)
+    new_note = await service.create_note(user=current_user, note=mark_down_note)
     return new_note
 
 
+@router.post(
+    "/batch",
+    status_code=status.HTTP_201_CREATED,
+    response_model=note_schemas.NoteBatchResponse,
+)
+async def create_notes_batch(
+    request: Request,
+    service: NoteService = Depends(),
+    current_user: user_schemas.UserOut = Depends(oauth2.get_async_current_user),
+):
+    """
+    Import many notes from either a JSON array of notes or a multipart ``file``
+    holding a zip/tar archive of ``.md`` files.
+
+    The request body is capped at ``notes_batch_max_bytes`` while it is
+    received, and so are the notes unpacked from an archive, which is read no
+    further than ``notes_batch_max_items`` files.
+    """
+    content_type = request.headers.get("content-type", "")
+    try:
+        if content_type.startswith("multipart/form-data"):
+            form = await request.form()
+            upload = form.get("file")
+            if not isinstance(upload, FormFile):
+                raise ValueError("Missing archive in the 'file' field")
+            entries = await run_in_threadpool(
+                batch.read_markdown_archive,
+                upload.file,
+                settings.notes_batch_max_items,
+                settings.notes_batch_max_bytes,
+            )
+        else:
+            entries = batch.parse_json_notes(
+                await request.json(), settings.notes_batch_max_items
+            )
+    except batch.BatchTooLarge as e:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=str(e)
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    return await service.create_notes(entries, current_user)
+
+
 @router.put("/{id}", response_model=note_schemas.NoteOut)
-def update_note(
+async def update_note(
     id: int,
     updated_note_info: note_schemas.NoteCreate,
     service: NoteService = Depends(),
-    current_user: user_schemas.UserOut = Depends(oauth2.get_current_user),
+    current_user: user_schemas.UserOut = Depends(oauth2.get_async_current_user),
 ):
-    updated_note = service.update_note(
+    _check_note_size(updated_note_info)
+    updated_note = await service.update_note(
         note_id=id, updated_note_info=updated_note_info, user=current_user
     )
     if updated_note is None:
@@ -125,13 +275,116 @@ def update_note(
     return updated_note
 
 
+@router.patch("/{id}", response_model=note_schemas.NoteSummary)
+async def patch_note(
+    id: int,
+    patch: note_schemas.NotePatch,
+    service: NoteService = Depends(),
+    current_user: user_schemas.UserOut = Depends(oauth2.get_async_current_user),
+):
+    """
+    Change part of a note with ``edits`` or a unified ``diff`` made against
+    ``base_version``. Answers 409 when the note has changed since, and with the
+    note's new version but not its content otherwise.
+    """
+    try:
+        patched_note = await service.patch_note(id, patch, current_user)
+    except edits.EditConflict as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+    except streaming.NoteTooLarge as e:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=str(e)
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    if patched_note is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Note not found",
+        )
+    if patched_note is False:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Unauthorized",
+        )
+    return patched_note
+
+
+@router.get("/{id}/revisions", response_model=note_schemas.NoteRevisionResponse)
+async def get_revisions(
+    id: int,
+    limit: int = Query(20, ge=1, le=100),
+    page: int = Query(1, ge=1),
+    service: NoteService = Depends(),
+    current_user: user_schemas.UserOut = Depends(oauth2.get_async_current_user),
+):
+    revisions = await service.get_revisions(id, current_user, limit, page)
+    if revisions is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Note not found",
+        )
+    if revisions is False:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Unauthorized",
+        )
+    return revisions
+
+
+@router.get("/{id}/revisions/{version}", response_model=note_schemas.NoteRevisionOut)
+async def get_revision(
+    id: int,
+    version: int,
+    request: Request,
+    response: Response,
+    service: NoteService = Depends(),
+    current_user: user_schemas.UserOut = Depends(oauth2.get_async_current_user),
+):
+    revision = await service.get_revision(id, version, current_user)
+    if revision is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Version {version} of note {id} was not found",
+        )
+    if revision is False:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Unauthorized",
+        )
+    # A version never changes once written.
+    tag = caching.etag("revision", id, version)
+    return caching.conditional(request, response, tag) or revision
+
+
+@router.post("/{id}/revisions/{version}/restore", response_model=note_schemas.NoteOut)
+async def restore_revision(
+    id: int,
+    version: int,
+    service: NoteService = Depends(),
+    current_user: user_schemas.UserOut = Depends(oauth2.get_async_current_user),
+):
+    note = await service.restore_revision(id, version, current_user)
+    if note is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Version {version} of note {id} was not found",
+        )
+    if note is False:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Unauthorized",
+        )
+    return note
+
+
 @router.delete("/{id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_note(
+async def delete_note(
     id: int,
     service: NoteService = Depends(),
-    current_user: user_schemas.UserOut = Depends(oauth2.get_current_user),
+    current_user: user_schemas.UserOut = Depends(oauth2.get_async_current_user),
 ):
-    response = service.delete_note(id, current_user)
+    response = await service.delete_note(id, current_user)
     if response is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -143,3 +396,12 @@ def delete_note(
             detail="Unauthorized",
         )
     return Response(status_code=status.HTTP_204_NO_CONTENT)
+
+
+def _check_note_size(note: note_schemas.NoteCreate) -> None:
+    try:
+        streaming.check_text_size(note.note, settings.max_note_bytes)
+    except streaming.NoteTooLarge as e:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=str(e)
+        )
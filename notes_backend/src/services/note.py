@@ -1,11 +1,15 @@
 import logging
-from typing import Optional
+import time
+from typing import Any, AsyncIterator, Dict, List, Optional
 
-import markdown
 from auth_lib import models
+from auth_lib.config import settings
 from auth_lib.schemas import note_schemas, user_schemas
-from fastapi import Depends
-from repositories.note import NoteRepository
+from fastapi import BackgroundTasks, Depends
+from repositories.note import AsyncNoteRepository
+from starlette.concurrency import run_in_threadpool
+from utils import edits, export, pagination, rendering
+from utils.batch import BatchEntry
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -16,10 +20,15 @@ class NoteService:
     Service class for handling note-related operations.
     """
 
-    def __init__(self, note_repository: NoteRepository = Depends()):
+    def __init__(
+        self,
+        background_tasks: BackgroundTasks,
+        note_repository: AsyncNoteRepository = Depends(),
+    ):
         self.note_repo = note_repository
+        self.background_tasks = background_tasks
 
-    def get_note(
+    async def get_note(
         self, note_id: int, user: user_schemas.UserOut
     ) -> Optional[models.Note]:
         """
@@ -33,53 +42,99 @@ class NoteService:
             str: The note content converted to HTML.
         """
         logger.info(f"Fetching note with ID {note_id} for user {user.id}")
-        note = self.note_repo.get_note(note_id, user)
+        note = await self.note_repo.get_note(note_id, user)
         if note is None:
             logger.warning(f"Note with ID {note_id} not found for user {user.id}")
         return note
 
-    def get_markdown_note(
+    async def get_markdown_note(
         self, note_id: int, user: user_schemas.UserOut
-    ) -> Optional[str]:
+    ) -> Optional[rendering.RenderedNote]:
         """
         Retrieve a note and convert its content to Markdown.
 
+        The HTML stored when the note was written is served as is. Notes without
+        it, or rendered by another renderer version, are rendered now and stored
+        for the next read.
+
         Args:
             note_id (int): The ID of the note to retrieve.
             user (user_schemas.UserOut): The user requesting the note.
 
         Returns:
-            Optional[str]: The note content converted to HTML, or None if not found.
+            Optional[rendering.RenderedNote]: The note content converted to HTML
+                and the version of the note, or None if not found.
         """
         logger.info(f"Fetching markdown content for note {note_id} and user {user.id}")
-        note = self.get_note(note_id, user)
-        if note is None:
+        note = await self.note_repo.get_note_html(note_id, user)
+        if not note:
             logger.warning(f"Markdown conversion failed: Note {note_id} not found")
             return None
 
+        if note.html is not None and note.html_renderer == rendering.RENDERER_VERSION:
+            return rendering.RenderedNote(note.html, note.version)
+
         try:
-            content = note.note
-            html = markdown.markdown(content)
-            return html
+            # Large documents take a while to render, keep that off the event loop.
+            html = await run_in_threadpool(rendering.render, note.note)
         except Exception as e:
             logger.exception(f"Error converting note {note_id} to markdown: {e}")
             raise
+        self.background_tasks.add_task(
+            self.note_repo.store_html,
+            note_id,
+            html,
+            rendering.content_hash(note.note),
+            rendering.RENDERER_VERSION,
+        )
+        return rendering.RenderedNote(html, note.version)
+
+    async def render_note(self, note_id: int, content: str) -> None:
+        """
+        Render a note that was just written and store the HTML.
 
-    def get_notes(
+        Scheduled as a background task, so failures are only logged; reads fall
+        back to rendering on the fly.
+
+        Args:
+            note_id (int): The ID of the written note.
+            content (str): The markdown content that was written.
+        """
+        try:
+            html = await run_in_threadpool(rendering.render, content)
+            await self.note_repo.store_html(
+                note_id,
+                html,
+                rendering.content_hash(content),
+                rendering.RENDERER_VERSION,
+            )
+        except Exception as e:
+            logger.exception(f"Error rendering note {note_id} in the background: {e}")
+
+    async def get_notes(
         self,
         user: user_schemas.UserOut,
         limit: int,
         page: int,
         search: Optional[str] = "",
+        search_mode: note_schemas.SearchMode = note_schemas.SearchMode.title,
+        after: Optional[pagination.Cursor] = None,
     ) -> note_schemas.NoteResponse:
         """
         Retrieve a paginated list of notes for a user.
 
+        A ``next_cursor`` is returned whenever more notes follow the page newest
+        first; passing it back as ``after`` continues with keyset pagination.
+        Rank-ordered full-text pages don't produce one and can't be continued
+        with one.
+
         Args:
             user (user_schemas.UserOut): The user requesting the notes.
             limit (int): The number of notes to return per page.
             page (int): The page number to retrieve.
             search (Optional[str]): Optional search term to filter notes.
+            search_mode (note_schemas.SearchMode): How the search term is matched.
+            after (Optional[pagination.Cursor]): The decoded cursor of the previous page.
 
         Returns:
             note_schemas.NoteResponse: A response object containing the paginated notes.
@@ -87,15 +142,87 @@ class NoteService:
         logger.info(
             f"Fetching notes for user {user.id} with limit {limit} and page {page}"
         )
-        notes, total = self.note_repo.get_notes(user, limit, page, search)
+        notes, total = await self.note_repo.get_notes(
+            user, limit, page, search, search_mode, after
+        )
         logger.info(f"Fetched {len(notes)} notes out of {total} for user {user.id}")
 
         response = note_schemas.NoteResponse(
-            data=notes, limit=limit, page=page, total=total
+            data=notes,
+            limit=limit,
+            page=None if after is not None else page,
+            total=total,
+            next_cursor=_next_cursor(
+                notes, limit, page, total, search, search_mode, after
+            ),
         )
         return response
 
-    def create_note(
+    async def get_note_summaries(
+        self,
+        user: user_schemas.UserOut,
+        limit: int,
+        page: int,
+        search: Optional[str] = "",
+        search_mode: note_schemas.SearchMode = note_schemas.SearchMode.title,
+        after: Optional[pagination.Cursor] = None,
+        preview: int = 0,
+    ) -> Dict[str, Any]:
+        """
+        Retrieve a page of note summaries, without the note bodies.
+
+        The page is built from plain rows and returned as a dict shaped like
+        ``note_schemas.NoteSummaryResponse``, ready to be serialized as is.
+
+        Args:
+            user (user_schemas.UserOut): The user requesting the notes.
+            limit (int): The number of notes to return per page.
+            page (int): The page number to retrieve.
+            search (Optional[str]): Optional search term to filter notes.
+            search_mode (note_schemas.SearchMode): How the search term is matched.
+            after (Optional[pagination.Cursor]): The decoded cursor of the previous page.
+            preview (int): Number of leading characters of each body to include.
+
+        Returns:
+            Dict[str, Any]: The paginated note summaries.
+        """
+        logger.info(
+            f"Fetching note summaries for user {user.id} with limit {limit} "
+            f"and page {page}"
+        )
+        rows, total = await self.note_repo.get_note_summaries(
+            user, limit, page, search, search_mode, after, preview
+        )
+        return {
+            "data": [row._asdict() for row in rows],
+            "limit": limit,
+            "page": None if after is not None else page,
+            "total": total,
+            "next_cursor": _next_cursor(
+                rows, limit, page, total, search, search_mode, after
+            ),
+        }
+
+    def export_notes(
+        self, user: user_schemas.UserOut, export_format: note_schemas.ExportFormat
+    ) -> AsyncIterator[bytes]:
+        """
+        Stream all of a user's notes as NDJSON lines or as a zip of markdown files.
+
+        Args:
+            user (user_schemas.UserOut): The user exporting their notes.
+            export_format (note_schemas.ExportFormat): The format of the export.
+
+        Returns:
+            AsyncIterator[bytes]: The encoded export, produced as notes are read.
+        """
+        logger.info(f"Exporting notes for user {user.id} as {export_format.value}")
+        rows = self.note_repo.stream_notes(user, settings.export_batch_size)
+        if export_format == note_schemas.ExportFormat.zip:
+            return export.zip_stream(rows)
+        return export.ndjson_lines(rows)
+
+    async def create_note(
         self, note: note_schemas.NoteCreate, user: user_schemas.UserOut
     ) -> models.Note:
         """
@@ -109,11 +236,63 @@ class NoteService:
             models.Note: The created note.
         """
         logger.info(f"Creating note for user {user.id}")
-        new_note = self.note_repo.create_note(note, user)
+        new_note = await self.note_repo.create_note(note, user)
         logger.info(f"Note created with ID {new_note.id} for user {user.id}")
+        self.background_tasks.add_task(self.render_note, new_note.id, new_note.note)
         return new_note
 
-    def update_note(
+    async def create_notes(
+        self, entries: List[BatchEntry], user: user_schemas.UserOut
+    ) -> note_schemas.NoteBatchResponse:
+        """
+        Create many notes at once, reporting the outcome of every entry.
+
+        Args:
+            entries (List[BatchEntry]): Notes to create, or the reason an input
+                item was already rejected while parsing.
+            user (user_schemas.UserOut): The user creating the notes.
+
+        Returns:
+            note_schemas.NoteBatchResponse: Per-item results and insert throughput.
+        """
+        logger.info(f"Importing {len(entries)} notes for user {user.id}")
+        started = time.perf_counter()
+
+        results = []
+        valid = []
+        for index, entry in enumerate(entries):
+            if isinstance(entry, str):
+                results.append(note_schemas.NoteBatchItem(index=index, error=entry))
+                continue
+            item = note_schemas.NoteBatchItem(index=index, title=entry.title)
+            item.error = _validate_note(entry)
+            if item.error is None:
+                valid.append((item, entry))
+            results.append(item)
+
+        ids = await self.note_repo.create_notes(
+            [note for _, note in valid], user, settings.notes_batch_chunk_size
+        )
+        for (item, _), note_id in zip(valid, ids):
+            item.id = note_id
+            if note_id is None:
+                item.error = "Rejected by the database"
+
+        elapsed = time.perf_counter() - started
+        created = sum(1 for item in results if item.id is not None)
+        logger.info(
+            f"Imported {created} of {len(entries)} notes for user {user.id} "
+            f"in {elapsed:.3f}s"
+        )
+        return note_schemas.NoteBatchResponse(
+            results=results,
+            created=created,
+            failed=len(results) - created,
+            elapsed_seconds=elapsed,
+            rows_per_second=created / elapsed if elapsed > 0 else 0.0,
+        )
+
+    async def update_note(
         self,
         note_id: int,
         updated_note_info: note_schemas.NoteCreate,
@@ -131,14 +310,159 @@ class NoteService:
             models.Note: The updated note.
         """
         logger.info(f"Updating note {note_id} for user {user.id}")
-        note = self.note_repo.update_note(note_id, updated_note_info, user)
+        note = await self.note_repo.update_note(
+            note_id,
+            updated_note_info,
+            user,
+            settings.note_revision_snapshot_interval,
+        )
         if isinstance(note, models.Note):
             logger.info(f"Note {note_id} updated successfully for user {user.id}")
+            self.background_tasks.add_task(self.render_note, note.id, note.note)
         else:
             logger.warning(f"Failed to update note {note_id} for user {user.id}")
         return note
 
-    def delete_note(self, note_id: int, user: user_schemas.UserOut) -> Optional[bool]:
+    async def patch_note(
+        self,
+        note_id: int,
+        patch: note_schemas.NotePatch,
+        user: user_schemas.UserOut,
+    ) -> Optional[Dict[str, Any] | bool]:
+        """
+        Apply edits or a unified diff to a note, see ``AsyncNoteRepository.patch_note``.
+
+        The stored HTML is dropped rather than rendered again, since patches
+        tend to come in quick succession; the next read renders it.
+
+        Args:
+            note_id (int): The ID of the note to patch.
+            patch (note_schemas.NotePatch): The changes and the version they
+                were made at.
+            user (user_schemas.UserOut): The user requesting the patch.
+
+        Returns:
+            Dict[str, Any]: The patched note without its content, shaped like
+                ``note_schemas.NoteSummary``, None if it doesn't exist or False
+                if it belongs to another user.
+        """
+        if patch.edits is not None and len(patch.edits) > settings.note_patch_max_edits:
+            raise ValueError(
+                f"A patch can hold at most {settings.note_patch_max_edits} edits"
+            )
+        logger.info(f"Patching note {note_id} for user {user.id}")
+        note = await self.note_repo.patch_note(
+            note_id,
+            patch,
+            user,
+            settings.note_revision_snapshot_interval,
+            settings.max_note_bytes,
+        )
+        if not note:
+            logger.warning(f"Failed to patch note {note_id} for user {user.id}")
+            return note
+        logger.info(f"Note {note_id} patched to version {note.version}")
+        return note._asdict()
+
+    async def get_revisions(
+        self, note_id: int, user: user_schemas.UserOut, limit: int, page: int
+    ) -> Optional[note_schemas.NoteRevisionResponse | bool]:
+        """
+        List the past versions of a note, newest first.
+
+        Args:
+            note_id (int): The ID of the note.
+            user (user_schemas.UserOut): The user requesting the revisions.
+            limit (int): The number of revisions to return per page.
+            page (int): The page number to retrieve.
+
+        Returns:
+            note_schemas.NoteRevisionResponse: The page of revisions, None if the
+                note doesn't exist or False if it belongs to another user.
+        """
+        logger.info(f"Fetching revisions of note {note_id} for user {user.id}")
+        found = await self.note_repo.get_revisions(note_id, user, limit, page)
+        if not found:
+            return found
+        rows, total = found
+        return note_schemas.NoteRevisionResponse(
+            data=[row._asdict() for row in rows], limit=limit, page=page, total=total
+        )
+
+    async def get_revision(
+        self, note_id: int, version: int, user: user_schemas.UserOut
+    ) -> Optional[note_schemas.NoteRevisionOut | bool]:
+        """
+        Rebuild a version of a note.
+
+        Starting from the nearest later snapshot, or the current content, the
+        stored edits are undone one version at a time; that takes fewer than
+        ``note_revision_snapshot_interval`` steps.
+
+        Args:
+            note_id (int): The ID of the note.
+            version (int): The version to rebuild, the current one included.
+            user (user_schemas.UserOut): The user requesting the revision.
+
+        Returns:
+            note_schemas.NoteRevisionOut: The note as it was at ``version``, None
+                if there is no such version or False if the note belongs to
+                another user.
+        """
+        logger.info(f"Fetching version {version} of note {note_id} for user {user.id}")
+        found = await self.note_repo.get_revision_chain(note_id, version, user)
+        if not found:
+            return found
+        current, chain = found
+        if version == current.version:
+            return note_schemas.NoteRevisionOut(
+                note_id=note_id, version=version, title=current.title, note=current.note
+            )
+        if not chain or chain[-1].version != version:
+            logger.warning(f"Version {version} of note {note_id} not found")
+            return None
+
+        content = current.note
+        for revision in chain:
+            if revision.snapshot is not None:
+                content = revision.snapshot
+            else:
+                content = edits.apply_edits(content, revision.delta)
+        return note_schemas.NoteRevisionOut(
+            note_id=note_id, version=version, title=chain[-1].title, note=content
+        )
+
+    async def restore_revision(
+        self, note_id: int, version: int, user: user_schemas.UserOut
+    ) -> Optional[models.Note | bool]:
+        """
+        Make a past version of a note its current content again.
+
+        The restore is saved as a new version, so it can be undone like any
+        other update.
+
+        Args:
+            note_id (int): The ID of the note.
+            version (int): The version to restore.
+            user (user_schemas.UserOut): The user requesting the restore.
+
+        Returns:
+            models.Note: The updated note, None if there is no such version or
+                False if the note belongs to another user.
+        """
+        revision = await self.get_revision(note_id, version, user)
+        if not revision:
+            return revision
+        logger.info(f"Restoring version {version} of note {note_id} for user {user.id}")
+        return await self.update_note(
+            note_id,
+            note_schemas.NoteCreate(title=revision.title, note=revision.note),
+            user,
+        )
+
+    async def delete_note(
+        self, note_id: int, user: user_schemas.UserOut
+    ) -> Optional[bool]:
         """
         Delete a note.
 
@@ -150,9 +474,43 @@ class NoteService:
             Optional[Response]: A response indicating successful deletion.
         """
         logger.info(f"Deleting note {note_id} for user {user.id}")
-        response = self.note_repo.delete_note(note_id, user)
+        response = await self.note_repo.delete_note(note_id, user)
         if response is True:
             logger.info(f"Note {note_id} deleted successfully for user {user.id}")
         else:
             logger.warning(f"Failed to delete note {note_id} for user {user.id}")
         return response
+
+
+def _next_cursor(
+    notes: List[Any],
+    limit: int,
+    page: int,
+    total: Optional[int],
+    search: Optional[str],
+    search_mode: note_schemas.SearchMode,
+    after: Optional[pagination.Cursor],
+) -> Optional[str]:
+    """The cursor of the page after ``notes``, when date-ordered notes follow."""
+    if after is not None:
+        has_more = len(notes) == limit
+    else:
+        ranked = bool(search) and search_mode == note_schemas.SearchMode.fulltext
+        has_more = not ranked and page * limit < total
+
+    if not has_more or not notes:
+        return None
+    return pagination.encode_cursor(notes[-1].created_at, notes[-1].id)
+
+
+def _validate_note(note: note_schemas.NoteCreate) -> Optional[str]:
+    """Check a note against the column constraints before it reaches the database."""
+    if not note.title:
+        return "title is required"
+    for field in ("title", "note"):
+        max_length = getattr(models.Note.__table__.c[field].type, "length", None)
+        if max_length is not None and len(getattr(note, field)) > max_length:
+            return f"{field} is longer than {max_length} characters"
+    if len(note.note.encode("utf-8")) > settings.max_note_bytes:
+        return f"note is larger than {settings.max_note_bytes} bytes"
+    return None
@@ -4,7 +4,7 @@ from typing import Optional
 from auth_lib import models, oauth2
 from auth_lib.schemas import token_schemas, user_schemas
 from fastapi import Depends
-from repositories.user import UserRepository
+from repositories.user import AsyncUserRepository
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -15,10 +15,10 @@ class UserService:
     Service class for handling user-related business logic.
     """
 
-    def __init__(self, user_repository: UserRepository = Depends()):
+    def __init__(self, user_repository: AsyncUserRepository = Depends()):
         self.user_repo = user_repository
 
-    def get_user(self, email: str) -> Optional[models.User]:
+    async def get_user(self, email: str) -> Optional[models.User]:
         """
         Fetch a user by email.
 
@@ -29,12 +29,12 @@ class UserService:
             models.User: The user object if found.
         """
         logger.info(f"Fetching user with email: {email}")
-        user = self.user_repo.get_user(email=email)
+        user = await self.user_repo.get_user(email=email)
         if user is None:
             logger.warning(f"User with email {email} not found")
         return user
 
-    def create_user(
+    async def create_user(
         self, new_user_info: user_schemas.UserCreate
     ) -> Optional[token_schemas.Token]:
         """
@@ -47,7 +47,7 @@ class UserService:
             token_schemas.Token: The access token for the new user.
         """
         logger.info(f"Creating new user with email: {new_user_info.email}")
-        new_user = self.user_repo.create_user(new_user_info=new_user_info)
+        new_user = await self.user_repo.create_user(new_user_info=new_user_info)
 
         if new_user is None:
             logger.warning(f"User with email: {new_user_info.email} already exists")
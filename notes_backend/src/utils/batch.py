@@ -0,0 +1,100 @@
+import os
+import tarfile
+import zipfile
+from typing import IO, Any, Callable, Iterator, List, Tuple, Union
+
+from auth_lib.config import settings
+from auth_lib.schemas import note_schemas
+from pydantic import ValidationError
+from utils import streaming
+
+# Each entry of a batch is either a note to insert or the reason it was rejected.
+BatchEntry = Union[note_schemas.NoteCreate, str]
+
+
+class BatchTooLarge(ValueError):
+    pass
+
+
+def parse_json_notes(payload: Any, max_items: int) -> List[BatchEntry]:
+    """Validate a JSON array of notes, raising BatchTooLarge past ``max_items``."""
+    if not isinstance(payload, list):
+        raise ValueError("Expected a JSON array of notes")
+    if len(payload) > max_items:
+        raise _too_many(max_items)
+
+    entries: List[BatchEntry] = []
+    for item in payload:
+        try:
+            entries.append(note_schemas.NoteCreate.model_validate(item))
+        except ValidationError as e:
+            entries.append("; ".join(error["msg"] for error in e.errors()))
+    return entries
+
+
+def read_markdown_archive(
+    fileobj: IO[bytes], max_items: int, max_bytes: int
+) -> List[BatchEntry]:
+    """
+    Read every file of a zip or tar archive (optionally compressed) as a note.
+
+    Files are titled with their base name; anything that isn't a UTF-8 ``.md``
+    file becomes a rejected entry. Reading stops with BatchTooLarge as soon as
+    the archive holds more than ``max_items`` files or its notes add up to more
+    than ``max_bytes``. Raises ValueError for unreadable archives.
+    """
+    entries: List[BatchEntry] = []
+    total = 0
+    for path, open_member in _archive_members(fileobj):
+        if len(entries) >= max_items:
+            raise _too_many(max_items)
+        name = os.path.basename(path)
+        if name.startswith(".") or path.startswith("__MACOSX/"):
+            continue
+        if not name.endswith(".md"):
+            entries.append(f"{path}: only markdown (.md) files can be imported")
+            continue
+        try:
+            with open_member() as member:
+                text = streaming.read_text(
+                    member, settings.max_note_bytes, settings.upload_chunk_bytes
+                )
+        except streaming.NoteTooLarge as e:
+            entries.append(f"{path}: {e}")
+            continue
+        except UnicodeDecodeError:
+            entries.append(f"{path}: file is not valid UTF-8")
+            continue
+        total += len(text.encode("utf-8"))
+        if total > max_bytes:
+            raise BatchTooLarge(f"A batch can hold at most {max_bytes} bytes of notes")
+        entries.append(note_schemas.NoteCreate(title=name, note=text))
+    return entries
+
+
+def _too_many(max_items: int) -> BatchTooLarge:
+    return BatchTooLarge(f"A batch can hold at most {max_items} notes")
+
+
+def _archive_members(
+    fileobj: IO[bytes],
+) -> Iterator[Tuple[str, Callable[[], IO[bytes]]]]:
+    if zipfile.is_zipfile(fileobj):
+        fileobj.seek(0)
+        try:
+            with zipfile.ZipFile(fileobj) as archive:
+                for info in archive.infolist():
+                    if not info.is_dir():
+                        yield info.filename, lambda info=info: archive.open(info)
+        except zipfile.BadZipFile as e:
+            raise ValueError("Corrupt zip archive") from e
+        return
+
+    fileobj.seek(0)
+    try:
+        with tarfile.open(fileobj=fileobj, mode="r:*") as archive:
+            for member in archive:
+                if member.isfile():
+                    yield member.name, lambda member=member: archive.extractfile(member)
+    except tarfile.TarError as e:
+        raise ValueError("Expected a zip or tar archive of markdown files") from e
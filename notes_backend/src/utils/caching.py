@@ -0,0 +1,38 @@
+import hashlib
+from typing import Any, Optional
+
+from fastapi import Request, Response, status
+
+# Notes are private to their owner: browsers may keep them, shared caches may
+# not, and every reuse is revalidated with If-None-Match.
+CACHE_CONTROL = "private, no-cache"
+
+
+def etag(*parts: Any) -> str:
+    """A strong entity tag identifying a representation built from ``parts``."""
+    digest = hashlib.sha256("|".join(map(str, parts)).encode("utf-8")).hexdigest()
+    return f'"{digest[:32]}"'
+
+
+def etag_matches(if_none_match: Optional[str], tag: str) -> bool:
+    """Whether an ``If-None-Match`` header lists ``tag``, compared weakly."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return any(
+        candidate.strip().removeprefix("W/") == tag
+        for candidate in if_none_match.split(",")
+    )
+
+
+def conditional(request: Request, response: Response, tag: str) -> Optional[Response]:
+    """
+    Set the caching headers of ``response`` and, when the client already holds
+    ``tag``, return the ``304 Not Modified`` response to send instead.
+    """
+    headers = {"ETag": tag, "Cache-Control": CACHE_CONTROL}
+    response.headers.update(headers)
+    if etag_matches(request.headers.get("if-none-match"), tag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return None
@@ -0,0 +1,270 @@
+import difflib
+import json
+import re
+from typing import List, NamedTuple, Optional, Sequence, Tuple, Union
+
+# ``(offset, delete, insert)``: remove ``delete`` characters at ``offset`` and
+# put ``insert`` in their place. The offsets of a list of edits refer to the
+# text as left by the edits before them.
+Edit = Tuple[int, int, str]
+
+# Changed regions spanning more lines than this aren't diffed line by line but
+# replaced as a whole, bounding the cost of diffing rewrites of large notes.
+MAX_DIFF_LINES = 2000
+
+_HUNK_HEADER = re.compile(r"^@@ -(\d+)(?:,(\d+))? \+(\d+)(?:,(\d+))? @@")
+
+
+class EditConflict(Exception):
+    """Edits were made against content that has changed since."""
+
+
+class Hunk(NamedTuple):
+    """A hunk of a unified diff replacing ``old``, starting at 1-based ``line``."""
+
+    line: int
+    old: str
+    new: str
+
+
+def apply_edits(text: str, edits: Sequence[Edit]) -> str:
+    """Apply ``edits`` to ``text``, raising ValueError when one is out of range."""
+    for offset, delete, insert in edits:
+        if offset < 0 or delete < 0 or offset + delete > len(text):
+            raise ValueError(
+                f"Edit at {offset} deleting {delete} characters is outside "
+                f"the text of {len(text)} characters"
+            )
+        text = text[:offset] + insert + text[offset + delete :]
+    return text
+
+
+def diff(old: str, new: str) -> List[Edit]:
+    """The edits turning ``old`` into ``new``."""
+    prefix = _common_prefix(old, new)
+    suffix = _common_suffix(old[prefix:], new[prefix:])
+    old_lines = old[prefix : len(old) - suffix].splitlines(keepends=True)
+    new_lines = new[prefix : len(new) - suffix].splitlines(keepends=True)
+    if not old_lines and not new_lines:
+        return []
+    if max(len(old_lines), len(new_lines)) > MAX_DIFF_LINES:
+        return [(prefix, len(old) - prefix - suffix, new[prefix : len(new) - suffix])]
+
+    edits: List[Edit] = []
+    position = prefix
+    matcher = difflib.SequenceMatcher(None, old_lines, new_lines)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        removed = "".join(old_lines[i1:i2])
+        added = "".join(new_lines[j1:j2])
+        if tag != "equal":
+            # Narrow replaced lines down to the characters that changed.
+            start = _common_prefix(removed, added)
+            end = _common_suffix(removed[start:], added[start:])
+            edits.append(
+                (
+                    position + start,
+                    len(removed) - start - end,
+                    added[start : len(added) - end],
+                )
+            )
+        position += len(added)
+    return edits
+
+
+def compose(edits: Sequence[Edit], length: int) -> List[Edit]:
+    """
+    Turn ``edits`` of a text of ``length`` characters into replacements of the
+    original text: disjoint, in ascending order and with offsets into it.
+
+    Only the lengths are needed, so this works without the text itself. Raises
+    ValueError when an edit is out of range.
+    """
+    # The edited text, as (start, end) ranges of the original and inserted text.
+    pieces: List[Union[Tuple[int, int], str]] = [(0, length)] if length else []
+    for offset, delete, insert in edits:
+        total = sum(_piece_size(piece) for piece in pieces)
+        if offset < 0 or delete < 0 or offset + delete > total:
+            raise ValueError(
+                f"Edit at {offset} deleting {delete} characters is outside "
+                f"the text of {total} characters"
+            )
+        pieces = (
+            _take(pieces, 0, offset)
+            + ([insert] if insert else [])
+            + _take(pieces, offset + delete, total)
+        )
+
+    replacements: List[Edit] = []
+    position = 0
+    inserted: List[str] = []
+    for piece in pieces:
+        if isinstance(piece, str):
+            inserted.append(piece)
+            continue
+        start, end = piece
+        if start > position or inserted:
+            replacements.append((position, start - position, "".join(inserted)))
+            inserted = []
+        position = end
+    if position < length or inserted:
+        replacements.append((position, length - position, "".join(inserted)))
+    return replacements
+
+
+def trim(
+    replacements: Sequence[Edit], removed: Sequence[str]
+) -> Tuple[List[Edit], List[str]]:
+    """
+    Narrow ``replacements`` down to the characters that change, given the text
+    each of them removes, dropping those that change nothing. Returns them with
+    the text they now remove.
+    """
+    trimmed: List[Edit] = []
+    trimmed_removed: List[str] = []
+    for (start, delete, insert), text in zip(replacements, removed):
+        prefix = _common_prefix(text, insert)
+        suffix = _common_suffix(text[prefix:], insert[prefix:])
+        if delete - prefix - suffix or len(insert) - prefix - suffix:
+            trimmed.append(
+                (
+                    start + prefix,
+                    delete - prefix - suffix,
+                    insert[prefix : len(insert) - suffix],
+                )
+            )
+            trimmed_removed.append(text[prefix : len(text) - suffix])
+    return trimmed, trimmed_removed
+
+
+def parse_unified_diff(diff: str) -> List[Hunk]:
+    """Read the hunks of a unified diff of one file, raising ValueError if invalid."""
+    hunks: List[Hunk] = []
+    old: List[str] = []
+    new: List[str] = []
+    last: Tuple[List[str], ...] = ()
+    line_number = remaining_old = remaining_new = 0
+    started = False
+
+    def close() -> None:
+        if remaining_old or remaining_new:
+            raise ValueError("Diff hunk is shorter than its header says")
+        if started:
+            hunks.append(Hunk(line_number, "".join(old), "".join(new)))
+
+    # Only "\n" ends a line; note lines may hold "\r" and other separators.
+    for line in diff.split("\n"):
+        if line.startswith("\\"):
+            # "\ No newline at end of file" is about the line before it.
+            for side in last:
+                side[-1] = side[-1].removesuffix("\n")
+            continue
+        if remaining_old or remaining_new:
+            tag, text = line[:1] or " ", line[1:] + "\n"
+            if tag == " " and remaining_old and remaining_new:
+                old.append(text)
+                new.append(text)
+                remaining_old -= 1
+                remaining_new -= 1
+                last = (old, new)
+            elif tag == "-" and remaining_old:
+                old.append(text)
+                remaining_old -= 1
+                last = (old,)
+            elif tag == "+" and remaining_new:
+                new.append(text)
+                remaining_new -= 1
+                last = (new,)
+            else:
+                raise ValueError(f"Unexpected diff line {line!r}")
+            continue
+
+        header = _HUNK_HEADER.match(line)
+        if header:
+            close()
+            start, count = int(header[1]), int(header[2] or 1)
+            # An empty old side gives the line after which to insert.
+            line_number = start if count else start + 1
+            remaining_old, remaining_new = count, int(header[4] or 1)
+            old, new, last = [], [], ()
+            started = True
+        elif started and line.startswith("--- "):
+            raise ValueError("A diff can only change one note")
+        elif started and line:
+            raise ValueError(f"Unexpected diff line {line!r}")
+        # Anything before the first hunk is a file header.
+    close()
+
+    for previous, hunk in zip(hunks, hunks[1:]):
+        if hunk.line < previous.line:
+            raise ValueError("Diff hunks must be in ascending order")
+    return hunks
+
+
+def hunk_replacements(
+    hunks: Sequence[Hunk], starts: Sequence[Optional[int]], length: int
+) -> List[Edit]:
+    """
+    The replacements of the original text made by ``hunks``, given the offset
+    at which each hunk's first line starts (None past the last line).
+
+    Raises EditConflict when the hunks don't fit the text.
+    """
+    replacements: List[Edit] = []
+    end = 0
+    for hunk, start in zip(hunks, starts):
+        if start is None or start < end or start + len(hunk.old) > length:
+            raise EditConflict("The diff doesn't apply to the current note")
+        replacements.append((start, len(hunk.old), hunk.new))
+        end = start + len(hunk.old)
+    return replacements
+
+
+def size(edits: Sequence[Edit]) -> int:
+    """The length of ``edits`` serialized as JSON."""
+    return len(json.dumps(edits, separators=(",", ":")))
+
+
+def _piece_size(piece: Union[Tuple[int, int], str]) -> int:
+    return len(piece) if isinstance(piece, str) else piece[1] - piece[0]
+
+
+def _take(
+    pieces: List[Union[Tuple[int, int], str]], start: int, stop: int
+) -> List[Union[Tuple[int, int], str]]:
+    """The pieces covering characters ``start`` to ``stop`` of the text."""
+    taken: List[Union[Tuple[int, int], str]] = []
+    position = 0
+    for piece in pieces:
+        size = _piece_size(piece)
+        low, high = max(start - position, 0), min(stop - position, size)
+        if low < high:
+            if isinstance(piece, str):
+                taken.append(piece[low:high])
+            else:
+                taken.append((piece[0] + low, piece[0] + high))
+        position += size
+    return taken
+
+
+def _common_prefix(a: str, b: str) -> int:
+    # Bisect with slice comparisons, which run in C, instead of a Python loop
+    # over every character of large notes.
+    low, high = 0, min(len(a), len(b))
+    while low < high:
+        middle = (low + high + 1) // 2
+        if a[:middle] == b[:middle]:
+            low = middle
+        else:
+            high = middle - 1
+    return low
+
+
+def _common_suffix(a: str, b: str) -> int:
+    low, high = 0, min(len(a), len(b))
+    while low < high:
+        middle = (low + high + 1) // 2
+        if a[len(a) - middle :] == b[len(b) - middle :]:
+            low = middle
+        else:
+            high = middle - 1
+    return low
@@ -0,0 +1,58 @@
+import json
+import re
+import zipfile
+from typing import AsyncIterable, AsyncIterator
+
+from sqlalchemy import Row
+
+
+def _note_dict(row: Row) -> dict:
+    return {
+        "id": row.id,
+        "title": row.title,
+        "note": row.note,
+        "created_at": row.created_at.isoformat(),
+        "owner_id": row.owner_id,
+        "version": row.version,
+    }
+
+
+async def ndjson_lines(rows: AsyncIterable[Row]) -> AsyncIterator[bytes]:
+    async for row in rows:
+        yield json.dumps(_note_dict(row), ensure_ascii=False).encode("utf-8") + b"\n"
+
+
+class _ZipStream:
+    """Write-only, unseekable sink for ZipFile whose bytes are drained as they come."""
+
+    def __init__(self) -> None:
+        self._buffer = bytearray()
+
+    def write(self, data: bytes) -> int:
+        self._buffer += data
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def drain(self) -> bytes:
+        data = bytes(self._buffer)
+        self._buffer.clear()
+        return data
+
+
+def _markdown_filename(row: Row) -> str:
+    title = re.sub(r"[^\w.-]+", "-", row.title or "").strip("-.") or "note"
+    if title.endswith(".md"):
+        title = title[:-3]
+    return f"{row.id}-{title}.md"
+
+
+async def zip_stream(rows: AsyncIterable[Row]) -> AsyncIterator[bytes]:
+    """Stream a zip with one ``.md`` file per note, one note in memory at a time."""
+    sink = _ZipStream()
+    with zipfile.ZipFile(sink, mode="w", compression=zipfile.ZIP_DEFLATED) as archive:
+        async for row in rows:
+            archive.writestr(_markdown_filename(row), row.note)
+            yield sink.drain()
+    yield sink.drain()
@@ -0,0 +1,93 @@
+import asyncio
+import logging
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Optional
+
+from auth_lib.config import settings
+from fastapi import HTTPException, status
+from prometheus_client import Counter, Gauge, Histogram
+from utils import utils
+
+logger = logging.getLogger(__name__)
+
+PASSWORD_HASH_SECONDS = Histogram(
+    "password_hash_seconds",
+    "Time to hash or verify a password, including time queued for a worker.",
+    ["operation"],
+    buckets=(0.05, 0.1, 0.25, 0.5, 1, 2, 4, 8),
+)
+PASSWORD_HASH_PENDING = Gauge(
+    "password_hash_pending", "Password hashing jobs queued or running."
+)
+PASSWORD_HASH_REJECTED = Counter(
+    "password_hash_rejected",
+    "Password hashing jobs rejected because the pool was saturated.",
+    ["operation"],
+)
+
+
+class PasswordHasher:
+    """
+    Runs bcrypt in a dedicated process pool so password work never competes with
+    request handling for the event loop or the GIL.
+
+    At most ``max_pending`` jobs may be queued or running; beyond that requests
+    are rejected straight away with a 503 instead of piling up behind bcrypt.
+    """
+
+    def __init__(self, workers: Optional[int], max_pending: int):
+        self.workers = workers
+        self.max_pending = max_pending
+        self._pending = 0
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    @property
+    def executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return self._executor
+
+    async def hash(self, password: str) -> str:
+        return await self._run("hash", utils.hash, password)
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        return await self._run("verify", utils.verify, plain_password, hashed_password)
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    async def _run(self, operation: str, fn: Callable[..., Any], *args: Any) -> Any:
+        if self._pending >= self.max_pending:
+            PASSWORD_HASH_REJECTED.labels(operation).inc()
+            logger.warning(f"Password hashing saturated, rejecting {operation}")
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Server busy, please retry",
+                headers={"Retry-After": "1"},
+            )
+
+        self._pending += 1
+        PASSWORD_HASH_PENDING.inc()
+        started = time.perf_counter()
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self.executor, fn, *args)
+        finally:
+            self._pending -= 1
+            PASSWORD_HASH_PENDING.dec()
+            PASSWORD_HASH_SECONDS.labels(operation).observe(
+                time.perf_counter() - started
+            )
+
+
+password_hasher = PasswordHasher(
+    workers=settings.password_hash_workers,
+    max_pending=settings.password_hash_max_pending,
+)
@@ -0,0 +1,21 @@
+import base64
+import binascii
+import json
+from datetime import datetime
+from typing import Tuple
+
+Cursor = Tuple[datetime, int]
+
+
+def encode_cursor(created_at: datetime, note_id: int) -> str:
+    payload = json.dumps([created_at.isoformat(), note_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Cursor:
+    try:
+        payload = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        created_at, note_id = json.loads(payload)
+        return datetime.fromisoformat(created_at), int(note_id)
+    except (binascii.Error, TypeError, ValueError) as e:
+        raise ValueError(f"Invalid cursor: {cursor!r}") from e
@@ -0,0 +1,273 @@
+import ipaddress
+import math
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, NamedTuple, Optional, Protocol, Sequence, Tuple
+
+from auth_lib import oauth2
+from auth_lib.config import settings
+from auth_lib.schemas import user_schemas
+from fastapi import Depends, HTTPException, Request, status
+from fastapi.responses import JSONResponse
+from prometheus_client import Counter
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+REQUESTS_REJECTED = Counter(
+    "requests_rejected",
+    "Requests turned away by rate limiting or load shedding.",
+    ["route", "reason"],
+)
+
+PERIODS = {"second": 1, "minute": 60, "hour": 3600}
+
+
+class RateLimit(NamedTuple):
+    """A token bucket holding up to ``burst`` requests, refilled at ``rate`` per second."""
+
+    rate: float
+    burst: int
+
+    @classmethod
+    def parse(cls, value: str) -> "RateLimit":
+        """Parse limits like ``"10/second"`` or ``"20/minute"``."""
+        count, _, period = value.partition("/")
+        try:
+            requests = int(count)
+            seconds = PERIODS[period.strip()]
+        except (KeyError, ValueError):
+            raise ValueError(f"Invalid rate limit {value!r}, expected e.g. '20/minute'")
+        return cls(requests / seconds, requests)
+
+
+class RateLimitBackend(Protocol):
+    async def acquire(self, key: str, limit: RateLimit) -> float:
+        """Take a token from ``key``'s bucket; return 0 or the seconds until one is free."""
+
+
+class MemoryBackend:
+    """
+    Token buckets kept in this process, so each worker enforces its own limits.
+
+    Only the ``max_keys`` most recently used buckets are kept; a dropped bucket
+    simply starts full again.
+    """
+
+    def __init__(
+        self, max_keys: int = 100_000, clock: Callable[[], float] = time.monotonic
+    ):
+        self.max_keys = max_keys
+        self._clock = clock
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+
+    async def acquire(self, key: str, limit: RateLimit) -> float:
+        now = self._clock()
+        tokens, updated = self._buckets.pop(key, (limit.burst, now))
+        tokens = min(limit.burst, tokens + (now - updated) * limit.rate)
+        wait = 0.0
+        if tokens >= 1:
+            tokens -= 1
+        else:
+            wait = (1 - tokens) / limit.rate
+        self._buckets[key] = (tokens, now)
+        while len(self._buckets) > self.max_keys:
+            self._buckets.popitem(last=False)
+        return wait
+
+    def clear(self) -> None:
+        self._buckets.clear()
+
+
+_TOKEN_BUCKET_SCRIPT = """
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local time = redis.call('TIME')
+local now = tonumber(time[1]) + tonumber(time[2]) / 1000000
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'updated')
+local tokens = tonumber(bucket[1]) or burst
+local updated = tonumber(bucket[2]) or now
+tokens = math.min(burst, tokens + math.max(now - updated, 0) * rate)
+local wait = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+else
+    wait = (1 - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'updated', now)
+redis.call('PEXPIRE', KEYS[1], math.ceil(burst / rate * 1000))
+return tostring(wait)
+"""
+
+
+class RedisBackend:
+    """
+    Token buckets shared by every worker through Redis, updated atomically by a
+    Lua script using the Redis server's clock. Requires the ``redis`` package.
+    """
+
+    def __init__(self, url: str, prefix: str = "ratelimit:"):
+        try:
+            from redis.asyncio import Redis
+        except ImportError as e:
+            raise RuntimeError(
+                "The redis package is required for RATE_LIMIT_BACKEND_URL"
+            ) from e
+        self.prefix = prefix
+        self._client = Redis.from_url(url)
+        self._script = self._client.register_script(_TOKEN_BUCKET_SCRIPT)
+
+    async def acquire(self, key: str, limit: RateLimit) -> float:
+        wait = await self._script(
+            keys=[self.prefix + key], args=[limit.rate, limit.burst]
+        )
+        return float(wait)
+
+
+class RateLimiter:
+    """Applies the configured limit of each route, falling back to ``default``."""
+
+    def __init__(
+        self,
+        backend: RateLimitBackend,
+        default: RateLimit,
+        limits: Dict[str, RateLimit],
+        enabled: bool = True,
+    ):
+        self.backend = backend
+        self.default = default
+        self.limits = limits
+        self.enabled = enabled
+
+    async def hit(self, route: str, key: str) -> None:
+        """Count a request to ``route`` by ``key``, raising a 429 when over the limit."""
+        if not self.enabled:
+            return
+        wait = await self.backend.acquire(
+            f"{route}:{key}", self.limits.get(route, self.default)
+        )
+        if wait > 0:
+            REQUESTS_REJECTED.labels(route, "rate_limit").inc()
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Too many requests, please retry later",
+                headers={"Retry-After": str(max(math.ceil(wait), 1))},
+            )
+
+
+def _backend(url: Optional[str]) -> RateLimitBackend:
+    return RedisBackend(url) if url else MemoryBackend()
+
+
+limiter = RateLimiter(
+    _backend(settings.rate_limit_backend_url),
+    RateLimit.parse(settings.rate_limit_default),
+    {route: RateLimit.parse(limit) for route, limit in settings.rate_limits.items()},
+    settings.rate_limit_enabled,
+)
+
+
+Network = ipaddress.IPv4Network | ipaddress.IPv6Network
+
+# Reverse proxies and load balancers whose X-Forwarded-For header is believed.
+trusted_proxies: Tuple[Network, ...] = tuple(
+    ipaddress.ip_network(proxy, strict=False) for proxy in settings.trusted_proxies
+)
+
+
+def _is_trusted(address: str, proxies: Sequence[Network]) -> bool:
+    try:
+        ip = ipaddress.ip_address(address)
+    except ValueError:
+        return False
+    return any(ip in network for network in proxies)
+
+
+def client_address(request: Request, proxies: Sequence[Network] = ()) -> str:
+    """
+    The address of the client that sent ``request``.
+
+    That is the peer address, unless the peer is one of ``proxies``: then it is
+    the last X-Forwarded-For entry that isn't a trusted proxy itself, since the
+    entries before it could have been set by the client.
+    """
+    address = request.client.host if request.client else "unknown"
+    if not _is_trusted(address, proxies):
+        return address
+
+    forwarded = [
+        entry.strip()
+        for header in request.headers.getlist("x-forwarded-for")
+        for entry in header.split(",")
+        if entry.strip()
+    ]
+    for address in reversed(forwarded):
+        if not _is_trusted(address, proxies):
+            break
+    return address
+
+
+def _route_name(request: Request) -> str:
+    route = request.scope.get("route")
+    return getattr(route, "name", None) or request.url.path
+
+
+async def limit_by_user(
+    request: Request,
+    current_user: user_schemas.UserOut = Depends(oauth2.get_async_current_user),
+) -> None:
+    """Router dependency limiting each authenticated user per route."""
+    await limiter.hit(_route_name(request), f"user:{current_user.id}")
+
+
+async def limit_by_ip(request: Request) -> None:
+    """
+    Router dependency limiting each client address per route.
+
+    Behind a reverse proxy every request comes from the proxy's address, so
+    list it in ``TRUSTED_PROXIES`` to limit by the forwarded client address.
+    """
+    client = client_address(request, trusted_proxies)
+    await limiter.hit(_route_name(request), f"ip:{client}")
+
+
+class ConcurrencyLimitMiddleware:
+    """
+    Sheds load once ``max_concurrent`` requests are in flight in this worker,
+    answering straight away with a 503 and ``Retry-After`` instead of queueing
+    for the threadpool and the database pool.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        max_concurrent: int,
+        exempt_paths: Tuple[str, ...] = ("/metrics",),
+    ) -> None:
+        self.app = app
+        self.max_concurrent = max_concurrent
+        self.exempt_paths = exempt_paths
+        self._active = 0
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if (
+            scope["type"] != "http"
+            or self.max_concurrent <= 0
+            or scope["path"] in self.exempt_paths
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        if self._active >= self.max_concurrent:
+            REQUESTS_REJECTED.labels("unmatched", "concurrency").inc()
+            response = JSONResponse(
+                {"detail": "Server is busy, please retry later"},
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                headers={"Retry-After": "1"},
+            )
+            await response(scope, receive, send)
+            return
+
+        self._active += 1
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self._active -= 1
@@ -0,0 +1,21 @@
+import hashlib
+from typing import NamedTuple
+
+import markdown
+
+# Stored HTML produced by another renderer version is rendered again on read, so
+# bump the suffix whenever the markdown extensions or options change.
+RENDERER_VERSION = f"markdown-{markdown.__version__}.1"
+
+
+def content_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def render(text: str) -> str:
+    return markdown.markdown(text)
+
+
+class RenderedNote(NamedTuple):
+    html: str
+    version: int
@@ -0,0 +1,118 @@
+import codecs
+from typing import IO, Dict, List, Optional
+
+from fastapi import HTTPException, UploadFile, status
+from fastapi.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+
+class NoteTooLarge(ValueError):
+    pass
+
+
+def check_text_size(text: str, max_bytes: int) -> None:
+    """Raise NoteTooLarge when ``text`` takes more than ``max_bytes`` as UTF-8."""
+    # A character takes one to four bytes, so most texts need no encoding.
+    if len(text) * 4 <= max_bytes:
+        return
+    if len(text) > max_bytes or len(text.encode("utf-8")) > max_bytes:
+        raise NoteTooLarge(f"Notes are limited to {max_bytes} bytes")
+
+
+class _TextReader:
+    """Decodes UTF-8 incrementally while enforcing a size limit on the raw bytes."""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._decoder = codecs.getincrementaldecoder("utf-8")()
+        self._parts: List[str] = []
+        self._size = 0
+
+    def feed(self, chunk: bytes) -> None:
+        self._size += len(chunk)
+        if self._size > self.max_bytes:
+            raise NoteTooLarge(f"Notes are limited to {self.max_bytes} bytes")
+        self._parts.append(self._decoder.decode(chunk))
+
+    def finish(self) -> str:
+        self._parts.append(self._decoder.decode(b"", final=True))
+        return "".join(self._parts)
+
+
+async def read_upload_text(file: UploadFile, max_bytes: int, chunk_size: int) -> str:
+    """
+    Read an uploaded file as UTF-8 text, ``chunk_size`` bytes at a time.
+
+    Only one raw chunk is held besides the decoded text, and reading stops as
+    soon as the upload exceeds ``max_bytes``. Raises NoteTooLarge or
+    UnicodeDecodeError.
+    """
+    reader = _TextReader(max_bytes)
+    while chunk := await file.read(chunk_size):
+        reader.feed(chunk)
+    return reader.finish()
+
+
+def read_text(fileobj: IO[bytes], max_bytes: int, chunk_size: int) -> str:
+    """Blocking counterpart of ``read_upload_text`` for plain file objects."""
+    reader = _TextReader(max_bytes)
+    while chunk := fileobj.read(chunk_size):
+        reader.feed(chunk)
+    return reader.finish()
+
+
+class BodySizeLimitMiddleware:
+    """
+    Caps the request body at ``max_bytes``, or at ``limits[path]`` for paths
+    that take more, while it is received.
+
+    A larger ``Content-Length`` is answered with a 413 before anything is
+    read. Bodies without one are counted as they arrive and fail with a 413 as
+    soon as they exceed the limit, so neither JSON nor multipart parsing ever
+    buffers or spools more than that.
+    """
+
+    def __init__(
+        self, app: ASGIApp, max_bytes: int, limits: Optional[Dict[str, int]] = None
+    ) -> None:
+        self.app = app
+        self.max_bytes = max_bytes
+        self.limits = limits or {}
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        max_bytes = self.limits.get(scope["path"], self.max_bytes)
+        detail = f"Request bodies are limited to {max_bytes} bytes"
+        headers = dict(scope["headers"])
+        try:
+            declared = int(headers.get(b"content-length", b"0"))
+        except ValueError:
+            declared = 0
+        if declared > max_bytes:
+            response = JSONResponse(
+                {"detail": detail},
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            )
+            await response(scope, receive, send)
+            return
+
+        received = 0
+
+        async def limited_receive() -> Message:
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > max_bytes:
+                    # FastAPI passes HTTPExceptions raised while parsing the
+                    # body on to the exception handlers.
+                    raise HTTPException(
+                        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                        detail=detail,
+                    )
+            return message
+
+        await self.app(scope, limited_receive, send)
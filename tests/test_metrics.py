@@ -0,0 +1,33 @@
+from prometheus_client import REGISTRY
+
+
+def test_metrics_exposes_pool_stats(client):
+    res = client.get("/metrics")
+
+    assert res.status_code == 200
+    assert res.headers["content-type"].startswith("text/plain")
+    assert 'db_pool_connections_in_use{pool="async"}' in res.text
+    assert "db_pool_checkout_wait_seconds" in res.text
+
+
+def _sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+def test_metrics_records_requests_by_route(authorized_client, test_notes):
+    route = {"method": "GET", "route": "/notes/{id}"}
+    ok_before = _sample("http_requests_total", status="200", **route)
+    missing_before = _sample("http_requests_total", status="404", **route)
+    statements_before = _sample("http_request_db_statements_sum", **route)
+
+    authorized_client.get(f"/notes/{test_notes[0].id}")
+    authorized_client.get("/notes/999999")
+
+    assert _sample("http_requests_total", status="200", **route) == ok_before + 1
+    assert _sample("http_requests_total", status="404", **route) == missing_before + 1
+    assert _sample("http_request_db_statements_sum", **route) >= statements_before + 2
+
+    res = authorized_client.get("/metrics")
+    assert 'http_request_duration_seconds_count{method="GET",route="/notes/{id}"}' in (
+        res.text
+    )
@@ -1,5 +1,16 @@
+import asyncio
+import io
+import json
+import zipfile
+
+import httpx
 import pytest
+from app import app
+from auth_lib import models
+from auth_lib.config import settings
 from auth_lib.schemas import note_schemas
+from sqlalchemy import select, update
+from utils import batch, rendering, streaming
 
 
 def test_get_all_notes(authorized_client, test_notes):
@@ -108,3 +119,406 @@ def test_update_note_non_exist(authorized_client, test_user, test_notes):
     res = authorized_client.put("/notes/8000000", json=data)
 
     assert res.status_code == 404
+
+
+def test_search_notes_by_title(authorized_client, test_notes):
+    res = authorized_client.get("/notes", params={"search": "2nd"})
+
+    notes = note_schemas.NoteResponse(**res.json())
+    assert res.status_code == 200
+    assert notes.total == 1
+    assert notes.data[0].title == "2nd title"
+
+
+def test_search_notes_fulltext_matches_body(authorized_client, test_notes):
+    res = authorized_client.get(
+        "/notes", params={"search": "content", "search_mode": "fulltext"}
+    )
+
+    notes = note_schemas.NoteResponse(**res.json())
+    assert res.status_code == 200
+    assert notes.total == 3
+    assert all(note.owner_id == test_notes[0].owner_id for note in notes.data)
+
+
+def test_search_notes_fulltext_ranks_title_matches_first(authorized_client, test_notes):
+    authorized_client.post("/notes", json={"title": "pizza", "note": "dinner"})
+    authorized_client.post("/notes", json={"title": "dinner", "note": "pizza"})
+
+    res = authorized_client.get(
+        "/notes", params={"search": "pizza", "search_mode": "fulltext"}
+    )
+
+    notes = note_schemas.NoteResponse(**res.json())
+    assert notes.total == 2
+    assert [note.title for note in notes.data] == ["pizza", "dinner"]
+
+
+def test_get_notes_cursor_pagination(authorized_client, test_notes):
+    first = authorized_client.get("/notes", params={"limit": 2}).json()
+    assert first["total"] == 3
+    assert first["next_cursor"] is not None
+
+    res = authorized_client.get(
+        "/notes", params={"limit": 2, "cursor": first["next_cursor"]}
+    )
+    second = note_schemas.NoteResponse(**res.json())
+
+    assert res.status_code == 200
+    assert second.total is None
+    assert second.next_cursor is None
+    assert len(second.data) == 1
+    seen = {note["id"] for note in first["data"]} | {second.data[0].id}
+    assert seen == {note.id for note in test_notes[:3]}
+
+
+def test_get_notes_invalid_cursor(authorized_client, test_notes):
+    res = authorized_client.get("/notes", params={"cursor": "not-a-cursor"})
+    assert res.status_code == 400
+
+
+def test_get_notes_cursor_with_fulltext_search(authorized_client, test_notes):
+    first = authorized_client.get("/notes", params={"limit": 2}).json()
+
+    res = authorized_client.get(
+        "/notes",
+        params={
+            "cursor": first["next_cursor"],
+            "search": "pizza",
+            "search_mode": "fulltext",
+        },
+    )
+    assert res.status_code == 400
+
+    res = authorized_client.get(
+        "/notes",
+        params={"cursor": first["next_cursor"], "search_mode": "fulltext"},
+    )
+    assert res.status_code == 200
+
+
+def test_create_notes_batch_json(authorized_client, test_user):
+    notes = [
+        {"title": "first", "note": "first note"},
+        {"title": "second", "note": "second note"},
+        {"note": "missing title"},
+        {"title": "no body"},
+    ]
+    res = authorized_client.post("/notes/batch", json=notes)
+
+    body = note_schemas.NoteBatchResponse(**res.json())
+    assert res.status_code == 201
+    assert body.created == 2
+    assert body.failed == 2
+    assert [item.id is not None for item in body.results] == [True, True, False, False]
+    assert body.rows_per_second > 0
+
+    listed = authorized_client.get("/notes").json()
+    assert {note["title"] for note in listed["data"]} == {"first", "second"}
+
+
+def test_create_notes_batch_archive(authorized_client, test_user):
+    archive = io.BytesIO()
+    with zipfile.ZipFile(archive, "w") as zf:
+        zf.writestr("notebook/todo.md", "# Todo\n- write tests")
+        zf.writestr("notebook/ideas.md", "# Ideas")
+        zf.writestr("notebook/image.png", b"\x89PNG")
+    archive.seek(0)
+
+    res = authorized_client.post(
+        "/notes/batch", files={"file": ("notebook.zip", archive, "application/zip")}
+    )
+
+    body = note_schemas.NoteBatchResponse(**res.json())
+    assert res.status_code == 201
+    assert body.created == 2
+    assert body.failed == 1
+    assert {item.title for item in body.results if item.id} == {"todo.md", "ideas.md"}
+
+
+@pytest.mark.parametrize(
+    "setting, value", [("notes_batch_max_items", 2), ("notes_batch_max_bytes", 20)]
+)
+def test_create_notes_batch_archive_too_large(
+    authorized_client, test_user, monkeypatch, setting, value
+):
+    monkeypatch.setattr(settings, setting, value)
+    archive = io.BytesIO()
+    with zipfile.ZipFile(archive, "w") as zf:
+        for index in range(3):
+            zf.writestr(f"{index}.md", "ten bytes.")
+    archive.seek(0)
+
+    res = authorized_client.post(
+        "/notes/batch", files={"file": ("notebook.zip", archive, "application/zip")}
+    )
+
+    assert res.status_code == 413
+    assert authorized_client.get("/notes").json()["total"] == 0
+
+
+def test_read_markdown_archive_stops_past_max_items(monkeypatch):
+    archive = io.BytesIO()
+    with zipfile.ZipFile(archive, "w") as zf:
+        for index in range(100):
+            zf.writestr(f"{index}.md", "note")
+    archive.seek(0)
+    opened = []
+    members = batch._archive_members
+
+    def counting_members(fileobj):
+        for path, open_member in members(fileobj):
+            opened.append(path)
+            yield path, open_member
+
+    monkeypatch.setattr(batch, "_archive_members", counting_members)
+
+    with pytest.raises(batch.BatchTooLarge):
+        batch.read_markdown_archive(archive, max_items=3, max_bytes=1024)
+
+    assert len(opened) == 4
+
+
+def test_create_notes_batch_json_too_many(authorized_client, test_user, monkeypatch):
+    monkeypatch.setattr(settings, "notes_batch_max_items", 1)
+    notes = [{"title": "first", "note": "a"}, {"title": "second", "note": "b"}]
+
+    res = authorized_client.post("/notes/batch", json=notes)
+
+    assert res.status_code == 413
+
+
+def test_create_notes_batch_rejects_non_array(authorized_client, test_user):
+    res = authorized_client.post("/notes/batch", json={"title": "a", "note": "b"})
+    assert res.status_code == 400
+
+
+def test_upload_large_markdown_file(authorized_client, test_user):
+    content = "# Large document\n\n" + "Some paragraph with ünïcödé text.\n" * 20000
+
+    res = authorized_client.post(
+        "/notes/markdown",
+        files={"file": ("large.md", content.encode("utf-8"), "text/markdown")},
+    )
+
+    note = note_schemas.NoteOut(**res.json())
+    assert res.status_code == 200
+    assert note.note == content
+
+
+def test_upload_markdown_file_too_large(authorized_client, test_user, monkeypatch):
+    monkeypatch.setattr(settings, "max_note_bytes", 16)
+
+    res = authorized_client.post(
+        "/notes/markdown",
+        files={"file": ("note.md", b"# more than sixteen bytes", "text/markdown")},
+    )
+
+    assert res.status_code == 413
+
+
+def test_create_and_update_note_too_large(authorized_client, test_notes, monkeypatch):
+    monkeypatch.setattr(settings, "max_note_bytes", 16)
+    note = {"title": "too large", "note": "é" * 9}
+
+    assert authorized_client.post("/notes", json=note).status_code == 413
+    res = authorized_client.put(f"/notes/{test_notes[0].id}", json=note)
+    assert res.status_code == 413
+
+
+def test_upload_rejected_while_received(authorized_client, token):
+    limited = streaming.BodySizeLimitMiddleware(app, max_bytes=64 * 1024)
+    chunk = b"a" * 16 * 1024
+    sent = []
+
+    async def body():
+        yield b'--x\r\nContent-Disposition: form-data; name="file"; filename="a.md"\r\n\r\n'
+        for _ in range(64):
+            sent.append(chunk)
+            yield chunk
+        yield b"\r\n--x--\r\n"
+
+    async def post(**kwargs):
+        async with httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=limited), base_url="http://test"
+        ) as client:
+            return await client.post(
+                "/notes/markdown",
+                headers={
+                    "Authorization": f"Bearer {token}",
+                    "Content-Type": "multipart/form-data; boundary=x",
+                },
+                **kwargs,
+            )
+
+    # Without a Content-Length the body is cut off as soon as it's too large.
+    res = asyncio.run(post(content=body()))
+    assert res.status_code == 413
+    assert len(sent) < 8
+
+    res = asyncio.run(post(content=b"a" * (64 * 1024 + 1)))
+    assert res.status_code == 413
+
+
+def test_upload_markdown_file_invalid_utf8(authorized_client, test_user):
+    res = authorized_client.post(
+        "/notes/markdown",
+        files={"file": ("note.md", b"\xff\xfe broken", "text/markdown")},
+    )
+
+    assert res.status_code == 400
+
+
+def _stored_html(session, note_id):
+    return session.execute(
+        select(models.Note.html, models.Note.html_renderer).where(
+            models.Note.id == note_id
+        )
+    ).one()
+
+
+def test_create_note_stores_rendered_html(authorized_client, session):
+    res = authorized_client.post("/notes", json={"title": "t", "note": "# Heading"})
+    note_id = res.json()["id"]
+
+    html, renderer = _stored_html(session, note_id)
+    assert html == "<h1>Heading</h1>"
+    assert renderer == rendering.RENDERER_VERSION
+
+    res = authorized_client.get(f"/notes/markdown/{note_id}")
+    assert res.status_code == 200
+    assert res.text == "<h1>Heading</h1>"
+
+
+def test_update_note_rerenders_html(authorized_client, session, test_notes):
+    note_id = test_notes[0].id
+    authorized_client.put(f"/notes/{note_id}", json={"title": "t", "note": "*new*"})
+
+    html, _ = _stored_html(session, note_id)
+    assert html == "<p><em>new</em></p>"
+
+
+def test_get_markdown_note_renders_missing_html(authorized_client, session, test_notes):
+    note_id = test_notes[0].id
+
+    res = authorized_client.get(f"/notes/markdown/{note_id}")
+
+    assert res.status_code == 200
+    assert res.text == "<p>first content</p>"
+    html, renderer = _stored_html(session, note_id)
+    assert html == "<p>first content</p>"
+    assert renderer == rendering.RENDERER_VERSION
+
+
+def test_get_markdown_note_serves_stored_html(authorized_client, session, test_notes):
+    note_id = test_notes[0].id
+    session.execute(
+        update(models.Note)
+        .where(models.Note.id == note_id)
+        .values(html="<p>stored</p>", html_renderer=rendering.RENDERER_VERSION)
+    )
+    session.commit()
+
+    res = authorized_client.get(f"/notes/markdown/{note_id}")
+
+    assert res.text == "<p>stored</p>"
+
+
+def test_get_markdown_note_of_other_user(authorized_client, test_notes):
+    res = authorized_client.get(f"/notes/markdown/{test_notes[3].id}")
+    assert res.status_code == 404
+
+
+def test_get_note_etag(authorized_client, test_notes):
+    res = authorized_client.get(f"/notes/{test_notes[0].id}")
+    etag = res.headers["etag"]
+    assert res.headers["cache-control"] == "private, no-cache"
+
+    res = authorized_client.get(
+        f"/notes/{test_notes[0].id}", headers={"If-None-Match": etag}
+    )
+    assert res.status_code == 304
+    assert res.headers["etag"] == etag
+    assert res.content == b""
+
+    authorized_client.put(
+        f"/notes/{test_notes[0].id}", json={"title": "t", "note": "changed"}
+    )
+    res = authorized_client.get(
+        f"/notes/{test_notes[0].id}", headers={"If-None-Match": etag}
+    )
+    assert res.status_code == 200
+    assert res.json()["version"] == 2
+    assert res.headers["etag"] != etag
+
+
+def test_get_markdown_note_etag(authorized_client, test_notes):
+    res = authorized_client.get(f"/notes/markdown/{test_notes[0].id}")
+    etag = res.headers["etag"]
+
+    res = authorized_client.get(
+        f"/notes/markdown/{test_notes[0].id}",
+        headers={"If-None-Match": f'W/{etag}, "other"'},
+    )
+    assert res.status_code == 304
+
+
+def test_get_notes_etag(authorized_client, test_notes):
+    res = authorized_client.get("/notes")
+    etag = res.headers["etag"]
+
+    res = authorized_client.get("/notes", headers={"If-None-Match": etag})
+    assert res.status_code == 304
+
+    authorized_client.post("/notes", json={"title": "new", "note": "new"})
+    res = authorized_client.get("/notes", headers={"If-None-Match": etag})
+    assert res.status_code == 200
+
+
+def test_get_notes_summary(authorized_client, test_notes):
+    res = authorized_client.get("/notes", params={"fields": "summary"})
+    assert res.status_code == 200
+
+    page = note_schemas.NoteSummaryResponse(**res.json())
+    assert page.total == 3
+    assert {note.title for note in page.data} == {
+        "first title",
+        "2nd title",
+        "3rd title",
+    }
+    assert all(note.preview is None for note in page.data)
+    assert all("note" not in note for note in res.json()["data"])
+
+
+def test_get_notes_summary_preview(authorized_client, test_notes):
+    res = authorized_client.get(
+        "/notes", params={"fields": "summary", "preview": 5, "search": "first"}
+    )
+
+    page = note_schemas.NoteSummaryResponse(**res.json())
+    assert [note.preview for note in page.data] == ["first"]
+
+
+def test_export_notes_ndjson(authorized_client, test_user, test_notes):
+    res = authorized_client.get("/notes/export")
+    assert res.status_code == 200
+    assert res.headers["content-type"] == "application/x-ndjson"
+
+    notes = [note_schemas.NoteOut(**json.loads(line)) for line in res.text.splitlines()]
+    assert len(notes) == 3
+    assert all(note.owner_id == test_user["id"] for note in notes)
+
+
+def test_export_notes_zip(authorized_client, test_user, test_notes):
+    res = authorized_client.get("/notes/export", params={"format": "zip"})
+    assert res.status_code == 200
+    assert res.headers["content-type"] == "application/zip"
+
+    with zipfile.ZipFile(io.BytesIO(res.content)) as archive:
+        contents = sorted(archive.read(name).decode() for name in archive.namelist())
+    assert contents == ["2nd content", "3rd content", "first content"]
+
+
+def test_unauthorized_user_export_notes(client, test_notes):
+    res = client.get("/notes/export")
+    assert res.status_code == 401
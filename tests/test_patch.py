@@ -0,0 +1,138 @@
+import difflib
+
+import pytest
+from auth_lib.config import settings
+from utils import edits
+
+NOTE = "# Title\n\nfirst line\nsecond line\nthird line\n"
+
+
+def patch(client, note_id, **body):
+    return client.patch(f"/notes/{note_id}", json=body)
+
+
+@pytest.fixture
+def note(authorized_client):
+    res = authorized_client.post("/notes", json={"title": "patch", "note": NOTE})
+    assert res.status_code == 201
+    return res.json()
+
+
+def test_compose_edits():
+    text = "hello world"
+    sequence = [(0, 5, "goodbye"), (8, 5, "moon"), (12, 0, "!")]
+
+    replacements = edits.compose(sequence, len(text))
+
+    assert replacements == [(0, 5, "goodbye"), (6, 5, "moon!")]
+    assert edits.apply_edits(text, sequence) == "goodbye moon!"
+
+
+def test_compose_out_of_range():
+    with pytest.raises(ValueError):
+        edits.compose([(0, 5, ""), (3, 5, "")], 8)
+
+
+def test_parse_unified_diff():
+    new = NOTE.replace("second line\n", "2nd line\nmore\n")
+    diff = "".join(difflib.unified_diff(NOTE.splitlines(True), new.splitlines(True)))
+
+    hunks = edits.parse_unified_diff(diff)
+
+    assert hunks == [edits.Hunk(1, NOTE, new)]
+
+
+def test_patch_note_edits(authorized_client, note):
+    res = patch(
+        authorized_client,
+        note["id"],
+        base_version=1,
+        edits=[
+            {"offset": 2, "delete": 5, "insert": "Heading"},
+            {"offset": 11, "insert": "the "},
+            {"offset": len(NOTE) + 6, "insert": "fourth line\n"},
+        ],
+    )
+
+    assert res.status_code == 200
+    assert res.json()["version"] == 2
+    assert "note" not in res.json()
+    res = authorized_client.get(f"/notes/{note['id']}")
+    assert res.json()["note"] == (
+        "# Heading\n\nthe first line\nsecond line\nthird line\nfourth line\n"
+    )
+
+
+def test_patch_note_diff(authorized_client, note):
+    new = NOTE.replace("second line\n", "2nd line\nmore\n") + "last"
+    diff = "".join(
+        line if line.endswith("\n") else line + "\n\\ No newline at end of file\n"
+        for line in difflib.unified_diff(NOTE.splitlines(True), new.splitlines(True))
+    )
+
+    res = patch(authorized_client, note["id"], base_version=1, diff=diff)
+
+    assert res.status_code == 200
+    assert authorized_client.get(f"/notes/{note['id']}").json()["note"] == new
+
+
+def test_patch_note_records_revision(authorized_client, note):
+    patch(
+        authorized_client,
+        note["id"],
+        base_version=1,
+        edits=[{"offset": 0, "delete": 1, "insert": "##"}],
+    )
+
+    res = authorized_client.get(f"/notes/{note['id']}/revisions/1")
+
+    assert res.json()["note"] == NOTE
+
+
+def test_patch_note_stale_version(authorized_client, note):
+    body = {"base_version": 1, "edits": [{"offset": 0, "insert": "x"}]}
+    assert patch(authorized_client, note["id"], **body).status_code == 200
+
+    res = patch(authorized_client, note["id"], **body)
+
+    assert res.status_code == 409
+    assert authorized_client.get(f"/notes/{note['id']}").json()["note"] == "x" + NOTE
+
+
+def test_patch_note_diff_conflict(authorized_client, note):
+    diff = "@@ -3 +3 @@\n-second line\n+2nd line\n"
+
+    res = patch(authorized_client, note["id"], base_version=1, diff=diff)
+
+    assert res.status_code == 409
+
+
+@pytest.mark.parametrize(
+    "body",
+    [
+        {"base_version": 1, "edits": [{"offset": 1000, "insert": "x"}]},
+        {"base_version": 1, "diff": "@@ -1 +1 @@\n-a\n+b\n+c\n"},
+    ],
+)
+def test_patch_note_invalid(authorized_client, note, body):
+    assert patch(authorized_client, note["id"], **body).status_code == 400
+
+
+def test_patch_note_too_large(authorized_client, note, monkeypatch):
+    monkeypatch.setattr(settings, "max_note_bytes", len(NOTE) + 1)
+    body = {"base_version": 1, "edits": [{"offset": 0, "insert": "é"}]}
+
+    assert patch(authorized_client, note["id"], **body).status_code == 413
+
+
+def test_patch_note_requires_one_change(authorized_client, note):
+    res = patch(authorized_client, note["id"], base_version=1)
+
+    assert res.status_code == 422
+
+
+def test_patch_note_of_other_user(authorized_client, test_notes):
+    body = {"base_version": 1, "edits": []}
+
+    assert patch(authorized_client, test_notes[3].id, **body).status_code == 403
+    assert patch(authorized_client, 8888, **body).status_code == 404
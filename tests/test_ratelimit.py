@@ -0,0 +1,117 @@
+import asyncio
+import ipaddress
+
+import httpx
+import pytest
+from app import app
+from fastapi import Request
+from fastapi.responses import PlainTextResponse
+from fastapi.testclient import TestClient
+from utils import ratelimit
+
+
+@pytest.fixture
+def tight_limits(monkeypatch):
+    monkeypatch.setattr(ratelimit.limiter, "default", ratelimit.RateLimit(1 / 60, 2))
+    monkeypatch.setitem(
+        ratelimit.limiter.limits, "login", ratelimit.RateLimit(1 / 60, 2)
+    )
+
+
+def test_parse_rate_limit():
+    assert ratelimit.RateLimit.parse("30/minute") == ratelimit.RateLimit(0.5, 30)
+    with pytest.raises(ValueError):
+        ratelimit.RateLimit.parse("30 per minute")
+
+
+def test_login_rate_limited_by_ip(client, test_user, tight_limits):
+    credentials = {"username": test_user["email"], "password": test_user["password"]}
+    for _ in range(2):
+        assert client.post("/login", data=credentials).status_code == 200
+
+    res = client.post("/login", data=credentials)
+
+    assert res.status_code == 429
+    assert int(res.headers["retry-after"]) > 0
+
+
+def request_from(peer, forwarded=None):
+    headers = [(b"x-forwarded-for", forwarded.encode())] if forwarded else []
+    return Request({"type": "http", "client": (peer, 50000), "headers": headers})
+
+
+PROXIES = (ipaddress.ip_network("10.0.0.0/8"),)
+
+
+@pytest.mark.parametrize(
+    "peer, forwarded, address",
+    [
+        ("203.0.113.9", None, "203.0.113.9"),
+        # Only trusted proxies may set the forwarded address.
+        ("203.0.113.9", "198.51.100.1", "203.0.113.9"),
+        ("10.0.0.2", "198.51.100.1", "198.51.100.1"),
+        # A client can prepend entries, but not past the proxies' own.
+        ("10.0.0.2", "192.0.2.7, 198.51.100.1, 10.0.0.3", "198.51.100.1"),
+        ("10.0.0.2", None, "10.0.0.2"),
+        ("10.0.0.2", "10.0.0.3", "10.0.0.3"),
+    ],
+)
+def test_client_address(peer, forwarded, address):
+    assert ratelimit.client_address(request_from(peer, forwarded), PROXIES) == address
+
+
+def test_login_rate_limited_per_forwarded_client(
+    test_user, client, tight_limits, monkeypatch
+):
+    monkeypatch.setattr(ratelimit, "trusted_proxies", PROXIES)
+    proxy = TestClient(app, client=("10.0.0.2", 50000))
+    credentials = {"username": test_user["email"], "password": test_user["password"]}
+
+    def login(address):
+        return proxy.post(
+            "/login", data=credentials, headers={"X-Forwarded-For": address}
+        )
+
+    for _ in range(2):
+        assert login("198.51.100.1").status_code == 200
+    assert login("198.51.100.1").status_code == 429
+    assert login("198.51.100.2").status_code == 200
+
+
+def test_notes_rate_limited_per_user(
+    authorized_client, test_user2, tight_limits, test_notes
+):
+    for _ in range(2):
+        assert authorized_client.get("/notes").status_code == 200
+    assert authorized_client.get("/notes").status_code == 429
+    # Every route has its own bucket.
+    assert authorized_client.get(f"/notes/{test_notes[0].id}").status_code == 200
+
+    other = {"Authorization": f"Bearer {test_user2['access_token']}"}
+    assert authorized_client.get("/notes", headers=other).status_code == 200
+
+
+def test_concurrency_limit_sheds_load():
+    release = asyncio.Event()
+
+    async def slow_app(scope, receive, send):
+        await release.wait()
+        await PlainTextResponse("done")(scope, receive, send)
+
+    app = ratelimit.ConcurrencyLimitMiddleware(slow_app, max_concurrent=1)
+
+    async def run():
+        async with httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=app), base_url="http://test"
+        ) as client:
+            first = asyncio.create_task(client.get("/"))
+            await asyncio.sleep(0.01)
+            shed = await client.get("/")
+            release.set()
+            return await first, shed
+
+    first, shed = asyncio.run(run())
+
+    assert first.status_code == 200
+    assert shed.status_code == 503
+    assert shed.headers["retry-after"] == "1"
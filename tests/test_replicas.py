@@ -0,0 +1,134 @@
+import fakeredis
+import pytest
+from app import app
+from auth_lib import database
+from auth_lib.config import settings
+from auth_lib.database import Base, get_async_replica_db
+from auth_lib.writes import MemoryRecentWrites, RedisRecentWrites
+from sqlalchemy import create_engine, text
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import NullPool
+
+# An empty copy of the tables in a schema of its own stands in for a replica
+# that hasn't replayed anything yet.
+SCHEMA = {None: "replica"}
+
+SQLALCHEMY_DATABASE_URL = f"postgresql+psycopg2://{settings.database_username}:{settings.database_password}@{settings.database_hostname}:{settings.database_port}/{settings.database_name}"
+
+engine = create_engine(SQLALCHEMY_DATABASE_URL, poolclass=NullPool)
+
+replica_engine = create_async_engine(
+    SQLALCHEMY_DATABASE_URL.replace("+psycopg2", "+asyncpg"),
+    poolclass=NullPool,
+    execution_options={"schema_translate_map": SCHEMA},
+)
+
+ReplicaSessionLocal = async_sessionmaker(
+    autoflush=False, expire_on_commit=False, bind=replica_engine
+)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [0.0]
+    monkeypatch.setattr(
+        database, "recent_writers", MemoryRecentWrites(ttl=5, clock=lambda: now[0])
+    )
+    return now
+
+
+@pytest.fixture
+def lagging_replica(session, clock):
+    with engine.begin() as connection:
+        connection.execute(text("DROP SCHEMA IF EXISTS replica CASCADE"))
+        connection.execute(text("CREATE SCHEMA replica"))
+        Base.metadata.create_all(
+            connection.execution_options(schema_translate_map=SCHEMA)
+        )
+
+    async def override_get_async_replica_db():
+        async with ReplicaSessionLocal() as db:
+            yield db
+
+    app.dependency_overrides[get_async_replica_db] = override_get_async_replica_db
+    yield
+    del app.dependency_overrides[get_async_replica_db]
+    with engine.begin() as connection:
+        connection.execute(text("DROP SCHEMA replica CASCADE"))
+
+
+def test_reads_use_replica(lagging_replica, authorized_client, test_notes, clock):
+    # Past the sticky window of registering the user.
+    clock[0] += 5
+
+    res = authorized_client.get("/notes")
+
+    assert res.status_code == 200
+    assert res.json()["total"] == 0
+    # A note missing on the replica is looked up on the primary.
+    res = authorized_client.get(f"/notes/{test_notes[0].id}")
+    assert res.status_code == 200
+    assert res.json()["title"] == test_notes[0].title
+
+
+def test_reads_stick_to_primary_after_write(
+    lagging_replica, authorized_client, test_notes, clock
+):
+    clock[0] += 5
+    res = authorized_client.put(
+        f"/notes/{test_notes[0].id}", json={"title": "updated", "note": "updated"}
+    )
+    assert res.status_code == 200
+
+    clock[0] += 4
+    res = authorized_client.get("/notes")
+    assert res.json()["total"] == 3
+
+    clock[0] += 1
+    res = authorized_client.get("/notes")
+    assert res.json()["total"] == 0
+
+
+def test_failed_delete_keeps_reads_on_replica(
+    lagging_replica, authorized_client, test_notes, clock
+):
+    clock[0] += 5
+    res = authorized_client.delete(f"/notes/{test_notes[3].id}")
+    assert res.status_code == 403
+    res = authorized_client.delete("/notes/88888")
+    assert res.status_code == 404
+
+    res = authorized_client.get("/notes")
+    assert res.json()["total"] == 0
+
+
+@pytest.fixture
+def workers():
+    """The recent writes seen by two workers sharing one Redis server."""
+    server = fakeredis.FakeServer()
+    return [
+        RedisRecentWrites(
+            fakeredis.FakeRedis(server=server),
+            fakeredis.FakeAsyncRedis(server=server),
+            ttl=5,
+        )
+        for _ in range(2)
+    ]
+
+
+def test_reads_stick_to_primary_across_workers(
+    lagging_replica, authorized_client, test_notes, clock, workers, monkeypatch
+):
+    clock[0] += 5
+    first, second = workers
+
+    monkeypatch.setattr(database, "recent_writers", first)
+    res = authorized_client.put(
+        f"/notes/{test_notes[0].id}", json={"title": "updated", "note": "updated"}
+    )
+    assert res.status_code == 200
+
+    monkeypatch.setattr(database, "recent_writers", second)
+    res = authorized_client.get("/notes")
+    assert res.json()["total"] == 3
+    assert second.wrote_recently(test_notes[0].owner_id)
@@ -0,0 +1,128 @@
+import pytest
+from auth_lib import models
+from auth_lib.config import settings
+from utils import edits
+
+
+@pytest.mark.parametrize(
+    "old, new",
+    [
+        ("", "new note"),
+        ("same", "same"),
+        ("# Title\n\nfirst line\nsecond line\n", "# Title\n\nfirst line\n"),
+        ("a\nb\nc\nd\n", "a\nB\nc\nd\ne\n"),
+        ("héllo wörld", "hello world!"),
+    ],
+)
+def test_diff_round_trip(old, new):
+    assert edits.apply_edits(old, edits.diff(old, new)) == new
+
+
+def test_apply_edits_out_of_range():
+    with pytest.raises(ValueError):
+        edits.apply_edits("short", [(3, 10, "")])
+
+
+@pytest.fixture
+def edited_note(authorized_client, test_notes, monkeypatch):
+    """The first test note after five updates, and its content at every version."""
+    monkeypatch.setattr(settings, "note_revision_snapshot_interval", 3)
+    note = test_notes[0]
+    contents = {1: note.note}
+    for version in range(2, 7):
+        contents[version] = f"{contents[version - 1]}\nline {version}"
+        res = authorized_client.put(
+            f"/notes/{note.id}", json={"title": note.title, "note": contents[version]}
+        )
+        assert res.status_code == 200
+        assert res.json()["version"] == version
+    return note, contents
+
+
+def test_get_revisions(authorized_client, edited_note):
+    note, _ = edited_note
+
+    res = authorized_client.get(f"/notes/{note.id}/revisions", params={"limit": 3})
+
+    assert res.status_code == 200
+    body = res.json()
+    assert body["total"] == 5
+    assert [revision["version"] for revision in body["data"]] == [5, 4, 3]
+    assert [revision["snapshot"] for revision in body["data"]] == [False, False, True]
+
+
+def test_revisions_store_deltas(session, edited_note):
+    note, contents = edited_note
+
+    revisions = (
+        session.query(models.NoteRevision)
+        .filter(models.NoteRevision.note_id == note.id)
+        .order_by(models.NoteRevision.version)
+        .all()
+    )
+
+    assert [revision.snapshot for revision in revisions] == [
+        None,
+        None,
+        contents[3],
+        None,
+        None,
+    ]
+    assert revisions[3].delta == [[len(contents[4]), len("\nline 5"), ""]]
+
+
+def test_get_revision(authorized_client, edited_note):
+    note, contents = edited_note
+
+    for version, content in contents.items():
+        res = authorized_client.get(f"/notes/{note.id}/revisions/{version}")
+        assert res.status_code == 200
+        assert res.json() == {
+            "note_id": note.id,
+            "version": version,
+            "title": note.title,
+            "note": content,
+        }
+
+    etag = res.headers["etag"]
+    res = authorized_client.get(
+        f"/notes/{note.id}/revisions/6", headers={"If-None-Match": etag}
+    )
+    assert res.status_code == 304
+
+
+def test_get_revision_not_found(authorized_client, edited_note):
+    note, _ = edited_note
+
+    assert authorized_client.get(f"/notes/{note.id}/revisions/7").status_code == 404
+    assert authorized_client.get(f"/notes/{note.id}/revisions/0").status_code == 404
+    assert authorized_client.get("/notes/8888/revisions/1").status_code == 404
+
+
+def test_get_revisions_of_other_user(authorized_client, test_notes):
+    res = authorized_client.get(f"/notes/{test_notes[3].id}/revisions")
+    assert res.status_code == 403
+
+    res = authorized_client.get(f"/notes/{test_notes[3].id}/revisions/1")
+    assert res.status_code == 403
+
+
+def test_restore_revision(authorized_client, edited_note):
+    note, contents = edited_note
+
+    res = authorized_client.post(f"/notes/{note.id}/revisions/2/restore")
+
+    assert res.status_code == 200
+    assert res.json()["note"] == contents[2]
+    assert res.json()["version"] == 7
+    # The restore is a version of its own, so the replaced content is kept.
+    res = authorized_client.get(f"/notes/{note.id}/revisions/6")
+    assert res.json()["note"] == contents[6]
+
+
+def test_restore_missing_revision(authorized_client, edited_note):
+    note, _ = edited_note
+
+    res = authorized_client.post(f"/notes/{note.id}/revisions/9/restore")
+
+    assert res.status_code == 404
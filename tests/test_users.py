@@ -1,7 +1,9 @@
 import jwt
 import pytest
+from auth_lib import models, oauth2
 from auth_lib.config import settings
 from auth_lib.schemas import token_schemas
+from utils.hashing import password_hasher
 
 
 def test_create_user(client):
@@ -49,3 +51,48 @@ def test_incorrect_login(test_user, client, email, password, status_code):
 
     assert res.status_code == status_code
     assert res.json().get("detail") == "Invalid Credentials"
+
+
+def test_current_user_is_cached(authorized_client, test_user):
+    authorized_client.get("/notes")
+    user = oauth2.user_cache.get(test_user["id"])
+
+    assert user is not None
+    assert user.email == test_user["email"]
+
+
+def test_current_user_cache_invalidated_on_change(
+    authorized_client, test_user, session
+):
+    assert authorized_client.get("/notes").status_code == 200
+
+    user = session.get(models.User, test_user["id"])
+    user.email = "changed@gmail.com"
+    session.commit()
+
+    assert oauth2.user_cache.get(test_user["id"]) is None
+    assert authorized_client.get("/notes").status_code == 401
+
+
+def test_token_without_expiry_rejected(client, test_user):
+    token = jwt.encode(
+        {"user_id": test_user["id"], "user_email": test_user["email"]},
+        settings.secret_key,
+        algorithm=settings.algorithm,
+    )
+
+    res = client.get("/notes", headers={"Authorization": f"Bearer {token}"})
+
+    assert res.status_code == 401
+
+
+def test_login_rejected_when_hashing_saturated(test_user, client, monkeypatch):
+    monkeypatch.setattr(password_hasher, "max_pending", 0)
+
+    res = client.post(
+        "/login",
+        data={"username": test_user["email"], "password": test_user["password"]},
+    )
+
+    assert res.status_code == 503
+    assert res.headers["retry-after"] == "1"